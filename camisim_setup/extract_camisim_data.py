@@ -1,20 +1,116 @@
+import fcntl
+import hashlib
+import os
 import re
 import shutil
+import tempfile
 
 from argparse import ArgumentParser
 from pathlib import Path
+from typing import Optional, Tuple
 
 import pandas as pd
 
 from Bio import SeqIO
 
+# records of a multi-FASTA or GenBank archive are given as ARCHIVE::RECORD_ID in the community file; this script runs
+# on its own, so keep this and split_genome_reference in step with snakefiles/snakemake_helpers.py
+ARCHIVE_SEPARATOR = "::"
 
-def get_camisim_per_sample(samples_file: Path, sample_col: str):
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Hard link a file to the target path, copying it only where linking is not possible (e.g. across file
+    systems). An existing target is replaced rather than overwritten, so a linked source is never changed."""
+    Path(target).unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def split_genome_reference(genome: str) -> Tuple[Path, Optional[str]]:
+    """Split a genome given in the community file into its file and, for records of an archive, the record ID.
+    Arguments:
+        genome: path to a genome file, or ARCHIVE::RECORD_ID for a record of a multi-FASTA or GenBank archive
+    Returns:
+        The path to the file and the record ID, or None if the genome is a file of its own.
+    """
+    genome_file, separator, record_id = str(genome).partition(ARCHIVE_SEPARATOR)
+    return Path(genome_file), record_id if separator else None
+
+
+def get_file_type(genome_file: Path) -> str:
+    """Identify whether a file is a GenBank or FASTA file from its first line."""
+    with open(genome_file, "r") as infile:
+        line = infile.readline()
+    if line.startswith("LOCUS"):
+        return "genbank"
+    if line.startswith(">"):
+        return "fasta"
+    raise ValueError("Incorrect file type, only Genbank and Fasta files can be used")
+
+
+def index_archive(archive: Path, index_dir: Path) -> Path:
+    """Index the records of a multi-FASTA or GenBank archive in an SQLite database, so single records can be read
+    without parsing the whole archive. The index is named after the archive's path, size and modification time, so
+    an index is only built once for each version of the archive; jobs indexing the same archive wait for each other.
+    Arguments:
+        archive:    Path to the archive
+        index_dir:  directory to keep indices in
+    Returns:
+        The path to the archive's index.
+    """
+    archive = Path(archive).resolve()
+    archive_stat = os.stat(archive)
+    archive_version = "{}\t{}\t{}".format(archive, archive_stat.st_size, archive_stat.st_mtime_ns)
+    index_file = Path(index_dir, "{}_{}.idx".format(archive.name,
+                                                    hashlib.sha256(archive_version.encode("utf-8")).hexdigest()[:16]))
+    Path(index_dir).mkdir(parents=True, exist_ok=True)
+    with open("{}.lock".format(index_file), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not index_file.exists():
+            # build the index under a temporary name so an interrupted job leaves no partial index
+            tmp_index = Path("{}.tmp".format(index_file))
+            tmp_index.unlink(missing_ok=True)
+            SeqIO.index_db(str(tmp_index), str(archive), get_file_type(archive)).close()
+            os.replace(tmp_index, index_file)
+    return index_file
+
+
+def stage_archive_record(archive: Path, record_id: str, archive_indices: dict, index_dir: Path,
+                         stage_dir: Path) -> Path:
+    """Write a record of an archive to a file of its own in the archive's format, so it is handled like a genome
+    given as a separate file.
+    Arguments:
+        archive:            Path to the archive
+        record_id:          ID of the record in the archive
+        archive_indices:    opened index and format of each archive, by path; updated in place
+        index_dir:          directory to keep indices of archives in
+        stage_dir:          directory to write the record to
+    Returns:
+        The path to the record's file.
+    """
+    if archive not in archive_indices:
+        archive_indices[archive] = (SeqIO.index_db(str(index_archive(archive, index_dir))),
+                                    get_file_type(archive))
+    archive_index, archive_type = archive_indices[archive]
+    if record_id not in archive_index:
+        raise ValueError("Record {} not found in {}".format(record_id, archive))
+    # FASTA genomes are named after their file, so name the file after the cleaned record ID
+    record_path = Path(stage_dir, "{}.{}".format(re.sub(r"[^A-Za-z0-9_\-]", "", record_id.replace(" ", "_")),
+                                                 "gb" if archive_type == "genbank" else "fa"))
+    SeqIO.write(archive_index[record_id], record_path, archive_type)
+    return record_path
+
+
+def get_camisim_per_sample(samples_file: Path, sample_col: str, index_dir: Path = Path("archive_index")):
     """From a tab-separated table giving genbank files and their abundance in a given sample,
     create CAMISIM metadata, genome and abundance files.
     Arguments:
         samples_file:   Path to .tsv file
         sample_col:     column name for sample
+        index_dir:      directory to keep indices of archives in, for genomes given as ARCHIVE::RECORD_ID
+                        (default: archive_index)
     Returns:
         A tab-separated metadata file containing genome ID, OTU, NCBI taxid and novelty category,
         a tab-separated file listing genome ID and abundance,
@@ -26,7 +122,7 @@ def get_camisim_per_sample(samples_file: Path, sample_col: str):
     # check for any genomes with an abundance of 0 in the current sample, remove these
     samples_table = samples_table.loc[samples_table[sample_col] != 0]
     # create metadata and fasta files
-    records = [Path(record) for record in samples_table['genomes']]
+    records = [split_genome_reference(record) for record in samples_table['genomes']]
     # set up metadata file with "genome_ID\tOTU\tNCBI_ID\tnovelty_category"
     metadata = ["genome_ID\tOTU\tNCBI_ID\tnovelty_category"]
     # initialize OTU count to 1 as we want all to be included
@@ -39,8 +135,15 @@ def get_camisim_per_sample(samples_file: Path, sample_col: str):
     fasta_dir = "camisim_fasta_{}".format(sample_col)
     if not Path(fasta_dir).is_dir():
         Path(fasta_dir).mkdir()
+    # open archives once, however many of their records are used
+    archive_indices = {}
+    stage_dir = tempfile.TemporaryDirectory(dir=".", prefix=".archive_records_")
     # for each input file:
-    for gene_file in records:
+    for gene_file, archive_record in records:
+        # give records of an archive a file of their own, read from the archive's index
+        if archive_record is not None:
+            gene_file = stage_archive_record(gene_file, archive_record, archive_indices, index_dir,
+                                             Path(stage_dir.name))
         taxon_id = ""
         strain_name = ""
         file_type = None
@@ -83,10 +186,10 @@ def get_camisim_per_sample(samples_file: Path, sample_col: str):
             record_id = re.sub(r"[^A-Za-z0-9_\-]", "", gene_file.stem.replace(" ", "_"))
             # we cannot extract a taxon, so specify a placeholder - bacteria
             taxon_id = "2"
-            # write a copy of the file under the cleaned name, ending in .fa
+            # link the file under the cleaned name, ending in .fa
             fasta_path = Path(fasta_dir,
                               '{}.fa'.format(record_id)).resolve()  # resolves as far as possible, appends the rest
-            shutil.copyfile(gene_file, fasta_path)
+            link_or_copy(gene_file, fasta_path)
         record_ids.append(record_id)
         # create and append metadata line
         metadata.append("{}\t{}\t{}\tknown_strain".format(record_id, otu_count, taxon_id))
@@ -94,6 +197,9 @@ def get_camisim_per_sample(samples_file: Path, sample_col: str):
 
         # id to file line
         id_to_genome.append("{}\t{}".format(record_id, fasta_path))
+    for archive_index, _ in archive_indices.values():
+        archive_index.close()
+    stage_dir.cleanup()
 
     # write metadata/id to fasta files
     # check if dir exists
@@ -116,7 +222,9 @@ if __name__ == "__main__":
         description="Prepare CAMISIM metadata and id to file mapping files and create FASTA files from gbks")
     parser.add_argument("sample_file", help="Tab-separated file with abundances for samples")
     parser.add_argument("sample_column", help="Column name of sample to extract")
+    parser.add_argument("-i", "--index_dir", default="archive_index",
+                        help="Directory to keep indices of genome archives in (default: archive_index)")
     args = parser.parse_args()
     sample_file = args.sample_file
     sample_column = args.sample_column
-    get_camisim_per_sample(sample_file, sample_column)
+    get_camisim_per_sample(sample_file, sample_column, Path(args.index_dir))
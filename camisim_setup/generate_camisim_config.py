@@ -51,7 +51,8 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
                          abundance_file: Optional[Path] = "", profile_name: Optional[str] = "mbarc",
                          own_error_basename: Optional[str] = "",
                          own_error_readlength: Optional[int] = "",
-                         insert_size: Optional[int] = 270) -> str:
+                         insert_size: Optional[int] = 270, gold_standard: Optional[bool] = True,
+                         ncbi_taxdump: Optional[Path] = "", compress: Optional[int] = 1) -> str:
     """Generate a config file for CAMISIM and write it to a specified filename.
     Arguments:
         camisim_dir:            Path to the directory containing CAMISIM
@@ -71,6 +72,9 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
         own_error_basename:     name of error profile files, without "[1/2].txt", if using own
         own_error_readlength:   length of reads to simulate with own error profile
         insert_size:            mean insert size (default: 270 bp)
+        gold_standard:          whether CAMISIM should generate gold standard assemblies (default: True)
+        ncbi_taxdump:           Path to NCBI taxdump archive or directory (default: taxdump shipped with CAMISIM)
+        compress:               gzip level of the simulated reads; 0 leaves them uncompressed (default: 1)
     Returns:
         A CAMISIM config file with the chosen parameters.
     """
@@ -78,6 +82,9 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
     # do we get a proper insert size?
     if insert_size <= 0:
         raise ValueError("Mean insert size needs to be above 0.")
+    # is the compression level valid?
+    if compress not in range(10):
+        raise ValueError("Compression level must be between 0 and 9.")
     # is the read simulator a valid choice?
     if not readsim in {"art", "wgsim", "nanosim", "pbsim"}:
         raise ValueError("{} is not a valid read simulator. Valid options are art, wgsim, nanosim, pbsim.".format(readsim))
@@ -108,6 +115,9 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
     if (own_error_readlength or own_error_basename) and not profile_name == "own":
         raise ValueError("Custom error profile files and read lengths are only possible when specifying 'own' profiles.")
 
+    if not ncbi_taxdump:
+        ncbi_taxdump = "{}/tools/ncbi-taxonomy_20170222.tar.gz".format(camisim_dir)
+
     # TODO: introduce more defaults?
     config_string = f'''\
     [Main]
@@ -125,16 +135,16 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
     temp_directory=/tmp
     
     # gold standard assembly
-    gsa=True
+    gsa={gold_standard}
     
     # gold standard for all samples combined
-    pooled_gsa=True
+    pooled_gsa={gold_standard}
     
     # anonymize sequences?
     anonymous=False
     
     # compress data (levels 0-9, recommended is 1 the gain of higher levels is not too high)
-    compress=1
+    compress={compress}
     
     # id of dataset, used in foldernames and is prefix in anonymous sequences
     dataset_id=RL
@@ -191,7 +201,7 @@ def generate_config_file(camisim_dir: Path, meta_file: Path, id_file: Path, outp
     # "nodes.dmp"
     # "merged.dmp"
     # "names.dmp"
-    ncbi_taxdump={camisim_dir}/tools/ncbi-taxonomy_20170222.tar.gz
+    ncbi_taxdump={ncbi_taxdump}
     
     # the strain simulator for de novo strain creation
     strain_simulation_template={camisim_dir}/scripts/StrainSimulationWrapper/sgEvolver/simulation_dir/
@@ -272,7 +282,14 @@ if __name__ == "__main__":
                          required with 'own' error profile""")
     parser.add_argument("--profile_readlength", action="store",
                         help="Read length of custom error profile; required with 'own' error profile", type=int)
+    parser.add_argument('--no_gsa', action="store_true",
+                        help="Don't generate gold standard assemblies (not needed for MAGICIAN's evaluation)")
+    parser.add_argument('--ncbi_taxdump', action="store", default="",
+                        help="Path to directory or archive containing the NCBI taxdump "
+                             "(default: taxdump shipped with CAMISIM)")
     parser.add_argument('--errorfree', action="store_true", help="Don't use an error profile (only works with wgsim)")
+    parser.add_argument('--compress', action="store", type=int, default=1, choices=range(10),
+                        help="gzip level of the simulated reads, 0 for uncompressed reads (default: 1)")
     args = parser.parse_args()
 
     # establish location of CAMISIM dir
@@ -319,6 +336,10 @@ if __name__ == "__main__":
 
     # establish remaining paths
     metadata = Path(args.metadata).resolve()
+    if args.ncbi_taxdump:
+        ncbi_taxdump = Path(args.ncbi_taxdump).resolve()
+    else:
+        ncbi_taxdump = ""
     genome_file = Path(args.genome_file).resolve()
     if args.abundance_file:
         abundance_file = Path(args.abundance_file).resolve()
@@ -351,6 +372,8 @@ if __name__ == "__main__":
 
     config_str = generate_config_file(camisim_dir, metadata, genome_file, out_dir, read_sim, read_sim_path, path_to_samtools, sample_type,
                                       genomes, sample_size, error_profile, abundance_file, art_profile_type,
-                                      profile_basename, profile_readlength, insert_size)
+                                      profile_basename, profile_readlength, insert_size,
+                                      gold_standard=not args.no_gsa, ncbi_taxdump=ncbi_taxdump,
+                                      compress=args.compress)
     with open(filename, "w") as outfile:
         outfile.write(config_str)
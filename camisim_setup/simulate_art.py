@@ -0,0 +1,221 @@
+import gzip
+import shutil
+import subprocess
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from Bio import SeqIO, bgzf
+
+# ART profiles shipped with CAMISIM and the read lengths they were built for
+ART_PROFILES = {"mbarc": ("ART_MBARC-26_HiSeq_R", 150),
+                "hi": ("EmpHiSeq2kR", 100),
+                "mi": ("EmpMiSeq250R", 250),
+                "hi150": ("HiSeq2500L150R", 150)}
+# CAMISIM's default standard deviation for fragment sizes
+FRAGMENT_SD = 27
+# directory name mimicking CAMISIM's "{date}_{time}_sample_0" output directories
+SAMPLE_DIR = "direct_art_sample_0"
+# compression of the simulated reads: gzip as CAMISIM does, BGZF (gzip-compatible, in independent blocks) or none
+CODECS = ["gzip", "bgzf", "none"]
+
+
+def get_read_counts(genome_file: Path, abundance_file: Path, sample_size: float,
+                    read_length: int) -> pd.DataFrame:
+    """Distribute a total sample size across genomes according to their relative abundance and size,
+    in the same way as CAMISIM does for a fixed community.
+    Arguments:
+        genome_file:    Path to id_to_genome file linking genome IDs to fasta files
+        abundance_file: Path to file listing relative abundance for each genome ID
+        sample_size:    total sample size in Gbp
+        read_length:    length of a single read
+    Returns:
+        Genome ID, fasta path, genome size, abundance, amount of read pairs and fold coverage for each genome.
+    """
+    if sample_size <= 0:
+        raise ValueError("Sample size must be above 0")
+    if read_length <= 0:
+        raise ValueError("Read length must be above 0")
+    genomes = pd.read_csv(genome_file, sep="\t", header=None, names=["genome_id", "fasta_path"])
+    abundances = pd.read_csv(abundance_file, sep="\t", header=None, names=["genome_id", "abundance"])
+    genomes = pd.merge(genomes, abundances, on="genome_id", how="inner")
+    genomes = genomes.loc[genomes["abundance"] > 0].reset_index(drop=True)
+    if genomes.empty:
+        raise ValueError("No genomes with an abundance above 0 found")
+    genomes["genome_size"] = genomes["fasta_path"].apply(lambda fasta_path: sum(len(record) for record in
+                                                                                SeqIO.parse(fasta_path, "fasta")))
+    # abundance is given per genome copy, so larger genomes get proportionally more reads
+    weighted_size = (genomes["abundance"] * genomes["genome_size"]).sum()
+    total_bases = sample_size * 1000000000
+    genomes["fold_coverage"] = genomes["abundance"] * total_bases / weighted_size
+    genomes["read_pairs"] = (genomes["fold_coverage"] * genomes["genome_size"]
+                             / (2 * read_length)).round().astype(int)
+    return genomes[["genome_id", "fasta_path", "genome_size", "abundance", "read_pairs", "fold_coverage"]]
+
+
+def get_art_cmd(art_path: Path, fasta_path: Path, out_prefix: Path, read_pairs: int, genome_size: int,
+                read_length: int, profile_base: Path, insert_size: int, seed: int) -> list:
+    """Build the ART command for simulating a given amount of paired-end reads from one genome.
+    Arguments:
+        art_path:       Path to the art_illumina executable
+        fasta_path:     Path to the genome's fasta file
+        out_prefix:     prefix for ART's output files
+        read_pairs:     amount of read pairs to simulate
+        genome_size:    total length of the genome in bp
+        read_length:    length of a single read
+        profile_base:   Path to the error profile, without "[1/2].txt"
+        insert_size:    mean insert size
+        seed:           random seed for ART
+    Returns:
+        The command for running ART.
+    """
+    # ART 2.3.6 cannot take read counts directly, so convert the count back into a fold coverage
+    fold_coverage = read_pairs * 2 * read_length / genome_size
+    return [str(art_path), "-p", "-na",
+            "-i", str(fasta_path),
+            "-l", str(read_length),
+            "-m", str(insert_size),
+            "-s", str(FRAGMENT_SD),
+            "-f", "{:.6f}".format(fold_coverage),
+            "-o", str(out_prefix),
+            "-1", "{}1.txt".format(profile_base),
+            "-2", "{}2.txt".format(profile_base),
+            "-rs", str(seed)]
+
+
+def compress_reads(raw_reads: Path, codec: str = "gzip", compression_level: int = 1) -> Path:
+    """Compress a FASTQ file and remove the uncompressed copy.
+    Arguments:
+        raw_reads:          Path to the uncompressed reads
+        codec:              gzip, bgzf or none (default: gzip)
+        compression_level:  compression level from 1 (fastest) to 9 (smallest) (default: 1)
+    Returns:
+        The path to the compressed reads, or the uncompressed reads with codec none.
+    """
+    if codec not in CODECS:
+        raise ValueError("Codec must be one of {}.".format(", ".join(CODECS)))
+    if codec == "none":
+        return raw_reads
+    compressed_reads = Path("{}.gz".format(raw_reads))
+    if codec == "gzip":
+        reads_out = gzip.open(compressed_reads, "wb", compresslevel=compression_level)
+    else:
+        reads_out = bgzf.BgzfWriter(compressed_reads, "wb", compresslevel=compression_level)
+    with open(raw_reads, "rb") as reads_in, reads_out:
+        shutil.copyfileobj(reads_in, reads_out)
+    raw_reads.unlink()
+    return compressed_reads
+
+
+def simulate_genome(art_cmd: list, out_prefix: Path, codec: str = "gzip", compression_level: int = 1) -> None:
+    """Run ART for a single genome and compress the resulting reads as CAMISIM does.
+    Arguments:
+        art_cmd:            the command for running ART
+        out_prefix:         prefix of ART's output files
+        codec:              compression of the reads: gzip, bgzf or none (default: gzip)
+        compression_level:  compression level from 1 to 9 (default: 1)
+    """
+    subprocess.run(art_cmd, check=True, stdout=subprocess.DEVNULL)
+    for mate in ["1", "2"]:
+        compress_reads(Path("{}{}.fq".format(out_prefix, mate)), codec, compression_level)
+
+
+def simulate_reads(genome_file: Path, abundance_file: Path, output_dir: Path, sample_size: float,
+                   art_path: Path, profile_dir: Path, profile_name: Optional[str] = "mbarc",
+                   own_error_basename: Optional[str] = "", own_error_readlength: Optional[int] = None,
+                   insert_size: Optional[int] = 270, threads: Optional[int] = 1,
+                   seed: Optional[int] = 1, codec: str = "gzip", compression_level: int = 1) -> Path:
+    """Simulate reads for all genomes of a community with ART, bypassing CAMISIM's community design.
+    Reads are written in the same layout as CAMISIM's output.
+    Arguments:
+        genome_file:            Path to id_to_genome file linking genome IDs to fasta files
+        abundance_file:         Path to file listing relative abundance for each genome ID
+        output_dir:             output directory (as given to CAMISIM)
+        sample_size:            total sample size in Gbp
+        art_path:               Path to the art_illumina executable
+        profile_dir:            directory containing error profiles
+        profile_name:           name of error profile to use; default "mbarc", options "mbarc",
+                                "hi", "mi", "hi150", "own" (requires giving own profile & lengths)
+        own_error_basename:     name of error profile files, without "[1/2].txt", if using own
+        own_error_readlength:   length of reads to simulate with own error profile
+        insert_size:            mean insert size (default: 270 bp)
+        threads:                amount of genomes to simulate in parallel
+        seed:                   base random seed; each genome gets its own seed derived from this
+        codec:                  compression of the reads: gzip, bgzf or none (default: gzip)
+        compression_level:      compression level from 1 to 9 (default: 1)
+    Returns:
+        The directory containing the simulated reads.
+    """
+    if insert_size <= 0:
+        raise ValueError("Mean insert size needs to be above 0.")
+    if profile_name == "own":
+        if not (own_error_basename and own_error_readlength):
+            raise ValueError("Base profile name and read length must be given when using custom error profile.")
+        profile_base = Path(profile_dir) / own_error_basename
+        read_length = int(own_error_readlength)
+    elif profile_name in ART_PROFILES:
+        if own_error_basename or own_error_readlength:
+            raise ValueError("Custom error profile files and read lengths are only possible "
+                             "when specifying 'own' profiles.")
+        profile_basename, read_length = ART_PROFILES[profile_name]
+        profile_base = Path(profile_dir) / profile_basename
+    else:
+        raise ValueError("""{} is not a valid type of error profile. \
+        Valid options are 'mbarc', 'hi', 'mi', 'hi150', 'own'.""".format(profile_name))
+
+    read_counts = get_read_counts(genome_file, abundance_file, sample_size, read_length)
+    reads_dir = Path(output_dir, SAMPLE_DIR, "reads")
+    reads_dir.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=threads) as executor:
+        simulations = []
+        for genome_count, genome in enumerate(read_counts.itertuples()):
+            out_prefix = reads_dir / genome.genome_id
+            art_cmd = get_art_cmd(art_path, Path(genome.fasta_path), out_prefix, genome.read_pairs,
+                                  genome.genome_size, read_length, profile_base, insert_size, seed + genome_count)
+            simulations.append(executor.submit(simulate_genome, art_cmd, out_prefix, codec, compression_level))
+        # raise any errors from the individual simulations
+        for simulation in simulations:
+            simulation.result()
+    read_counts.to_csv(Path(output_dir, SAMPLE_DIR, "read_counts.tsv"), sep="\t", index=False)
+    return reads_dir
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Simulate reads for a community with ART directly, without CAMISIM")
+    parser.add_argument("genome_file", help="Path to file containing genome ID to fasta path data")
+    parser.add_argument("abundance_file", help="Path to file giving relative abundance of genomes")
+    parser.add_argument('-o', '--out_dir', action="store", help="Output directory (default: camisim_out)",
+                        default="camisim_out")
+    parser.add_argument('-s', '--sample_size', action="store", type=float,
+                        help="Total size of sample in gigabasepairs (default: 1)", default=1)
+    parser.add_argument('--insert_size', action="store", help="Mean insert size in bp (default: 270)",
+                        default=270, type=int)
+    parser.add_argument('--read_sim_path', action="store", required=True,
+                        help="Path to art_illumina executable")
+    parser.add_argument("--error_profile", action="store", required=True,
+                        help="Path to directory containing error profiles")
+    parser.add_argument("--art_profile_type", action="store", default="mbarc",
+                        choices=['mbarc', 'hi', 'mi', 'hi150', 'own'],
+                        help="Type of ART error profile: mbarc, hi, mi, hi150, own (default: mbarc)")
+    parser.add_argument("--profile_basename", action="store", default="",
+                        help="""Base name of custom error profile, if given (name of files without '[1/2].txt');\
+                         required with 'own' error profile""")
+    parser.add_argument("--profile_readlength", action="store", type=int,
+                        help="Read length of custom error profile; required with 'own' error profile")
+    parser.add_argument("-t", "--threads", action="store", type=int, default=1,
+                        help="Amount of genomes to simulate in parallel (default: 1)")
+    parser.add_argument("--seed", action="store", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--codec", action="store", default="gzip", choices=CODECS,
+                        help="Compression of the reads (default: gzip)")
+    parser.add_argument("--compression_level", action="store", type=int, default=1, choices=range(1, 10),
+                        help="Compression level from 1 (fastest) to 9 (smallest) (default: 1)")
+    args = parser.parse_args()
+
+    simulate_reads(Path(args.genome_file), Path(args.abundance_file), Path(args.out_dir), args.sample_size,
+                   Path(args.read_sim_path).resolve(), Path(args.error_profile).resolve(), args.art_profile_type,
+                   args.profile_basename, args.profile_readlength, args.insert_size, args.threads, args.seed,
+                   args.codec, args.compression_level)
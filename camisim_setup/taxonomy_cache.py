@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import tarfile
+import tempfile
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Set
+
+# files CAMISIM reads from the NCBI taxdump
+TAXDUMP_FILES = ["nodes.dmp", "names.dmp", "merged.dmp"]
+INDEX_NAME = "ncbi_taxonomy.sqlite"
+
+
+def build_taxonomy_index(taxdump_archive: Path, cache_dir: Path) -> Path:
+    """Extract the NCBI taxdump shipped with CAMISIM once and index it by taxid, unless this has already been done.
+    Arguments:
+        taxdump_archive:    Path to the .tar.gz archive of the NCBI taxdump
+        cache_dir:          directory to keep the indexed taxonomy in; can be shared between runs
+    Returns:
+        The path to the taxonomy index.
+    """
+    index_file = Path(cache_dir) / INDEX_NAME
+    if index_file.exists():
+        return index_file
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    # build in a temporary file first so concurrent runs never see a half-written index
+    tmp_handle, tmp_index = tempfile.mkstemp(dir=cache_dir, suffix=".sqlite.tmp")
+    os.close(tmp_handle)
+    with sqlite3.connect(tmp_index) as connection:
+        connection.execute("CREATE TABLE nodes (taxid TEXT PRIMARY KEY, parent TEXT, line TEXT)")
+        connection.execute("CREATE TABLE names (taxid TEXT, line TEXT)")
+        connection.execute("CREATE TABLE merged (taxid TEXT PRIMARY KEY, new_taxid TEXT, line TEXT)")
+        with tarfile.open(taxdump_archive, "r:gz") as taxdump:
+            for member in taxdump.getmembers():
+                dump_name = Path(member.name).name
+                if dump_name not in TAXDUMP_FILES:
+                    continue
+                dump_file = taxdump.extractfile(member)
+                dump_lines = (line.decode("utf-8").rstrip("\n") for line in dump_file)
+                fields = ((line, line.split("\t|\t")) for line in dump_lines)
+                if dump_name == "nodes.dmp":
+                    connection.executemany("INSERT INTO nodes VALUES (?, ?, ?)",
+                                           ((parts[0].strip(), parts[1].strip(), line) for line, parts in fields))
+                elif dump_name == "names.dmp":
+                    connection.executemany("INSERT INTO names VALUES (?, ?)",
+                                           ((parts[0].strip(), line) for line, parts in fields))
+                else:
+                    connection.executemany("INSERT INTO merged VALUES (?, ?, ?)",
+                                           ((parts[0].strip(), parts[1].strip(" \t|"), line)
+                                            for line, parts in fields))
+        connection.execute("CREATE INDEX names_taxid ON names (taxid)")
+    connection.close()
+    os.replace(tmp_index, index_file)
+    return index_file
+
+
+def get_metadata_taxids(metadata_file: Path) -> Set[str]:
+    """Get all NCBI taxids listed in a CAMISIM metadata file.
+    Arguments:
+        metadata_file:  Path to the metadata file written by extract_camisim_data
+    Returns:
+        The taxids of all genomes in the metadata file.
+    """
+    with open(metadata_file, "r") as metadata:
+        metadata.readline()  # skip header
+        return {line.strip().split("\t")[2] for line in metadata if line.strip()}
+
+
+def write_taxonomy_subset(index_file: Path, taxids: Set[str], out_dir: Path) -> None:
+    """Write a taxdump containing only the given taxids and their full lineages.
+    Arguments:
+        index_file: Path to the taxonomy index
+        taxids:     taxids which need to be resolved
+        out_dir:    directory to write nodes.dmp, names.dmp and merged.dmp to
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(index_file) as connection:
+        # resolve taxids which have been merged into others
+        merged_lines = []
+        to_visit = set()
+        for taxid in taxids:
+            merged = connection.execute("SELECT new_taxid, line FROM merged WHERE taxid = ?", (taxid,)).fetchone()
+            if merged:
+                merged_lines.append(merged[1])
+                to_visit.add(merged[0])
+            else:
+                to_visit.add(taxid)
+        # walk up to the root for each taxid
+        lineage_nodes = {}
+        while to_visit:
+            taxid = to_visit.pop()
+            node = connection.execute("SELECT parent, line FROM nodes WHERE taxid = ?", (taxid,)).fetchone()
+            if not node:
+                raise ValueError("Taxid {} not found in NCBI taxonomy".format(taxid))
+            lineage_nodes[taxid] = node[1]
+            if node[0] not in lineage_nodes and node[0] != taxid:
+                to_visit.add(node[0])
+        name_lines = [line for taxid in sorted(lineage_nodes, key=int)
+                      for (line,) in connection.execute("SELECT line FROM names WHERE taxid = ?", (taxid,))]
+    connection.close()
+    node_lines = [lineage_nodes[taxid] for taxid in sorted(lineage_nodes, key=int)]
+    for dump_name, dump_lines in zip(TAXDUMP_FILES, [node_lines, name_lines, sorted(merged_lines)]):
+        with open(Path(out_dir, dump_name), "w") as dump_file:
+            dump_file.write("".join(line + "\n" for line in dump_lines))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Write a reduced NCBI taxdump for a community from a shared, "
+                                        "indexed copy of the NCBI taxonomy")
+    parser.add_argument("metadata", nargs="?", default="",
+                        help="Path to CAMISIM metadata file; if not given, only build the shared index")
+    parser.add_argument("-a", "--archive", action="store", required=True,
+                        help="Path to NCBI taxdump archive (.tar.gz) shipped with CAMISIM")
+    parser.add_argument("-c", "--cache_dir", action="store", required=True,
+                        help="Directory containing the shared taxonomy index (built if missing)")
+    parser.add_argument("-o", "--out_dir", action="store",
+                        help="Directory to write the reduced taxdump to; required when giving a metadata file")
+    args = parser.parse_args()
+    if args.metadata and not args.out_dir:
+        parser.error("Output directory must be given with a metadata file.")
+
+    taxonomy_index = build_taxonomy_index(Path(args.archive), Path(args.cache_dir))
+    if args.metadata:
+        write_taxonomy_subset(taxonomy_index, get_metadata_taxids(Path(args.metadata)), Path(args.out_dir))
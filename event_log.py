@@ -0,0 +1,204 @@
+"""Turn Snakemake's console output into a stream of structured job events."""
+
+import datetime
+import re
+import time
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# job headers and messages as printed by Snakemake 7 to 9; headers of grouped jobs are indented
+JOB_HEADER = re.compile(r"^\s*(?:local)?(?:rule|checkpoint) (\S+):$")
+JOB_ERROR = re.compile(r"^Error in rule (\S+):$")
+JOB_FINISHED = re.compile(r"^Finished (?:job (\d+)\.|jobid: (\d+))")
+JOB_PROPERTY = re.compile(r"^\s+(jobid|wildcards|threads|resources|benchmark): (.*)$")
+EXIT_STATUS = re.compile(r"non-zero exit status (\d+)")
+PROGRESS = re.compile(r"^(\d+) of (\d+) steps \((\d+(?:\.\d+)?)%\) done")
+
+
+def get_timestamp(seconds: float) -> str:
+    """Format seconds since the epoch as a local ISO 8601 timestamp."""
+    return datetime.datetime.fromtimestamp(seconds).astimezone().isoformat(timespec="seconds")
+
+
+def get_key_values(property_value: str) -> Dict[str, str]:
+    """Split Snakemake's "key=value, key=value" job properties."""
+    return dict(pair.split("=", 1) for pair in property_value.split(", ") if "=" in pair)
+
+
+def get_benchmark_usage(benchmark_file: str) -> Dict[str, float]:
+    """Read CPU time and peak memory of a finished job from its benchmark file, if it was written.
+    Arguments:
+        benchmark_file: Path to the benchmark file given in the job's description
+    Returns:
+        CPU time in seconds and maximum resident set size in MB where available.
+    """
+    if not benchmark_file or not Path(benchmark_file).exists():
+        return {}
+    try:
+        benchmark = pd.read_csv(benchmark_file, sep="\t", na_values=["-", "NA"])
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        return {}
+    usage = {}
+    for column, key in [("cpu_time", "cpu_time_s"), ("max_rss", "max_rss_mb")]:
+        if column in benchmark.columns and not benchmark[column].isna().all():
+            usage[key] = round(float(benchmark[column].mean()), 2)
+    return usage
+
+
+class SnakemakeEventParser:
+    """Parse Snakemake's console output line by line into job start, job end and progress events.
+
+    Arguments:
+        clock:  function returning the current time in seconds since the epoch
+    """
+    def __init__(self, clock: Optional[Callable[[], float]] = time.time):
+        self.clock = clock
+        self.workflow_start = clock()
+        self.jobs = {}
+        self.finished = {}
+        self.failed = {}
+        self.open_block = None
+        self.last_exit_status = None
+
+    def parse_line(self, line: str) -> List[dict]:
+        """Parse one line of Snakemake's output.
+        Arguments:
+            line:   the line of output
+        Returns:
+            All events completed by this line (possibly none).
+        """
+        line = line.rstrip("\n")
+        events = []
+        job_property = JOB_PROPERTY.match(line)
+        job_header = JOB_HEADER.match(line)
+        # jobs of a group follow each other in one indented block
+        if self.open_block is not None and job_header:
+            events += self.close_block()
+        if self.open_block is not None and job_property:
+            self.open_block[job_property.group(1)] = job_property.group(2)
+            # resources are the last property Snakemake lists before the job runs
+            if job_property.group(1) == "resources" and self.open_block["type"] == "start":
+                events += self.close_block()
+            return events
+        if self.open_block is not None and not line.startswith((" ", "\t")):
+            events += self.close_block()
+
+        exit_status = EXIT_STATUS.search(line)
+        if exit_status:
+            self.last_exit_status = int(exit_status.group(1))
+        job_error = JOB_ERROR.match(line)
+        job_finished = JOB_FINISHED.match(line)
+        progress = PROGRESS.match(line)
+        if job_header:
+            self.open_block = {"type": "start", "rule": job_header.group(1), "start": self.clock()}
+        elif job_error:
+            self.open_block = {"type": "error", "rule": job_error.group(1)}
+        elif job_finished:
+            jobid = job_finished.group(1) or job_finished.group(2)
+            events.append(self.end_job(jobid, 0))
+        elif progress:
+            events.append(self.get_progress(int(progress.group(1)), int(progress.group(2)),
+                                            float(progress.group(3))))
+        return [event for event in events if event]
+
+    def close_block(self) -> List[dict]:
+        """Turn a completed job description into a job start or job end event."""
+        block, self.open_block = self.open_block, None
+        if "jobid" not in block:
+            return []
+        if block["type"] == "error":
+            exit_status = self.last_exit_status if self.last_exit_status is not None else 1
+            self.last_exit_status = None
+            return [self.end_job(block["jobid"], exit_status)]
+        job = {"jobid": int(block["jobid"]), "rule": block["rule"],
+               "sample": get_key_values(block.get("wildcards", "")).get("sample", ""),
+               "threads": int(block.get("threads", 1)),
+               "resources": get_key_values(block.get("resources", "")),
+               "benchmark": block.get("benchmark", ""), "start": block["start"]}
+        self.jobs[job["jobid"]] = job
+        return [{"event": "job_start", "time": get_timestamp(job["start"]), "jobid": job["jobid"],
+                 "rule": job["rule"], "sample": job["sample"], "threads": job["threads"],
+                 "resources": job["resources"]}]
+
+    def end_job(self, jobid: str, exit_status: int) -> dict:
+        """Mark a job as finished or failed.
+        Arguments:
+            jobid:          Snakemake's ID of the job
+            exit_status:    exit status of the job (0 when successful)
+        Returns:
+            The job end event, or an empty dict for jobs that were never started.
+        """
+        job = self.jobs.pop(int(jobid), None)
+        if job is None:
+            return {}
+        end = self.clock()
+        (self.finished if exit_status == 0 else self.failed)[job["jobid"]] = job
+        event = {"event": "job_end", "time": get_timestamp(end), "jobid": job["jobid"], "rule": job["rule"],
+                 "sample": job["sample"], "threads": job["threads"], "exit_status": exit_status,
+                 "elapsed_s": round(end - job["start"], 2)}
+        event.update(get_benchmark_usage(job["benchmark"]))
+        return event
+
+    def get_samples_progress(self) -> Dict[str, Dict[str, int]]:
+        """Count finished, failed and running jobs for each community; jobs shared by all communities
+        are counted under an empty name."""
+        samples_progress = {}
+        for state, jobs in [("finished", self.finished), ("failed", self.failed), ("running", self.jobs)]:
+            for job in jobs.values():
+                sample_progress = samples_progress.setdefault(job["sample"],
+                                                              {"finished": 0, "failed": 0, "running": 0})
+                sample_progress[state] += 1
+        return samples_progress
+
+    def get_progress(self, done: int, total: int, percent: float) -> dict:
+        """Summarize progress of the whole run and of each community.
+        Arguments:
+            done:       amount of jobs done as reported by Snakemake
+            total:      total amount of jobs as reported by Snakemake
+            percent:    percentage of jobs done as reported by Snakemake
+        Returns:
+            A progress event including the jobs still running, longest running first.
+        """
+        now = self.clock()
+        running = sorted(({"jobid": job["jobid"], "rule": job["rule"], "sample": job["sample"],
+                           "elapsed_s": round(now - job["start"], 2)} for job in self.jobs.values()),
+                         key=lambda job: job["elapsed_s"], reverse=True)
+        return {"event": "progress", "time": get_timestamp(now), "done": done, "total": total,
+                "percent": percent, "elapsed_s": round(now - self.workflow_start, 2),
+                "samples": self.get_samples_progress(), "running": running}
+
+    def finish(self, exit_status: int) -> List[dict]:
+        """Close the event stream once Snakemake has exited.
+        Arguments:
+            exit_status:    exit status of Snakemake
+        Returns:
+            Any pending events and the workflow end event.
+        """
+        events = self.close_block() if self.open_block is not None else []
+        now = self.clock()
+        events.append({"event": "workflow_end", "time": get_timestamp(now), "exit_status": exit_status,
+                       "elapsed_s": round(now - self.workflow_start, 2),
+                       "samples": self.get_samples_progress()})
+        return events
+
+
+def format_progress(progress_event: dict) -> str:
+    """Summarize a progress event in one line per community for the console.
+    Arguments:
+        progress_event: event returned by SnakemakeEventParser.get_progress
+    Returns:
+        The progress summary.
+    """
+    summary = ["{done} of {total} jobs done ({percent}%) after {elapsed_s:.0f} s".format(**progress_event)]
+    for sample, counts in sorted(progress_event["samples"].items()):
+        summary.append("  {}: {finished} finished, {running} running, {failed} failed".format(
+            sample if sample else "(all communities)", **counts))
+    if progress_event["running"]:
+        longest = progress_event["running"][0]
+        summary.append("  longest running: {rule} for {sample} ({elapsed_s:.0f} s)".format(
+            rule=longest["rule"], sample=longest["sample"] if longest["sample"] else "all communities",
+            elapsed_s=longest["elapsed_s"]))
+    return "\n".join(summary)
@@ -0,0 +1,45 @@
+import pathlib
+
+from argparse import ArgumentParser
+from typing import List
+
+import pandas as pd
+
+
+def summarize_disk_usage(usage_logs: List[pathlib.Path], sample: str) -> pd.DataFrame:
+    """Find peak and final disk usage of a community from the snapshots taken at the end of each large step.
+    Disk usage is not measured while a step runs, so the peak is the largest usage measured at the end of a step.
+    Arguments:
+        usage_logs: Paths to the tab-separated logs of disk usage snapshots (step, timestamp, bytes) of all steps
+        sample:     name of the community
+    Returns:
+        Peak disk usage with the step it occurred in and final disk usage, in bytes.
+    """
+    step_snapshots = []
+    for usage_log in usage_logs:
+        try:
+            step_snapshots.append(pd.read_csv(usage_log, sep="\t", header=None, names=["step", "timestamp", "bytes"]))
+        except pd.errors.EmptyDataError:
+            continue
+    snapshots = pd.concat(step_snapshots) if step_snapshots else pd.DataFrame()
+    if snapshots.empty:
+        raise ValueError("No disk usage recorded for {}".format(sample))
+    # steps log separately, so order the snapshots by when they were taken
+    snapshots = snapshots.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    peak = snapshots.loc[snapshots["bytes"].idxmax()]
+    return pd.DataFrame({"sample": [sample], "peak_bytes": [peak["bytes"]], "peak_step": [peak["step"]],
+                         "final_bytes": [snapshots["bytes"].iloc[-1]]})
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Summarize peak and final disk usage of a community.")
+    parser.add_argument("sample", action="store", help="Name of the community")
+    parser.add_argument("usage_logs", action="store", nargs="+",
+                        help="Paths to disk usage logs of the community's steps")
+    parser.add_argument("-o", "--outfile", action="store",
+                        help="Name of tab-separated file to write to (default: disk_usage.tsv)",
+                        default="disk_usage.tsv")
+    args = parser.parse_args()
+
+    disk_usage = summarize_disk_usage([pathlib.Path(usage_log) for usage_log in args.usage_logs], args.sample)
+    disk_usage.to_csv(args.outfile, sep="\t", index=False)
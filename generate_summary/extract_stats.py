@@ -87,6 +87,19 @@ def get_drep_stats(mummer_file: pathlib.Path) -> pd.DataFrame:
     return mummer_anis
 
 
+def get_gold_standard_stats(gold_standard_file: pathlib.Path) -> pd.DataFrame:
+    """Extract source genome, purity and completeness of bins from a tab-separated file
+    produced by the gold standard evaluation.
+    Arguments:
+        gold_standard_file: Path to the file containing the gold standard evaluation
+    Returns:
+        Closest source genome for each bin with purity and completeness.
+    """
+    gold_standard = pd.read_csv(gold_standard_file, sep="\t")[['bin_name', 'closest_genome', 'purity',
+                                                                'completeness']]
+    return gold_standard
+
+
 def merge_mag_and_ref_stats(mag_stats: pd.DataFrame, ref_stats: pd.DataFrame) -> pd.DataFrame:
     """Concatenate two tables with statistics for the synthetic MAGs and the reference genomes,
     marking which of the two each is.
@@ -108,10 +121,18 @@ if __name__ == "__main__":
     parser.add_argument("genome_stats", action="store", help="Path to BBstats file giving stats of reference genomes")
     parser.add_argument("checkm", action="store", help="Path to CheckM file for bins")
     parser.add_argument("genome_checkm", action="store", help="Path to CheckM file for reference genomes")
-    parser.add_argument("drep_mummer", action="store", help="Path to dRep Mummer file (Ndb.csv)")
+    parser.add_argument("drep_mummer", action="store",
+                        help="Path to dRep Mummer file (Ndb.csv), or to the gold standard evaluation "
+                             "when using --evaluation gold_standard")
+    parser.add_argument("--evaluation", action="store", choices=["drep", "gold_standard"], default="drep",
+                        help="How bins were matched to source genomes: dRep ANI or gold standard read origins "
+                             "(default: drep)")
     parser.add_argument("-o", "--outfile", action="store",
                         help="Name of Excel file to write to (recommended extension: .xlsx) (default: samplestats.xlsx)",
                         default="samplestats.xlsx")
+    parser.add_argument("--read_stats", action="store",
+                        help="Path to read statistics of the simulated reads written by read_stats.py, "
+                             "to add as a separate sheet")
     args = parser.parse_args()
 
     # get absolute paths
@@ -122,17 +143,22 @@ if __name__ == "__main__":
     mummer = pathlib.Path(args.drep_mummer).resolve()
     outfile = pathlib.Path(args.outfile).resolve()
 
-    drep_stats = get_drep_stats(mummer)
     # Extract stats for both MAGs and original genomes
     bb_stats = get_bb_stats(stats)
     reference_stats = get_bb_stats(original_stats)
-    # Identify dRep primary clusters for each, selecting each bin only once (given a bin can match multiple genomes)
-    bb_stats = pd.merge(bb_stats, drep_stats.drop_duplicates(subset=["reference"]), how="left", left_on="bin_name",
-                        right_on="reference")[['bin_name', 'scaf_bp', 'gc_avg', 'n_scaffolds', 'n_contigs',
-                                               'scaffold_L50', 'scaffold_N50', 'primary_cluster']]
-    reference_stats = pd.merge(reference_stats, drep_stats.drop_duplicates(subset=["query"]), how="left", left_on="bin_name",
-                               right_on="query")[['bin_name', 'scaf_bp', 'gc_avg', 'n_scaffolds', 'n_contigs',
-                                                  'scaffold_L50', 'scaffold_N50', 'primary_cluster']]
+    if args.evaluation == "gold_standard":
+        match_sheet = "gold_standard"
+        match_stats = get_gold_standard_stats(mummer)
+    else:
+        match_sheet = "dRep"
+        match_stats = get_drep_stats(mummer)
+        # Identify dRep primary clusters for each, selecting each bin only once (given a bin can match multiple genomes)
+        bb_stats = pd.merge(bb_stats, match_stats.drop_duplicates(subset=["reference"]), how="left", left_on="bin_name",
+                            right_on="reference")[['bin_name', 'scaf_bp', 'gc_avg', 'n_scaffolds', 'n_contigs',
+                                                   'scaffold_L50', 'scaffold_N50', 'primary_cluster']]
+        reference_stats = pd.merge(reference_stats, match_stats.drop_duplicates(subset=["query"]), how="left", left_on="bin_name",
+                                   right_on="query")[['bin_name', 'scaf_bp', 'gc_avg', 'n_scaffolds', 'n_contigs',
+                                                      'scaffold_L50', 'scaffold_N50', 'primary_cluster']]
 
     complete_stats = merge_mag_and_ref_stats(bb_stats, reference_stats)
 
@@ -166,11 +192,31 @@ if __name__ == "__main__":
                                            "dRep: query_coverage": ["Percent of source genome covered by bin"],
                                            "dRep: ani": ["Average nucleotide identity between source genome and bin, calculated by Nucmer alignment"],
                                            "dRep: primary_cluster": ["Cluster containing source genome and bin, determined by Mash-estimated ANI; source and bin need to have ANI of at least 90 percent to be in one cluster"],
-                                           "dRep: NOTE": ["If a row contains only a source genome or only a bin, no bin/source genome had an estimated ANI of at least 90 percent."]},
+                                           "dRep: NOTE": ["If a row contains only a source genome or only a bin, no bin/source genome had an estimated ANI of at least 90 percent."],
+                                           "gold_standard: bin_name": ["Name of MetaBAT-generated bin"],
+                                           "gold_standard: closest_genome": ["Source genome contributing most of the bin's base pairs, determined from the origin of the simulated reads mapped to each contig"],
+                                           "gold_standard: purity": ["Fraction of the bin's base pairs originating from the closest genome"],
+                                           "gold_standard: completeness": ["Fraction of the closest genome's base pairs contained in the bin"],
+                                           "reads: reads": ["Amount of simulated reads in the read file"],
+                                           "reads: bases": ["Amount of simulated base pairs in the read file"],
+                                           "reads: min_length, mean_length, max_length": ["Length of the simulated reads"],
+                                           "reads: mean_quality": ["Mean Phred quality score of all bases"],
+                                           "reads: mean_gc": ["Mean GC content of the reads in percent"]},
                                           orient="index")
+    # only explain the sheets we are writing
+    if match_sheet == "dRep":
+        explanations = explanations.loc[~explanations.index.str.startswith("gold_standard: ")]
+    else:
+        explanations = explanations.loc[~(explanations.index.str.startswith("dRep: ")
+                                          | (explanations.index == "BB_stats: primary_cluster"))]
+
+    if not args.read_stats:
+        explanations = explanations.loc[~explanations.index.str.startswith("reads: ")]
 
     with pd.ExcelWriter(outfile) as writer:
         complete_stats.to_excel(writer, sheet_name="BB_stats")
         complete_checkm.to_excel(writer, sheet_name="CheckM")
-        drep_stats.to_excel(writer, sheet_name="dRep")
+        match_stats.to_excel(writer, sheet_name=match_sheet)
+        if args.read_stats:
+            pd.read_csv(args.read_stats, sep="\t").to_excel(writer, sheet_name="reads", index=False)
         explanations.to_excel(writer, sheet_name="explanations")
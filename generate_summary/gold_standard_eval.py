@@ -0,0 +1,199 @@
+import pathlib
+
+from argparse import ArgumentParser
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Bio import SeqIO
+
+# contigs cover the genome positions of the k-mers they share with it; 21-mers are rarely repeated by chance in a
+# bacterial genome and fit into 64 bits
+KMER_SIZE = 21
+# 2-bit codes of each base; other characters are coded as 4
+BASE_CODES = np.full(256, 4, dtype=np.uint64)
+for base_code, bases in enumerate(["Aa", "Cc", "Gg", "Tt"]):
+    for base in bases:
+        BASE_CODES[ord(base)] = base_code
+# value of k-mers containing bases other than A, C, G or T; no k-mer of 2-bit codes reaches it
+INVALID_KMER = np.iinfo(np.uint64).max
+
+
+def get_record_origins(id_file: pathlib.Path) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Link the sequence records of all source genomes to their genome IDs.
+    Arguments:
+        id_file:    Path to id_to_genome file linking genome IDs to fasta files
+    Returns:
+        A mapping of fasta record ID to genome ID and the total size of each genome.
+    """
+    record_origins = {}
+    genome_sizes = {}
+    with open(id_file, "r") as idfile:
+        for line in idfile:
+            if not line.strip():
+                continue
+            genome_id, fasta_path = line.strip().split("\t")[:2]
+            genome_sizes[genome_id] = 0
+            for record in SeqIO.parse(fasta_path, "fasta"):
+                record_origins[record.id] = genome_id
+                genome_sizes[genome_id] += len(record)
+    return record_origins, genome_sizes
+
+
+def get_genome_files(id_file: pathlib.Path) -> Dict[str, pathlib.Path]:
+    """Get the fasta file of each source genome from the id_to_genome file."""
+    with open(id_file, "r") as idfile:
+        return {line.split("\t")[0]: pathlib.Path(line.strip().split("\t")[1]) for line in idfile if line.strip()}
+
+
+def get_read_origin(read_name: str, record_origins: Dict[str, str]) -> str:
+    """Identify the source genome of a simulated read from its name.
+    ART names reads after the record they were simulated from ("[record ID]-[read number]/[mate]").
+    Arguments:
+        read_name:      name of the read
+        record_origins: mapping of fasta record ID to genome ID
+    Returns:
+        The genome ID the read originates from, or an empty string if it cannot be identified.
+    """
+    read_name = read_name.split("/")[0]
+    record_id = read_name.rsplit("-", 1)[0]
+    return record_origins.get(record_id, record_origins.get(read_name, ""))
+
+
+def get_contig_origins(sam_file: pathlib.Path,
+                       record_origins: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Assign each contig to the source genome contributing most of the reads mapped to it,
+    in one pass over the mapping of the simulated reads.
+    Arguments:
+        sam_file:       Path to SAM file with simulated reads mapped to the assembly
+        record_origins: mapping of fasta record ID to genome ID
+    Returns:
+        The source genome of each contig with mapped reads and the length of all contigs in the assembly.
+    """
+    contig_lengths = {}
+    contig_reads = defaultdict(Counter)
+    with open(sam_file, "r") as sam:
+        for line in sam:
+            if line.startswith("@"):
+                if line.startswith("@SQ"):
+                    header_fields = dict(field.split(":", 1) for field in line.strip().split("\t")[1:])
+                    contig_lengths[header_fields["SN"]] = int(header_fields["LN"])
+                continue
+            read_name, flag, contig = line.split("\t", 3)[:3]
+            # skip unmapped (0x4), secondary (0x100) and supplementary (0x800) alignments
+            if int(flag) & 0x904:
+                continue
+            read_origin = get_read_origin(read_name, record_origins)
+            if read_origin:
+                contig_reads[contig][read_origin] += 1
+    contig_origins = {contig: read_counts.most_common(1)[0][0] for contig, read_counts in contig_reads.items()}
+    return contig_origins, contig_lengths
+
+
+def get_kmers(sequence: str) -> np.ndarray:
+    """Encode the k-mer starting at each position of a sequence as an integer that is the same on both strands.
+    Arguments:
+        sequence:   the sequence to split into k-mers
+    Returns:
+        The canonical k-mer at each position, or INVALID_KMER for k-mers containing bases other than A, C, G or T.
+    """
+    codes = BASE_CODES[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+    kmer_count = len(codes) - KMER_SIZE + 1
+    if kmer_count < 1:
+        return np.zeros(0, dtype=np.uint64)
+    forward = np.zeros(kmer_count, dtype=np.uint64)
+    reverse = np.zeros(kmer_count, dtype=np.uint64)
+    for offset in range(KMER_SIZE):
+        window = codes[offset:offset + kmer_count] & np.uint64(3)
+        # the first base is the most significant on the forward strand and the least on the reverse strand
+        forward = (forward << np.uint64(2)) | window
+        reverse |= (np.uint64(3) - window) << np.uint64(2 * offset)
+    kmers = np.minimum(forward, reverse)
+    invalid_bases = np.concatenate([[0], np.cumsum(codes == 4)])
+    kmers[invalid_bases[KMER_SIZE:] > invalid_bases[:kmer_count]] = INVALID_KMER
+    return kmers
+
+
+def get_covered_bp(genome_file: pathlib.Path, contig_sequences: List[str]) -> int:
+    """Count the positions of a genome covered by contigs, i.e. lying in a k-mer the contigs share with the genome.
+    Unlike adding up contig lengths, this counts positions covered by overlapping or redundant contigs only once.
+    Arguments:
+        genome_file:        Path to the fasta file of the genome
+        contig_sequences:   sequences of the contigs
+    Returns:
+        The amount of covered positions in bp.
+    """
+    # a sentinel no k-mer of the genome can match keeps lookups of k-mers beyond the last contig k-mer in bounds
+    contig_kmers = np.sort(np.concatenate([get_kmers(sequence) for sequence in contig_sequences]
+                                          + [np.array([INVALID_KMER], dtype=np.uint64)]))
+    covered_bp = 0
+    for record in SeqIO.parse(genome_file, "fasta"):
+        kmers = get_kmers(str(record.seq))
+        shared_kmers = ((contig_kmers[np.searchsorted(contig_kmers, kmers)] == kmers)
+                        & (kmers != INVALID_KMER)).astype(np.int64)
+        # each shared k-mer covers the positions from its start to its end
+        coverage_changes = np.zeros(len(record) + 1, dtype=np.int64)
+        coverage_changes[:len(shared_kmers)] += shared_kmers
+        coverage_changes[KMER_SIZE:KMER_SIZE + len(shared_kmers)] -= shared_kmers
+        covered_bp += int(np.count_nonzero(np.cumsum(coverage_changes[:len(record)])))
+    return covered_bp
+
+
+def evaluate_bins(bin_files: List[pathlib.Path], contig_origins: Dict[str, str], contig_lengths: Dict[str, int],
+                  genome_sizes: Dict[str, int], genome_files: Dict[str, pathlib.Path]) -> pd.DataFrame:
+    """Determine the source genome of each bin along with its purity and completeness relative to that genome.
+    Arguments:
+        bin_files:      Paths to fasta files of all bins
+        contig_origins: source genome of each contig
+        contig_lengths: length of each contig
+        genome_sizes:   total size of each source genome
+        genome_files:   Path to the fasta file of each source genome
+    Returns:
+        Closest source genome, purity (fraction of bin bp from the closest genome) and completeness
+        (fraction of the closest genome's positions covered by the bin's contigs from it) for all bins.
+    """
+    bin_stats = []
+    for bin_file in bin_files:
+        origin_bp = Counter()
+        origin_sequences = defaultdict(list)
+        for contig in SeqIO.parse(bin_file, "fasta"):
+            origin = contig_origins.get(contig.id, "")
+            origin_bp[origin] += contig_lengths.get(contig.id, 0)
+            origin_sequences[origin].append(str(contig.seq))
+        bin_bp = sum(origin_bp.values())
+        assigned_bp = Counter({origin: contig_bp for origin, contig_bp in origin_bp.items() if origin})
+        # unify bin naming with BBTools stats for easier comparison
+        bin_name = bin_file.name.replace(".fa", "").replace(".", "_")
+        if assigned_bp and bin_bp:
+            closest_genome, closest_bp = assigned_bp.most_common(1)[0]
+            bin_stats.append({"bin_name": bin_name, "closest_genome": closest_genome,
+                              "purity": closest_bp / bin_bp,
+                              "completeness": get_covered_bp(genome_files[closest_genome],
+                                                             origin_sequences[closest_genome])
+                                              / genome_sizes[closest_genome],
+                              "bin_bp": bin_bp})
+        else:
+            bin_stats.append({"bin_name": bin_name, "closest_genome": None, "purity": None,
+                              "completeness": None, "bin_bp": bin_bp})
+    return pd.DataFrame(bin_stats, columns=["bin_name", "closest_genome", "purity", "completeness", "bin_bp"])
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Evaluate bins against their source genomes using the origin of "
+                                        "the simulated reads mapped to the assembly.")
+    parser.add_argument("sam_file", action="store", help="Path to SAM file of reads mapped to the assembly")
+    parser.add_argument("genome_file", action="store", help="Path to file containing genome ID to fasta path data")
+    parser.add_argument("bins", action="store", nargs="+", help="Paths to fasta files of bins")
+    parser.add_argument("-o", "--outfile", action="store",
+                        help="Name of tab-separated file to write to (default: gold_standard.tsv)",
+                        default="gold_standard.tsv")
+    args = parser.parse_args()
+
+    origins, sizes = get_record_origins(pathlib.Path(args.genome_file))
+    assembly_origins, assembly_lengths = get_contig_origins(pathlib.Path(args.sam_file), origins)
+    bin_paths = sorted(pathlib.Path(bin_path) for bin_path in args.bins)
+    gold_standard = evaluate_bins(bin_paths, assembly_origins, assembly_lengths, sizes,
+                                  get_genome_files(pathlib.Path(args.genome_file)))
+    gold_standard.to_csv(args.outfile, sep="\t", index=False)
@@ -15,22 +15,31 @@ def create_comparison_table(base_table: pathlib.Path) -> pd.DataFrame:
     # Read in data
     bb_stats = pd.read_excel(base_table, sheet_name="BB_stats", index_col=0)
     checkm_stats = pd.read_excel(base_table, sheet_name="CheckM", index_col=0)
-    drep_stats = pd.read_excel(base_table, sheet_name="dRep", index_col=0)
 
     summary_table = bb_stats[bb_stats["genome_type"] == "synthetic_MAG"][['bin_name']]
 
-    # closest organism: SELECT drep_stats.query AS closest_genome, summary_table.bin_name, MAX(drep_stats.ani)
-    # FROM summary table
-    # LEFT JOIN drep_stats ON summary_table.bin_name = drep_stats.reference
-    # GROUP BY summary_table.bin_name
-    # closest organism: find highest ANI for each bin in drep_stats, filter down to only these
-    # then left join (leaving all entries from the summary table intact) summary table on filtered drep_stats
-    summary_table = pd.merge(summary_table, drep_stats[drep_stats.groupby("reference")['ani'].transform(max)
-                                                       == drep_stats['ani']],
-                            left_on='bin_name', right_on='reference', how='left')[["bin_name", "query", "ref_coverage",
-                                                                                   "query_coverage", "ani"]]
-    summary_table = summary_table.rename(columns={"query": "closest_genome", "ref_coverage": "bin_coverage",
-                                                  "query_coverage": "source_coverage"})
+    # bins are matched to source genomes either by dRep or by the gold standard evaluation
+    if "gold_standard" in pd.ExcelFile(base_table).sheet_names:
+        gold_standard = pd.read_excel(base_table, sheet_name="gold_standard", index_col=0)
+        match_columns = ["closest_genome", "purity", "completeness"]
+        summary_table = pd.merge(summary_table, gold_standard, on="bin_name", how="left")[["bin_name",
+                                                                                          *match_columns]]
+    else:
+        drep_stats = pd.read_excel(base_table, sheet_name="dRep", index_col=0)
+        match_columns = ["closest_genome", "ani", "bin_coverage", "source_coverage"]
+        # closest organism: SELECT drep_stats.query AS closest_genome, summary_table.bin_name, MAX(drep_stats.ani)
+        # FROM summary table
+        # LEFT JOIN drep_stats ON summary_table.bin_name = drep_stats.reference
+        # GROUP BY summary_table.bin_name
+        # closest organism: find highest ANI for each bin in drep_stats, filter down to only these
+        # then left join (leaving all entries from the summary table intact) summary table on filtered drep_stats
+        summary_table = pd.merge(summary_table, drep_stats[drep_stats.groupby("reference")['ani'].transform(max)
+                                                           == drep_stats['ani']],
+                                left_on='bin_name', right_on='reference', how='left')[["bin_name", "query",
+                                                                                       "ref_coverage",
+                                                                                       "query_coverage", "ani"]]
+        summary_table = summary_table.rename(columns={"query": "closest_genome", "ref_coverage": "bin_coverage",
+                                                      "query_coverage": "source_coverage"})
     # scaffold etc. difference
     # create temp columns - one with scaffold stats, one with source genome stats
     summary_bb = pd.merge(summary_table, bb_stats, how="left", on="bin_name")
@@ -45,7 +54,7 @@ def create_comparison_table(base_table: pathlib.Path) -> pd.DataFrame:
                               checkm_stats, how="left", left_on="closest_genome", right_on="Bin Id",
                               suffixes=("_bin", "_ref"))
     summary_checkm["completeness_difference"] = summary_checkm["Completeness_bin"] - summary_checkm["Completeness_ref"]
-    summary_table = summary_bb[["bin_name_bin", "closest_genome", "ani", "bin_coverage", "source_coverage",
+    summary_table = summary_bb[["bin_name_bin", *match_columns,
                                 "scaffold_difference", "contig_difference", "length_difference", "gc_difference"]]
     summary_table = summary_table.rename(columns={"bin_name_bin": "bin_name"})
     summary_table = pd.merge(summary_table, summary_checkm[["Bin Id_bin",
@@ -54,12 +63,29 @@ def create_comparison_table(base_table: pathlib.Path) -> pd.DataFrame:
     return summary_table
 
 
+def get_provisional_note(depth_fraction: float) -> pd.DataFrame:
+    """Describe how a preview summary differs from the summary of a full run.
+    Arguments:
+        depth_fraction: fraction of the full sequencing depth the preview was simulated at
+    Returns:
+        A table noting that the results are provisional and why.
+    """
+    return pd.DataFrame({"note": ["PROVISIONAL: preview results, not for evaluation",
+                                  "Reads were simulated at {:g}% of the full sequencing depth".format(
+                                      depth_fraction * 100),
+                                  "Assembly used fewer k-mer sizes than a full run",
+                                  "Completeness and contamination were estimated from bacterial marker genes only",
+                                  "Bins and their quality will differ from a full run"]})
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Generate a bin-focused overview from the general MAGICIAN summary file")
     parser.add_argument("infile", action="store", help="Path to summary .xlsx file")
     parser.add_argument("-o", "--outfile", action="store", help="Name of output file (default: bin_summary.xlsx)",
                         default="bin_summary.xlsx")
+    parser.add_argument("--provisional", action="store", type=float,
+                        help="Mark the summary as a provisional preview simulated at this fraction of the full "
+                             "sequencing depth")
     args = parser.parse_args()
 
     infile = pathlib.Path(args.infile).resolve()
@@ -68,9 +94,11 @@ if __name__ == "__main__":
     summary = create_comparison_table(infile)
 
     explanations = pd.DataFrame.from_dict({"bin_name": ["Name of MetaBAT-assigned bin"],
-                                           "closest_genome": ["Source genome with highest ANI for bin found by dRep"],
+                                           "closest_genome": ["Source genome with highest ANI for bin found by dRep, or contributing most of the bin's base pairs in the gold standard evaluation"],
                                            "bin_coverage": ["Percent of bin covered by closest genome"],
                                            "source_coverage": ["Percent of closest genome covered by bin"],
+                                           "purity": ["Fraction of the bin's base pairs originating from the closest genome (gold standard evaluation)"],
+                                           "completeness": ["Fraction of the closest genome's base pairs contained in the bin (gold standard evaluation)"],
                                            "scaffold_difference":
                                                ["Difference of the amount of scaffolds in the bin and the closest genome (bin - reference)"],
                                            "contig_difference":
@@ -82,7 +110,11 @@ if __name__ == "__main__":
                                            "completeness_difference":
                                                ["Difference in completeness between bin and closest genome as calculated by CheckM (bin - reference). Note that completeness in bin and reference may be calculated with different marker genes; when in doubt, check the CheckM summary."]
                                            }, orient='index')
+    explanations = explanations.loc[explanations.index.isin(summary.columns)]
 
     with pd.ExcelWriter(outfile) as outfile_writer:
         summary.to_excel(outfile_writer, sheet_name="summary")
         explanations.to_excel(outfile_writer, sheet_name="explanations")
+        if args.provisional:
+            get_provisional_note(args.provisional).to_excel(outfile_writer, sheet_name="provisional",
+                                                            index=False)
@@ -0,0 +1,225 @@
+import json
+import pathlib
+import zlib
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# size of compressed blocks read at a time
+CHUNK_SIZE = 4 * 1024 ** 2
+QUALITY_OFFSET = 33
+GZIP_MAGIC = b"\x1f\x8b"
+# maps G and C to 1 and all other bases to 0
+GC_TABLE = bytes(1 if chr(base) in "GCgc" else 0 for base in range(256))
+
+
+def get_members(reads_file: pathlib.Path, member_sizes: Optional[pathlib.Path] = None) -> List[Tuple[int, int]]:
+    """Find the parts of a file of concatenated gzip files that can be decompressed independently.
+    Arguments:
+        reads_file:     Path to the gzipped FASTQ file
+        member_sizes:   Path to a file listing the size of each concatenated file in bytes, in order
+    Returns:
+        Start and length in bytes of each part; the whole file if sizes are not known.
+    """
+    if member_sizes is None:
+        return [(0, pathlib.Path(reads_file).stat().st_size)]
+    sizes = pd.read_csv(member_sizes, header=None, names=["size"])["size"].tolist()
+    if sum(sizes) != pathlib.Path(reads_file).stat().st_size:
+        raise ValueError("Sizes in {} do not add up to the size of {}.".format(member_sizes, reads_file))
+    starts = np.cumsum([0] + sizes[:-1]).tolist()
+    return [(start, size) for start, size in zip(starts, sizes) if size > 0]
+
+
+def is_gzip(reads_file: pathlib.Path) -> bool:
+    """Check whether a file is gzip-compressed (including BGZF) from its first bytes."""
+    with open(reads_file, "rb") as reads:
+        return reads.read(2) == GZIP_MAGIC
+
+
+def decompress_range(reads_file: pathlib.Path, start: int, length: int) -> Iterator[bytes]:
+    """Decompress part of a gzip file, which may contain several gzip members; parts of uncompressed files are
+    read as they are.
+    Arguments:
+        reads_file: Path to the gzip or uncompressed file
+        start:      offset of the first member in bytes
+        length:     length of the part in bytes
+    Returns:
+        Blocks of decompressed data.
+    """
+    compressed_file = is_gzip(reads_file)
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    with open(reads_file, "rb") as compressed:
+        compressed.seek(start)
+        remaining = length
+        while remaining:
+            data = compressed.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            if not compressed_file:
+                yield data
+                continue
+            while data:
+                yield decompressor.decompress(data)
+                # start a new decompressor at the next member
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+                else:
+                    data = b""
+
+
+def add_records(stats: Dict[str, np.ndarray], sequences: List[bytes], qualities: List[bytes]) -> None:
+    """Add a batch of FASTQ records to running read statistics.
+    Arguments:
+        stats:      running read statistics as returned by get_read_stats
+        sequences:  sequence lines of the records
+        qualities:  quality lines of the records
+    """
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    stats["lengths"] = add_counts(stats["lengths"], np.bincount(lengths))
+    if not lengths.any():
+        return
+    bases = b"".join(sequences)
+    quality = np.frombuffer(b"".join(qualities), dtype=np.uint8)
+    gc = np.frombuffer(bases.translate(GC_TABLE), dtype=np.uint8)
+    if lengths.min() == lengths.max():
+        # reads of equal length, as simulated by ART, can be summed per position directly
+        read_length = int(lengths[0])
+        quality_sums = quality.reshape(-1, read_length).sum(axis=0, dtype=np.int64)
+        position_counts = np.full(read_length, len(lengths), dtype=np.int64)
+        gc_counts = gc.reshape(-1, read_length).sum(axis=1, dtype=np.int64)
+    else:
+        starts = np.cumsum(lengths) - lengths
+        positions = np.arange(len(bases)) - np.repeat(starts, lengths)
+        quality_sums = np.bincount(positions, weights=quality)
+        position_counts = np.bincount(positions)
+        # reads without bases add nothing to the sum of the read before them
+        starts, lengths = starts[lengths > 0], lengths[lengths > 0]
+        gc_counts = np.add.reduceat(gc, starts, dtype=np.int64)
+    stats["quality_sums"] = add_counts(stats["quality_sums"], quality_sums - QUALITY_OFFSET * position_counts)
+    stats["position_counts"] = add_counts(stats["position_counts"], position_counts)
+    stats["gc"] += np.bincount(np.rint(100 * gc_counts / lengths).astype(np.int64), minlength=101)
+
+
+def add_counts(counts: np.ndarray, new_counts: np.ndarray) -> np.ndarray:
+    """Add two histograms of possibly different lengths."""
+    if len(new_counts) > len(counts):
+        counts, new_counts = new_counts.astype(counts.dtype), counts
+    counts[:len(new_counts)] += new_counts
+    return counts
+
+
+def get_read_stats(reads_file: pathlib.Path, start: int, length: int) -> Dict[str, np.ndarray]:
+    """Collect read statistics from part of a gzipped FASTQ file in one pass.
+    Arguments:
+        reads_file: Path to the gzipped FASTQ file
+        start:      offset of the part in bytes
+        length:     length of the part in bytes
+    Returns:
+        Histograms of read lengths and GC content (percent) and per-position sums of quality scores
+        and amounts of bases.
+    """
+    stats = {"lengths": np.zeros(0, dtype=np.int64), "quality_sums": np.zeros(0, dtype=np.float64),
+             "position_counts": np.zeros(0, dtype=np.int64), "gc": np.zeros(101, dtype=np.int64)}
+    leftover = b""
+    for block in decompress_range(reads_file, start, length):
+        lines = (leftover + block).split(b"\n")
+        # keep incomplete records for the next block
+        complete = (len(lines) - 1) // 4 * 4
+        leftover = b"\n".join(lines[complete:])
+        add_records(stats, lines[1:complete:4], lines[3:complete:4])
+    lines = leftover.rstrip(b"\n").split(b"\n")
+    if len(lines) >= 4:
+        add_records(stats, lines[1::4], lines[3::4])
+    return stats
+
+
+def merge_read_stats(partial_stats: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Combine read statistics of several parts of a file."""
+    merged = partial_stats[0]
+    for stats in partial_stats[1:]:
+        for key, counts in stats.items():
+            merged[key] = add_counts(merged[key], counts)
+    return merged
+
+
+def get_file_stats(reads_file: pathlib.Path, member_sizes: Optional[pathlib.Path] = None,
+                   threads: int = 1) -> Dict[str, np.ndarray]:
+    """Collect read statistics of a gzipped FASTQ file, decompressing its members in parallel.
+    Arguments:
+        reads_file:     Path to the gzipped FASTQ file
+        member_sizes:   Path to a file listing the sizes of the gzip files concatenated into the reads file
+        threads:        amount of processes to use
+    Returns:
+        Read statistics of the whole file.
+    """
+    members = get_members(reads_file, member_sizes)
+    if threads == 1 or len(members) == 1:
+        return merge_read_stats([get_read_stats(reads_file, start, length) for start, length in members])
+    with ProcessPoolExecutor(max_workers=min(threads, len(members))) as executor:
+        return merge_read_stats(list(executor.map(get_read_stats, [reads_file] * len(members),
+                                                  *zip(*members))))
+
+
+def summarize_read_stats(stats: Dict[str, np.ndarray], read_file: str) -> pd.DataFrame:
+    """Summarize read statistics in one row.
+    Arguments:
+        stats:      read statistics as returned by get_file_stats
+        read_file:  name of the read file
+    Returns:
+        Amount of reads and bases, read lengths, mean quality and mean GC content (percent).
+    """
+    read_lengths = np.nonzero(stats["lengths"])[0]
+    read_count = int(stats["lengths"].sum())
+    base_count = int(stats["position_counts"].sum())
+    return pd.DataFrame({"read_file": [read_file], "reads": [read_count], "bases": [base_count],
+                         "min_length": [int(read_lengths.min()) if read_count else 0],
+                         "mean_length": [round(base_count / read_count, 2) if read_count else 0],
+                         "max_length": [int(read_lengths.max()) if read_count else 0],
+                         "mean_quality": [round(stats["quality_sums"].sum() / base_count, 2) if base_count else 0],
+                         "mean_gc": [round(float(np.average(np.arange(101), weights=stats["gc"])), 2)
+                                     if stats["gc"].sum() else 0]})
+
+
+def get_distributions(stats: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Convert read statistics to distributions that can be written as JSON."""
+    return {"length_counts": stats["lengths"].tolist(),
+            "mean_quality_per_position": np.round(stats["quality_sums"]
+                                                  / np.maximum(stats["position_counts"], 1), 2).tolist(),
+            "gc_percent_counts": stats["gc"].tolist()}
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Calculate read statistics of gzipped or uncompressed FASTQ files in a "
+                                        "single pass.")
+    parser.add_argument("reads", action="store", nargs="+", help="Paths to gzipped or uncompressed FASTQ files")
+    parser.add_argument("-m", "--member_sizes", action="store", nargs="+",
+                        help="For each FASTQ file, a file listing the sizes of the gzip files it was concatenated "
+                             "from; lets parts of the file be decompressed in parallel")
+    parser.add_argument("-t", "--threads", action="store", type=int, default=1,
+                        help="Amount of processes to use (default: 1)")
+    parser.add_argument("-o", "--outfile", action="store", default="read_stats.tsv",
+                        help="Name of tab-separated file to write a summary for each FASTQ file to "
+                             "(default: read_stats.tsv)")
+    parser.add_argument("-d", "--distributions", action="store",
+                        help="Name of JSON file to write length, quality and GC distributions to")
+    args = parser.parse_args()
+    if args.member_sizes and len(args.member_sizes) != len(args.reads):
+        parser.error("Give one file of member sizes for each FASTQ file.")
+
+    summaries = []
+    distributions = {}
+    for file_number, reads in enumerate(args.reads):
+        sizes = pathlib.Path(args.member_sizes[file_number]) if args.member_sizes else None
+        read_stats = get_file_stats(pathlib.Path(reads), sizes, args.threads)
+        summaries.append(summarize_read_stats(read_stats, pathlib.Path(reads).name))
+        distributions[pathlib.Path(reads).name] = get_distributions(read_stats)
+    pd.concat(summaries, ignore_index=True).to_csv(args.outfile, sep="\t", index=False)
+    if args.distributions:
+        with open(args.distributions, "w") as distribution_file:
+            json.dump(distributions, distribution_file)
@@ -0,0 +1,104 @@
+import pathlib
+import re
+
+from argparse import ArgumentParser
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def get_benchmarks(benchmark_dir: pathlib.Path) -> pd.DataFrame:
+    """Collect all Snakemake benchmark files from a run.
+    Benchmark files are expected to be named "[community].[step].bm.txt", or "[step].bm.txt" for steps
+    shared by all communities.
+    Arguments:
+        benchmark_dir:  Path to the directory containing benchmark files
+    Returns:
+        Wall time, CPU time and maximum resident set size for each step of each community,
+        averaged over repeats.
+    """
+    benchmarks = []
+    for benchmark_file in sorted(pathlib.Path(benchmark_dir).glob("*.bm.txt")):
+        name_parts = benchmark_file.name[:-len(".bm.txt")].rsplit(".", 1)
+        sample, step = name_parts if len(name_parts) == 2 else ("", name_parts[0])
+        benchmark = pd.read_csv(benchmark_file, sep="\t", na_values=["-", "NA"])
+        # older Snakemake versions do not record CPU time
+        if "cpu_time" not in benchmark.columns:
+            benchmark["cpu_time"] = np.nan
+        benchmarks.append({"sample": sample, "step": step,
+                           "wall_time_s": benchmark["s"].mean(),
+                           "cpu_time_s": benchmark["cpu_time"].mean(),
+                           "max_rss_mb": benchmark["max_rss"].mean()})
+    return pd.DataFrame(benchmarks, columns=["sample", "step", "wall_time_s", "cpu_time_s", "max_rss_mb"])
+
+
+def get_input_sizes(sample: str, base_dir: pathlib.Path) -> dict:
+    """Get the size of a community's inputs from files written during the run.
+    Arguments:
+        sample:     name of the community
+        base_dir:   Path to the directory MAGICIAN was run in
+    Returns:
+        Total size and amount of source genomes, amount of simulated reads and bases, and amount of bins,
+        where these are available.
+    """
+    input_sizes = {"sample": sample, "genome_bp": np.nan, "genome_count": np.nan, "read_count": np.nan,
+                   "read_bases": np.nan, "bin_count": np.nan}
+    ref_stats = pathlib.Path(base_dir, "ref_stats", "{}_refgenomes.tsv".format(sample))
+    if ref_stats.exists():
+        genome_lengths = pd.read_csv(ref_stats, sep="\t", usecols=["scaf_bp"])["scaf_bp"]
+        input_sizes["genome_bp"] = genome_lengths.sum()
+        input_sizes["genome_count"] = len(genome_lengths)
+    bbduk_log = pathlib.Path(base_dir, "logs", "trim_bbduk", "{}.err".format(sample))
+    if bbduk_log.exists():
+        with open(bbduk_log, "r") as trim_log:
+            read_input = re.search(r"Input:\s+(\d+) reads\s+(\d+) bases", trim_log.read())
+        if read_input:
+            input_sizes["read_count"] = int(read_input.group(1))
+            input_sizes["read_bases"] = int(read_input.group(2))
+    # reads are not trimmed in the fast profile, but may have been counted by the thorough profile
+    read_stats = pathlib.Path(base_dir, "read_stats", "{}.tsv".format(sample))
+    if np.isnan(input_sizes["read_count"]) and read_stats.exists():
+        read_counts = pd.read_csv(read_stats, sep="\t", usecols=["reads", "bases"])
+        input_sizes["read_count"] = int(read_counts["reads"].sum())
+        input_sizes["read_bases"] = int(read_counts["bases"].sum())
+    bin_stats = pathlib.Path(base_dir, "stats", "{}.tsv".format(sample))
+    if bin_stats.exists():
+        input_sizes["bin_count"] = len(pd.read_csv(bin_stats, sep="\t", usecols=["filename"]))
+    return input_sizes
+
+
+def create_resource_report(benchmark_dir: pathlib.Path, base_dir: pathlib.Path,
+                           samples: List[str]) -> pd.DataFrame:
+    """Combine resource usage of all steps with the size of each community's inputs.
+    Arguments:
+        benchmark_dir:  Path to the directory containing benchmark files
+        base_dir:       Path to the directory MAGICIAN was run in
+        samples:        names of the communities to report; other benchmarks are skipped
+    Returns:
+        Resource usage per step and community along with input sizes.
+    """
+    benchmarks = get_benchmarks(benchmark_dir)
+    # keep steps shared by all communities
+    benchmarks = benchmarks.loc[benchmarks["sample"].isin(samples) | (benchmarks["sample"] == "")]
+    input_sizes = pd.DataFrame([get_input_sizes(sample, base_dir) for sample in samples],
+                               columns=["sample", "genome_bp", "genome_count", "read_count", "read_bases",
+                                        "bin_count"])
+    return pd.merge(benchmarks, input_sizes, on="sample", how="left").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Summarize time and memory usage of all steps for all communities.")
+    parser.add_argument("samples", action="store", nargs="+", help="Names of the communities to report")
+    parser.add_argument("-b", "--benchmark_dir", action="store", default="benchmarks",
+                        help="Directory containing benchmark files (default: benchmarks)")
+    parser.add_argument("-d", "--base_dir", action="store", default=".",
+                        help="Directory MAGICIAN was run in (default: current directory)")
+    parser.add_argument("-o", "--outfile", action="store",
+                        help="Name of tab-separated file to write to (default: resource_usage.tsv)",
+                        default="resource_usage.tsv")
+    args = parser.parse_args()
+
+    resource_report = create_resource_report(pathlib.Path(args.benchmark_dir), pathlib.Path(args.base_dir),
+                                             args.samples)
+    resource_report.to_csv(args.outfile, sep="\t", index=False)
@@ -0,0 +1,211 @@
+"""Collect the summaries of many runs in one SQLite database for analysis across runs."""
+
+import datetime
+import pathlib
+import re
+import sqlite3
+import sys
+
+from argparse import ArgumentParser
+from typing import Dict, List
+
+import pandas as pd
+
+# sheets of the general and bin summaries and the tables they are stored in
+SUMMARY_SHEETS = {"BB_stats": "genome_stats", "CheckM": "checkm", "dRep": "drep", "gold_standard": "gold_standard",
+                  "reads": "read_stats"}
+BIN_SUMMARY_SHEETS = {"summary": "bin_summary"}
+# run parameters recorded for each community, as set in the config file
+RUN_PARAMETERS = ["profile_type", "profile_name", "readlength", "insert_size", "simulator", "evaluation",
+                  "pipeline_profile", "preview", "sample_size_gbp"]
+# columns naming a genome or bin in each table
+BIN_COLUMNS = {"genome_stats": "bin_name", "checkm": "bin_id", "drep": "reference", "gold_standard": "bin_name",
+               "read_stats": "read_file", "bin_summary": "bin_name"}
+# seconds to wait for other runs writing to the database at the same time
+LOCK_TIMEOUT = 600
+
+
+def get_column_name(column: str) -> str:
+    """Turn a column name from the summaries into a name that needs no quoting in SQL, e.g. "# genomes" to
+    "genomes" and "0_markers" to "n0_markers"."""
+    column_name = re.sub(r"[^0-9a-z]+", "_", str(column).lower()).strip("_")
+    return "n" + column_name if column_name[:1].isdigit() else column_name
+
+
+def read_summary_tables(summary_file: pathlib.Path, sheets: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """Read all tables from a summary file that are stored in the database.
+    Arguments:
+        summary_file:   Path to the Excel summary
+        sheets:         names of sheets to read and the tables to store them in
+    Returns:
+        Each table found in the summary, with column names usable in SQL.
+    """
+    summary = pd.ExcelFile(summary_file)
+    tables = {}
+    for sheet, table in sheets.items():
+        if sheet not in summary.sheet_names:
+            continue
+        sheet_table = pd.read_excel(summary, sheet_name=sheet)
+        # drop the row index pandas writes as an unnamed first column
+        sheet_table = sheet_table.loc[:, ~sheet_table.columns.astype(str).str.startswith("Unnamed:")]
+        tables[table] = sheet_table.rename(columns=get_column_name)
+    return tables
+
+
+def create_tables(connection: sqlite3.Connection) -> None:
+    """Create the table of communities and its indexes if the database is new."""
+    # numeric affinity stores numbers as numbers, so insert sizes etc. sort and compare numerically
+    connection.execute("CREATE TABLE IF NOT EXISTS communities (run_id TEXT NOT NULL, sample TEXT NOT NULL, "
+                       "ingested_at TEXT, {}, PRIMARY KEY (run_id, sample))".format(
+                        ", ".join("{} NUMERIC".format(parameter) for parameter in RUN_PARAMETERS)))
+    connection.execute("CREATE INDEX IF NOT EXISTS communities_sample ON communities (sample)")
+    for parameter in RUN_PARAMETERS:
+        connection.execute("CREATE INDEX IF NOT EXISTS communities_{0} ON communities ({0})".format(parameter))
+
+
+def get_column_type(column: pd.Series) -> str:
+    """Get the SQL type to store a column of a summary table as."""
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_integer_dtype(column):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(column):
+        return "REAL"
+    return "TEXT"
+
+
+def append_table(connection: sqlite3.Connection, table: str, rows: pd.DataFrame) -> None:
+    """Append rows to a table, creating the table and its indexes or adding columns it does not have yet."""
+    existing_columns = [column[1] for column in connection.execute("PRAGMA table_info({})".format(table))]
+    column_types = {column: get_column_type(rows[column]) for column in rows.columns}
+    if existing_columns:
+        for column in rows.columns:
+            if column not in existing_columns:
+                connection.execute("ALTER TABLE {} ADD COLUMN {} {}".format(table, column, column_types[column]))
+    else:
+        connection.execute("CREATE TABLE {} ({})".format(table, ", ".join("{} {}".format(column, column_type)
+                                                                          for column, column_type
+                                                                          in column_types.items())))
+    # insert on the connection itself, as pandas' to_sql commits and would end the caller's transaction;
+    # missing values are stored as NULL and numpy numbers as the Python numbers sqlite3 can store
+    values = rows.astype(object).where(rows.notna(), None)
+    connection.executemany("INSERT INTO {} ({}) VALUES ({})".format(table, ", ".join(rows.columns),
+                                                                    ", ".join("?" * len(rows.columns))),
+                           values.itertuples(index=False, name=None))
+    if not existing_columns:
+        connection.execute("CREATE INDEX {0}_community ON {0} (run_id, sample)".format(table))
+        if BIN_COLUMNS.get(table) in rows.columns:
+            connection.execute("CREATE INDEX {0}_bin ON {0} ({1})".format(table, BIN_COLUMNS[table]))
+
+
+def ingest_community(connection: sqlite3.Connection, run_id: str, sample: str, summary_file: pathlib.Path,
+                     bin_summary_file: pathlib.Path, parameters: Dict[str, str]) -> Dict[str, int]:
+    """Store one community's summaries, replacing anything stored for it before.
+    Arguments:
+        connection:         connection to the database
+        run_id:             identifier of the run, e.g. its directory
+        sample:             name of the community
+        summary_file:       Path to the community's general summary
+        bin_summary_file:   Path to the community's bin summary
+        parameters:         run parameters to record for the community; unset parameters are recorded as NULL
+    Returns:
+        The amount of rows stored in each table.
+    """
+    tables = read_summary_tables(summary_file, SUMMARY_SHEETS)
+    tables.update(read_summary_tables(bin_summary_file, BIN_SUMMARY_SHEETS))
+    with connection:
+        # replace the community's results in a single transaction, so a failed ingest leaves the results stored
+        # before and nobody reading the database sees them half replaced
+        connection.execute("BEGIN IMMEDIATE")
+        create_tables(connection)
+        stored_tables = [table[0] for table in connection.execute("SELECT name FROM sqlite_master "
+                                                                  "WHERE type = 'table'")]
+        for table in stored_tables:
+            connection.execute("DELETE FROM {} WHERE run_id = ? AND sample = ?".format(table), (run_id, sample))
+        community = {"run_id": run_id, "sample": sample,
+                     "ingested_at": datetime.datetime.now().astimezone().isoformat(timespec="seconds")}
+        community.update({parameter: parameters.get(parameter) for parameter in RUN_PARAMETERS})
+        connection.execute("INSERT INTO communities ({}) VALUES ({})".format(", ".join(community),
+                                                                             ", ".join("?" * len(community))),
+                           [None if value in (None, "") else str(value) for value in community.values()])
+        for table, rows in tables.items():
+            rows.insert(0, "sample", sample)
+            rows.insert(0, "run_id", run_id)
+            append_table(connection, table, rows)
+    return {table: len(rows) for table, rows in tables.items()}
+
+
+def ingest_run(database: pathlib.Path, run_dir: pathlib.Path, parameters: Dict[str, str],
+               samples: List[str] = None) -> pd.DataFrame:
+    """Store the summaries of all (or the given) communities of a run.
+    Arguments:
+        database:   Path to the SQLite database, created if it does not exist
+        run_dir:    directory MAGICIAN was run in; its absolute path identifies the run
+        parameters: run parameters to record for each community
+        samples:    names of the communities to store (default: all with summaries)
+    Returns:
+        The amount of rows stored for each community and table.
+    """
+    summary_dir = pathlib.Path(run_dir) / "summaries"
+    if samples is None:
+        samples = sorted(summary_file.name[len("general_summary_"):-len(".xlsx")]
+                         for summary_file in summary_dir.glob("general_summary_*.xlsx"))
+    run_id = str(pathlib.Path(run_dir).resolve())
+    stored = []
+    connection = sqlite3.connect(database, timeout=LOCK_TIMEOUT)
+    try:
+        for sample in samples:
+            row_counts = ingest_community(connection, run_id, sample,
+                                          summary_dir / "general_summary_{}.xlsx".format(sample),
+                                          summary_dir / "bin_summary_{}.xlsx".format(sample), parameters)
+            stored += [{"sample": sample, "table": table, "rows": rows} for table, rows in row_counts.items()]
+    finally:
+        connection.close()
+    return pd.DataFrame(stored, columns=["sample", "table", "rows"])
+
+
+def query_results(database: pathlib.Path, query: str) -> pd.DataFrame:
+    """Run an SQL query on the database."""
+    if not pathlib.Path(database).exists():
+        raise FileNotFoundError("Results database {} does not exist.".format(database))
+    # read-only, so queries cannot change stored results
+    connection = sqlite3.connect("file:{}?mode=ro".format(pathlib.Path(database).resolve()), uri=True,
+                                 timeout=LOCK_TIMEOUT)
+    try:
+        return pd.read_sql_query(query, connection)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Store the summaries of MAGICIAN runs in an SQLite database, or query it.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Store the summaries of a run")
+    ingest_parser.add_argument("database", action="store", help="Path to the database (created if missing)")
+    ingest_parser.add_argument("run_dir", action="store", nargs="?", default=".",
+                               help="Directory MAGICIAN was run in (default: current directory)")
+    ingest_parser.add_argument("-s", "--samples", action="store", nargs="+",
+                               help="Communities to store (default: all with summaries)")
+    ingest_parser.add_argument("-p", "--parameters", action="store", nargs="+", default=[],
+                               help="Run parameters to record as name=value, with names from: {}".format(
+                                   ", ".join(RUN_PARAMETERS)))
+    ingest_parser.add_argument("-o", "--outfile", action="store",
+                               help="Name of tab-separated file to write the amount of stored rows to")
+    query_parser = subparsers.add_parser("query", help="Run an SQL query and write the result as tab-separated "
+                                                       "table; tables: communities, {}".format(
+                                                        ", ".join({**SUMMARY_SHEETS, **BIN_SUMMARY_SHEETS}.values())))
+    query_parser.add_argument("database", action="store", help="Path to the database")
+    query_parser.add_argument("query", action="store", help="SQL query")
+    query_parser.add_argument("-o", "--outfile", action="store", help="File to write to (default: print result)")
+    args = parser.parse_args()
+
+    if args.action == "ingest":
+        run_parameters = dict(parameter.split("=", 1) for parameter in args.parameters)
+        unknown = sorted(set(run_parameters) - set(RUN_PARAMETERS))
+        if unknown:
+            parser.error("Unknown run parameters: {}".format(", ".join(unknown)))
+        stored_rows = ingest_run(pathlib.Path(args.database), pathlib.Path(args.run_dir), run_parameters,
+                                 args.samples)
+        if args.outfile:
+            stored_rows.to_csv(args.outfile, sep="\t", index=False)
+    else:
+        result = query_results(pathlib.Path(args.database), args.query)
+        result.to_csv(args.outfile if args.outfile else sys.stdout, sep="\t", index=False)
@@ -1,4 +1,6 @@
+import json
 import logging
+import os
 import pathlib
 import re
 import subprocess
@@ -7,6 +9,7 @@ import sys
 import pandas as pd
 import yaml
 
+import event_log
 import pipeline_config
 
 from argparse import ArgumentParser
@@ -28,6 +31,13 @@ logger.addHandler(plain_console_log)
 DEFAULT_PROFILE = "mbarc"
 DEFAULT_INSERT = 270
 DEFAULT_CORES = 6
+DEFAULT_SIMULATOR = "camisim"
+DEFAULT_EVALUATION = "drep"
+DEFAULT_PIPELINE_PROFILE = "standard"
+# previews run in their own directory so they can run alongside the full run
+PREVIEW_DIR = "preview"
+# communities from several community files are run from one combined file
+COMBINED_COMMUNITY_FILE = "combined_communities.tsv"
 
 
 def make_demo_tempfile(tempfile: pathlib.Path) -> None:
@@ -39,18 +49,105 @@ def make_demo_tempfile(tempfile: pathlib.Path) -> None:
 
     """
     original_demo_file = pathlib.Path(__file__).parent / "test" / "data" / "test_genomes" / "sample_distributions.tsv"
-    demo_files_to_abs = pd.read_csv(original_demo_file, sep="\t")
-    demo_files_to_abs["genomes"] = demo_files_to_abs["genomes"].apply(lambda genome_path:
-                                                                      pathlib.Path(genome_path).resolve())
     logger.info("Creating temporary input file %s", tempfile)
-    demo_files_to_abs.to_csv(tempfile, sep="\t", index=False)
+    write_absolute_paths(original_demo_file, tempfile)
+
+
+def write_absolute_paths(community_file: pathlib.Path, outfile: pathlib.Path) -> pathlib.Path:
+    """Copy a community file, converting paths to source genomes to absolute paths so the copy can be used
+    from any directory.
+
+    Arguments:
+        community_file: the community file to copy
+        outfile:        the file to write the copy to
+
+    Returns:
+        The absolute path to the copy.
+
+    """
+    files_to_abs = pd.read_csv(community_file, sep="\t")
+    files_to_abs["genomes"] = files_to_abs["genomes"].apply(lambda genome_path: pathlib.Path(genome_path).resolve())
+    files_to_abs.to_csv(outfile, sep="\t", index=False)
+    return pathlib.Path(outfile).resolve()
+
+
+def find_community_files(community_paths: List[pathlib.Path]) -> List[pathlib.Path]:
+    """List the community files given directly or as directories of community files.
+
+    Arguments:
+        community_paths:    community files or directories holding community files (*.tsv)
+
+    Returns:
+        The community files, those in each directory sorted by name.
+
+    Raises:
+        ValueError: if a directory holds no community files
+
+    """
+    community_files = []
+    for community_path in community_paths:
+        if pathlib.Path(community_path).is_dir():
+            # skip communities combined by an earlier run in the same directory
+            dir_files = sorted(dir_file for dir_file in pathlib.Path(community_path).glob("*.tsv")
+                               if dir_file.name != COMBINED_COMMUNITY_FILE)
+            if not dir_files:
+                raise ValueError(f"No community files (*.tsv) found in {community_path}.")
+            community_files += dir_files
+        else:
+            community_files.append(pathlib.Path(community_path))
+    return community_files
+
+
+def combine_community_files(community_files: List[pathlib.Path], outfile: pathlib.Path) -> pathlib.Path:
+    """Combine several community files into one, so all their communities run in one workflow. Communities are
+    named after their file and their column (e.g. community1 from project_a.tsv becomes project_a_community1);
+    source genomes missing from a file get a copy number of 0 in its communities. Paths to source genomes are
+    converted to absolute paths.
+
+    Arguments:
+        community_files:    the community files to combine
+        outfile:            the file to write the combined communities to
+
+    Returns:
+        The absolute path to the combined file.
+
+    Raises:
+        ValueError: if two community files have the same name
+
+    """
+    file_names = [pathlib.Path(community_file).stem for community_file in community_files]
+    if len(set(file_names)) != len(file_names):
+        raise ValueError("Community files need different names to tell their communities apart.")
+    combined = None
+    for file_name, community_file in zip(file_names, community_files):
+        communities = pd.read_csv(community_file, sep="\t")
+        communities["genomes"] = communities["genomes"].apply(
+            lambda genome_path: str(pathlib.Path(genome_path).resolve()))
+        communities = communities.rename(columns={community: f"{file_name}_{community}"
+                                                  for community in communities.columns[2:]})
+        if combined is None:
+            combined = communities
+        else:
+            combined = combined.merge(communities, on=["genomes", "seq_type"], how="outer", sort=False)
+    copy_numbers = combined.columns[2:]
+    combined[copy_numbers] = combined[copy_numbers].fillna(0)
+    # keep whole copy numbers whole after filling in missing genomes
+    for community in copy_numbers:
+        if (combined[community] % 1 == 0).all():
+            combined[community] = combined[community].astype(int)
+    combined.to_csv(outfile, sep="\t", index=False)
+    return pathlib.Path(outfile).resolve()
 
 
 def get_snake_cmd(input_file, target: str, profile_type: Optional[str] = DEFAULT_PROFILE,
                   profile_base: Optional[str] = "", readlength: Optional[int] = None,
                   insert_size: Optional[int] = DEFAULT_INSERT, cluster_cmd: Optional[str] = "",
                   cores: Optional[int]=DEFAULT_CORES,
-                  *snake_params, config_path: pathlib.Path = default_config_file) -> List[str]:
+                  *snake_params, config_path: pathlib.Path = default_config_file,
+                  simulator: str = DEFAULT_SIMULATOR, evaluation: str = DEFAULT_EVALUATION,
+                  use_conda: bool = True, group_jobs: bool = False,
+                  preview: Optional[float] = None,
+                  pipeline_profile: str = DEFAULT_PIPELINE_PROFILE) -> List[str]:
     """Get the Snakemake command with optional configuration parameters.
     Arguments:
         input_file:     File with paths to source genomes, sequence type (plasmid/chromosome) and desired relative
@@ -64,13 +161,25 @@ def get_snake_cmd(input_file, target: str, profile_type: Optional[str] = DEFAULT
         cores:          the amount of cores Snakemake should use
         snake_params:   parameters to pass to the Snakefile
         config_path:    path to the config file to use with Snakemake
+        simulator:      read simulation engine: full CAMISIM or ART directly (default: camisim)
+        evaluation:     how to match bins to source genomes: dRep ANI or gold standard (default: drep)
+        use_conda:      whether to run tools in their conda environments; otherwise, tools are taken from
+                        the PATH (default: True)
+        group_jobs:     whether to bundle lightweight steps into shared cluster jobs (default: False)
+        preview:        if given, simulate this fraction of the full sample size and run a reduced pipeline in
+                        the preview directory for provisional results (default: None)
+        pipeline_profile:   which optional stages to run: fast skips read trimming and dRep's figures,
+                            thorough adds statistics of the simulated reads to the summaries
+                            (default: standard)
 
     Returns:
         The command for running Snakemake with the desired parameters.
 
     Raises:
-        ValueError: if arguments contain invalid characters, or if a value that isn't a positive int
-                    was given for read length, insert size or amount of cores
+        ValueError: if arguments contain invalid characters, if a value that isn't a positive int
+                    was given for read length, insert size or amount of cores, if the simulator or
+                    evaluation mode or pipeline profile is unknown, or if the preview fraction is not
+                    between 0 and 1
 
     """
     # check all elements of the command
@@ -92,6 +201,15 @@ def get_snake_cmd(input_file, target: str, profile_type: Optional[str] = DEFAULT
     if cores <= 0:
         raise ValueError(core_error)
 
+    if simulator not in {"camisim", "art"}:
+        raise ValueError("Simulator must be either camisim or art.")
+    if evaluation not in {"drep", "gold_standard"}:
+        raise ValueError("Evaluation must be either drep or gold_standard.")
+    if pipeline_profile not in {"fast", "standard", "thorough"}:
+        raise ValueError("Pipeline profile must be fast, standard or thorough.")
+    if preview is not None and not 0 < preview < 1:
+        raise ValueError("Preview fraction must be above 0 and below 1.")
+
     # we only need to check read length when it's relevant - check explicitly for "not None"
     # so we can complain about read lengths <= 0 specifically
     if profile_type == "own":
@@ -126,25 +244,72 @@ def get_snake_cmd(input_file, target: str, profile_type: Optional[str] = DEFAULT
     snakemake_cmd += ["--config", 'profile_type="{}"'.format(profile_type),
                      'insert_size={}'.format(insert_size),
                      'samples_file={}'.format(input_file)]
+    if simulator != DEFAULT_SIMULATOR:
+        snakemake_cmd += ['simulator="{}"'.format(simulator)]
+    if evaluation != DEFAULT_EVALUATION:
+        snakemake_cmd += ['evaluation="{}"'.format(evaluation)]
+    if pipeline_profile != DEFAULT_PIPELINE_PROFILE:
+        snakemake_cmd += ['pipeline_profile="{}"'.format(pipeline_profile)]
+    if group_jobs:
+        snakemake_cmd += ['group_jobs=True']
+    if preview is not None:
+        snakemake_cmd += ['preview={}'.format(preview)]
     if profile_type == "own":
         snakemake_cmd += ['profile_name="{}"'.format(profile_base),
                           'readlength={}'.format(readlength)]
-    snakemake_cmd += ['--use-conda', '--conda-frontend', snake_config["conda_frontend"],
-                     "--configfile", str(config_path),
+    if use_conda:
+        snakemake_cmd += ['--use-conda', '--conda-frontend', snake_config["conda_frontend"]]
+    snakemake_cmd += ["--configfile", str(config_path),
                      "--cores", str(cores),
                      *snake_params]
+    if preview is not None:
+        snakemake_cmd += ["--directory", PREVIEW_DIR]
 
     return snakemake_cmd
-    
+
+
+def run_with_event_log(snake_command: List[str], event_file: pathlib.Path) -> int:
+    """Run Snakemake, passing its output through to the console while writing a JSON line for each job
+    that starts or ends and for each progress update, and logging a progress summary per community.
+    Arguments:
+        snake_command:  the command for running Snakemake
+        event_file:     the file to append events to
+
+    Returns:
+        The exit status of Snakemake.
+
+    """
+    event_parser = event_log.SnakemakeEventParser()
+    with open(event_file, "a", encoding="utf-8") as events:
+        events.write(json.dumps({"event": "workflow_start",
+                                 "time": event_log.get_timestamp(event_parser.workflow_start),
+                                 "command": [str(part) for part in snake_command]}) + "\n")
+        # Snakemake's output must not be buffered for job start and end times to be accurate
+        snake_run = subprocess.Popen(snake_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     text=True, bufsize=1, env=dict(os.environ, PYTHONUNBUFFERED="1"))
+        for line in snake_run.stdout:
+            sys.stdout.write(line)
+            for event in event_parser.parse_line(line):
+                events.write(json.dumps(event) + "\n")
+                if event["event"] == "progress":
+                    logger.info(event_log.format_progress(event))
+            events.flush()
+        returncode = snake_run.wait()
+        for event in event_parser.finish(returncode):
+            events.write(json.dumps(event) + "\n")
+    return returncode
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Run MAGICIAN to simulate MAGs for a specified community"
                                         " or set of communities.\n"
                                         "Run without arguments for a test run.")
-    parser.add_argument("community_file", action="store",
+    parser.add_argument("community_file", action="store", nargs="+",
                         help="File with paths to source genomes, sequence type (plasmid/chromosome)"
                              " and their desired relative copy number in each community to simulate "
-                             "(one column with organisms' copy numbers per community)")
+                             "(one column with organisms' copy numbers per community); several files or "
+                             "directories of files (*.tsv) run together, with communities named "
+                             "[FILE]_[COMMUNITY]")
     parser.add_argument("--target", action="store",
                         help="Desired output file or rule "
                              "(default: MAGs, statistics and summary files for all communities)",
@@ -161,9 +326,33 @@ if __name__ == "__main__":
                              "required with 'own' error profile", default=None)
     parser.add_argument("--insert_size", action="store", type=int, default=DEFAULT_INSERT,
                         help=f"Mean insert size for read simulation (default: {DEFAULT_INSERT})")
+    parser.add_argument("--simulator", action="store", default=DEFAULT_SIMULATOR, choices=["camisim", "art"],
+                        help="Read simulation engine: full CAMISIM, or ART directly for communities with fixed "
+                             f"relative abundances (default: {DEFAULT_SIMULATOR})")
+    parser.add_argument("--evaluation", action="store", default=DEFAULT_EVALUATION,
+                        choices=["drep", "gold_standard"],
+                        help="How to match bins to source genomes: dRep ANI, or purity and completeness from the "
+                             f"origin of the simulated reads (gold_standard) (default: {DEFAULT_EVALUATION})")
+    parser.add_argument("--pipeline_profile", action="store", default=DEFAULT_PIPELINE_PROFILE,
+                        choices=["fast", "standard", "thorough"],
+                        help="Which optional stages to run: fast assembles untrimmed reads and skips dRep's "
+                             "figures, thorough adds statistics of the simulated reads to the summaries "
+                             f"(default: {DEFAULT_PIPELINE_PROFILE})")
+    parser.add_argument("--preview", action="store", type=float,
+                        help="Simulate only this fraction of the full sample size (e.g. 0.05) and run a reduced "
+                             f"pipeline in the directory {PREVIEW_DIR}/ for fast, provisional results; can run "
+                             "alongside the full run (default: full run)")
+    parser.add_argument("--event_log", action="store", default="",
+                        help="File to append a JSON line to for each job that starts or ends and for each "
+                             "progress update; also logs progress per community (default: no event log)")
+    parser.add_argument("--no_conda", action="store_true",
+                        help="Use the tools found in the PATH instead of creating conda environments")
     parser.add_argument("--cluster", action="store", default="",
                         help="""For use with snakemake's cluster mode; supply command for submitting jobs as you \
                         would with snakemake.""")
+    parser.add_argument("--group_jobs", action="store_true",
+                        help="In cluster mode, submit lightweight setup and summary steps as shared jobs instead "
+                             "of one job per step")
     parser.add_argument("--cores", action="store", default=DEFAULT_CORES,
                         help=f"Amount of cores Snakemake should use (default: {DEFAULT_CORES})")
     parser.add_argument("--config_file", help = "Config file for run")
@@ -194,22 +383,43 @@ if __name__ == "__main__":
 
     # otherwise we have gotten args and need to handle them
     args = parser.parse_args()
-    community_file = pathlib.Path(args.community_file)
+    community_files = find_community_files([pathlib.Path(community_path) for community_path in args.community_file])
     target_result = args.target
     profiletype = args.profile_type
     profilename = args.profile_name
     read_length = args.profile_readlength
     insert_size = args.insert_size
     cluster_cmd = args.cluster
+    simulator = args.simulator
+    evaluation = args.evaluation
     snake_cores = args.cores
     snake_flags = []
     if args.snake_flags:
         snake_flags = args.snake_flags[0].split()
     if args.config_file:
         default_config_file = pathlib.Path(args.config_file).resolve()
+    community_file = community_files[0]
+    if args.preview is not None:
+        pathlib.Path(PREVIEW_DIR).mkdir(exist_ok=True)
+    if len(community_files) > 1:
+        combined_dir = pathlib.Path(PREVIEW_DIR) if args.preview is not None else pathlib.Path.cwd()
+        community_file = combine_community_files(community_files, combined_dir / COMBINED_COMMUNITY_FILE)
+        logger.info("Combined %s community files into %s", len(community_files), community_file)
+    elif args.preview is not None:
+        # genomes given with relative paths have to be found from the preview directory
+        community_file = write_absolute_paths(community_file, pathlib.Path(PREVIEW_DIR) / community_file.name)
 
     snake_command = get_snake_cmd(community_file, target_result, profiletype, profilename,
                                   read_length, insert_size,
-                                  cluster_cmd, snake_cores, *snake_flags)
-    subprocess.run(snake_command, check=True)
+                                  cluster_cmd, snake_cores, *snake_flags, config_path=default_config_file,
+                                  simulator=simulator, evaluation=evaluation, use_conda=not args.no_conda,
+                                  group_jobs=args.group_jobs, preview=args.preview,
+                                  pipeline_profile=args.pipeline_profile)
+    # dry runs list jobs without running them, so they would only show up as started
+    if args.event_log and not {"-n", "--dry-run", "--dryrun"} & set(snake_flags):
+        snake_returncode = run_with_event_log(snake_command, pathlib.Path(args.event_log))
+        if snake_returncode:
+            raise subprocess.CalledProcessError(snake_returncode, snake_command)
+    else:
+        subprocess.run(snake_command, check=True)
 
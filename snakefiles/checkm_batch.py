@@ -0,0 +1,120 @@
+"""Check the bins and source genomes of many communities in a single CheckM run, so CheckM's reference data is only
+loaded once, and split the results back into one table each for each community's bins and source genomes."""
+
+import csv
+import os
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List
+
+# kinds of genomes checked for each community
+KINDS = ["bins", "refs"]
+
+
+def get_batch_id(sample: str, kind: str, genome_id: str) -> str:
+    """Name a genome uniquely across communities, e.g. "sample.bins.sample.bin.1"."""
+    return "{}.{}.{}".format(sample, kind, genome_id)
+
+
+def stage_genomes(genome_dirs: Dict[str, Dict[str, Path]], extension: str, out_dir: Path,
+                  ids_file: Path) -> None:
+    """Link the bins and source genomes of all communities into one directory under names unique across
+    communities.
+    Arguments:
+        genome_dirs:    for each community, the directory holding each kind of genome
+        extension:      extension of genome files
+        out_dir:        directory to link all genomes into
+        ids_file:       Path to a tab-separated file mapping names in the batch to community, kind and genome
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with open(ids_file, "w") as genome_ids:
+        genome_ids.write("batch_id\tsample\tkind\tgenome_id\n")
+        for sample, kind_dirs in genome_dirs.items():
+            for kind, genome_dir in kind_dirs.items():
+                for genome_file in sorted(Path(genome_dir).glob("*.{}".format(extension))):
+                    batch_id = get_batch_id(sample, kind, genome_file.stem)
+                    os.symlink(genome_file.resolve(), Path(out_dir, "{}.{}".format(batch_id, extension)))
+                    genome_ids.write("{}\t{}\t{}\t{}\n".format(batch_id, sample, kind, genome_file.stem))
+
+
+def read_genome_ids(ids_file: Path) -> List[Dict[str, str]]:
+    """Read the mapping of names in the batch to community, kind and genome."""
+    with open(ids_file, "r") as genome_ids:
+        return list(csv.DictReader(genome_ids, delimiter="\t"))
+
+
+def split_checkm_table(checkm_table: Path, genome_ids: List[Dict[str, str]], sample: str, kind: str,
+                       outfile: Path) -> int:
+    """Write CheckM's results for one kind of genome of one community under their original names.
+    Arguments:
+        checkm_table:   Path to CheckM's tab-separated table for the whole batch
+        genome_ids:     mapping of names in the batch as returned by read_genome_ids
+        sample:         name of the community
+        kind:           bins or refs
+        outfile:        Path to write the community's table to
+    Returns:
+        The amount of genomes written.
+    """
+    original_ids = {genome["batch_id"]: genome["genome_id"] for genome in genome_ids
+                    if genome["sample"] == sample and genome["kind"] == kind}
+    with open(checkm_table, "r") as batch_table:
+        rows = list(csv.reader(batch_table, delimiter="\t"))
+    community_rows = sorted([original_ids[row[0]]] + row[1:] for row in rows[1:] if row[0] in original_ids)
+    with open(outfile, "w") as community_table:
+        for row in [rows[0]] + community_rows:
+            community_table.write("\t".join(row) + "\n")
+    return len(community_rows)
+
+
+def link_bin_results(checkm_dir: Path, genome_ids: List[Dict[str, str]], sample: str, kind: str,
+                     out_dir: Path) -> None:
+    """Link CheckM's per-genome results of one kind of genome of one community into a directory of their own,
+    under their original names."""
+    Path(out_dir, "bins").mkdir(parents=True, exist_ok=True)
+    for genome in genome_ids:
+        if genome["sample"] == sample and genome["kind"] == kind:
+            batch_results = Path(checkm_dir, "bins", genome["batch_id"])
+            if batch_results.exists():
+                os.symlink(batch_results.resolve(), Path(out_dir, "bins", genome["genome_id"]))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="stage: link the bins and source genomes of several communities into one "
+                                        "directory for CheckM; split: write one community's results.")
+    parser.add_argument("action", action="store", choices=["stage", "split"])
+    parser.add_argument("-s", "--samples", action="store", nargs="+", required=True,
+                        help="Names of the communities (split: one community)")
+    parser.add_argument("-i", "--ids", action="store", required=True,
+                        help="Tab-separated file mapping names in the batch to community and genome")
+    parser.add_argument("--bin_dir", action="store", default="metabat2/{sample}",
+                        help="stage: directory of each community's bins (default: metabat2/{sample})")
+    parser.add_argument("--ref_dir", action="store", default="camisim_fasta_{sample}",
+                        help="stage: directory of each community's source genomes (default: camisim_fasta_{sample})")
+    parser.add_argument("-x", "--extension", action="store", default="fa",
+                        help="stage: extension of genome files (default: fa)")
+    parser.add_argument("-g", "--genome_dir", action="store",
+                        help="stage: directory to link all genomes into")
+    parser.add_argument("-c", "--checkm_table", action="store", help="split: CheckM's table for the whole batch")
+    parser.add_argument("-d", "--checkm_dir", action="store", help="split: CheckM's output directory for the batch")
+    parser.add_argument("--bins_out", action="store", nargs=2, metavar=("TABLE", "DIR"),
+                        help="split: table and directory to write the community's bins' results to")
+    parser.add_argument("--refs_out", action="store", nargs=2, metavar=("TABLE", "DIR"),
+                        help="split: table and directory to write the community's source genomes' results to")
+    args = parser.parse_args()
+
+    if args.action == "stage":
+        if not args.genome_dir:
+            parser.error("stage needs --genome_dir.")
+        dirs = {community: {"bins": Path(args.bin_dir.format(sample=community)),
+                            "refs": Path(args.ref_dir.format(sample=community))} for community in args.samples}
+        stage_genomes(dirs, args.extension, Path(args.genome_dir), Path(args.ids))
+    else:
+        if len(args.samples) != 1 or not (args.checkm_table and args.checkm_dir):
+            parser.error("split needs exactly one community, --checkm_table and --checkm_dir.")
+        batch_ids = read_genome_ids(Path(args.ids))
+        for genome_kind, kind_out in zip(KINDS, [args.bins_out, args.refs_out]):
+            if kind_out:
+                split_checkm_table(Path(args.checkm_table), batch_ids, args.samples[0], genome_kind,
+                                   Path(kind_out[0]))
+                link_bin_results(Path(args.checkm_dir), batch_ids, args.samples[0], genome_kind, Path(kind_out[1]))
@@ -0,0 +1,62 @@
+"""Split a community's bins into chunks that CheckM can check as independent jobs, and collect the chunks' per-bin
+results. The chunks' tables are merged by checkm_taxa.py."""
+
+import os
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+
+
+def chunk_genomes(genome_dir: Path, extension: str, chunk_size: int, out_dir: Path) -> List[Path]:
+    """Link genomes into numbered directories of at most the given amount of genomes, in order of their names.
+    Arguments:
+        genome_dir: directory holding the genomes or bins
+        extension:  extension of genome files
+        chunk_size: maximum amount of genomes in a chunk
+        out_dir:    directory to create the chunks in
+    Returns:
+        The directories of all chunks.
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunks must hold at least one genome.")
+    genome_files = sorted(Path(genome_dir).glob("*.{}".format(extension)))
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    chunk_dirs = []
+    for chunk_start in range(0, len(genome_files), chunk_size):
+        chunk_dir = Path(out_dir, "chunk_{}".format(chunk_start // chunk_size + 1))
+        chunk_dir.mkdir()
+        for genome_file in genome_files[chunk_start:chunk_start + chunk_size]:
+            os.symlink(genome_file.resolve(), chunk_dir / genome_file.name)
+        chunk_dirs.append(chunk_dir)
+    return chunk_dirs
+
+
+def link_chunk_results(chunk_dirs: List[Path], out_dir: Path) -> None:
+    """Link CheckM's per-genome results of all chunks into one output directory."""
+    Path(out_dir, "bins").mkdir(parents=True, exist_ok=True)
+    for chunk_dir in chunk_dirs:
+        for genome_results in sorted(Path(chunk_dir, "bins").glob("*")):
+            os.symlink(genome_results.resolve(), Path(out_dir, "bins", genome_results.name))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="chunk: split bins into chunks for separate CheckM jobs; link: collect the "
+                                        "chunks' per-bin CheckM results in one directory.")
+    parser.add_argument("action", action="store", choices=["chunk", "link"])
+    parser.add_argument("inputs", action="store", nargs="*",
+                        help="chunk: directory of bins; link: CheckM output directories of all chunks")
+    parser.add_argument("-x", "--extension", action="store", default="fa",
+                        help="chunk: extension of bin files (default: fa)")
+    parser.add_argument("-n", "--chunk_size", action="store", type=int, default=50,
+                        help="chunk: maximum amount of bins in a chunk (default: 50)")
+    parser.add_argument("-d", "--out_dir", action="store", required=True,
+                        help="chunk: directory to create chunks in; link: directory to link per-bin results into")
+    args = parser.parse_args()
+
+    if args.action == "chunk":
+        if len(args.inputs) != 1:
+            parser.error("chunk needs exactly one directory of bins.")
+        chunk_genomes(Path(args.inputs[0]), args.extension, args.chunk_size, Path(args.out_dir))
+    else:
+        link_chunk_results([Path(chunk_dir) for chunk_dir in args.inputs], Path(args.out_dir))
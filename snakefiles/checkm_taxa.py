@@ -0,0 +1,209 @@
+"""Choose CheckM marker sets from the known taxa of the source genomes, so CheckM can skip placing genomes in its
+reference tree. Bins are assigned the taxon of their closest source genome."""
+
+import csv
+import os
+import re
+import sqlite3
+import sys
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# CheckM's ranks from most to least specific; NCBI calls domains superkingdoms
+CHECKM_RANKS = ["species", "genus", "family", "order", "class", "phylum", "domain"]
+NCBI_RANKS = {"superkingdom": "domain"}
+# marker set for genomes and bins of unknown origin
+UNKNOWN_TAXON = ("life", "Prokaryote")
+CHECKM_HEADER = ["Bin Id", "Marker lineage", "# genomes", "# markers", "# marker sets", "0", "1", "2", "3", "4", "5+",
+                 "Completeness", "Contamination", "Strain heterogeneity"]
+# "  genus     Escherichia     96     1160     332" as listed by checkm taxon_list
+TAXON_LINE = re.compile(r"^\s*(\w+)\s{2,}(.+?)\s{2,}\d+\s+\d+\s+\d+\s*$")
+
+
+def read_taxon_list(taxon_list_file: Path) -> Set[Tuple[str, str]]:
+    """Read the taxa CheckM has marker sets for.
+    Arguments:
+        taxon_list_file:    Path to the output of checkm taxon_list
+    Returns:
+        Rank and name of each taxon.
+    """
+    with open(taxon_list_file, "r") as taxon_list:
+        return {(taxon.group(1), taxon.group(2)) for taxon in map(TAXON_LINE.match, taxon_list) if taxon}
+
+
+def get_lineage(index_file: Path, taxid: str) -> Dict[str, str]:
+    """Look up the names of a taxon and its ancestors at CheckM's ranks in the indexed NCBI taxonomy.
+    Arguments:
+        index_file: Path to the taxonomy index written by taxonomy_cache.py
+        taxid:      NCBI taxid of the genome
+    Returns:
+        The scientific name of the taxon at each of CheckM's ranks in the lineage; empty if the taxid is unknown.
+    """
+    lineage = {}
+    connection = sqlite3.connect(index_file)
+    try:
+        merged = connection.execute("SELECT new_taxid FROM merged WHERE taxid = ?", (taxid,)).fetchone()
+        if merged:
+            taxid = merged[0]
+        while taxid:
+            node = connection.execute("SELECT parent, line FROM nodes WHERE taxid = ?", (taxid,)).fetchone()
+            if node is None:
+                break
+            rank = node[1].split("\t|\t")[2].strip(" \t|")
+            rank = NCBI_RANKS.get(rank, rank)
+            if rank in CHECKM_RANKS:
+                for (name_line,) in connection.execute("SELECT line FROM names WHERE taxid = ?", (taxid,)):
+                    name_parts = name_line.split("\t|\t")
+                    if name_parts[3].strip(" \t|") == "scientific name":
+                        lineage[rank] = name_parts[1].strip()
+            # the root is its own parent
+            taxid = node[0] if node[0] != taxid else None
+    finally:
+        connection.close()
+    return lineage
+
+
+def choose_marker_set(lineage: Dict[str, str], taxon_list: Set[Tuple[str, str]]) -> Tuple[str, str]:
+    """Choose the most specific taxon in a lineage that CheckM has a marker set for.
+    Arguments:
+        lineage:    name of the taxon at each rank
+        taxon_list: rank and name of the taxa CheckM has marker sets for
+    Returns:
+        Rank and name of the taxon whose marker set to use.
+    """
+    for rank in CHECKM_RANKS:
+        if (rank, lineage.get(rank)) in taxon_list:
+            return rank, lineage[rank]
+    return UNKNOWN_TAXON
+
+
+def get_source_taxids(metadata_file: Path) -> Dict[str, str]:
+    """Get the NCBI taxid of each source genome from the CAMISIM metadata file."""
+    with open(metadata_file, "r") as metadata:
+        return {row["genome_ID"]: row["NCBI_ID"] for row in csv.DictReader(metadata, delimiter="\t")}
+
+
+def get_closest_genomes(match_file: Path) -> Dict[str, str]:
+    """Get the closest source genome of each bin from dRep's ANI table or the gold standard evaluation.
+    Arguments:
+        match_file: Path to dRep's Ndb.csv or to the gold standard evaluation
+    Returns:
+        The name of each matched bin, with dots replaced by underscores, and its closest source genome.
+    """
+    closest_genomes = {}
+    with open(match_file, "r") as matches:
+        if Path(match_file).suffix == ".csv":
+            best_ani = {}
+            for match in csv.DictReader(matches):
+                # dRep compares all genomes to each other; keep source genomes compared to bins
+                genome, bin_name = match["querry"].replace(".fa", ""), match["reference"].replace(".fa", "")
+                if ".bin." in genome or ".bin." not in bin_name:
+                    continue
+                bin_name = bin_name.replace(".", "_")
+                if float(match["ani"]) > best_ani.get(bin_name, -1):
+                    best_ani[bin_name] = float(match["ani"])
+                    closest_genomes[bin_name] = genome
+        else:
+            for match in csv.DictReader(matches, delimiter="\t"):
+                if match["closest_genome"]:
+                    closest_genomes[match["bin_name"]] = match["closest_genome"]
+    return closest_genomes
+
+
+def assign_marker_sets(genome_files: List[Path], genome_taxids: Dict[str, Optional[str]], index_file: Path,
+                       taxon_list: Set[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Path]]:
+    """Group genomes by the marker set CheckM should use for them.
+    Arguments:
+        genome_files:   Paths to the genomes or bins
+        genome_taxids:  NCBI taxid of each genome or bin by file name without extension; bins of unknown origin
+                        may be missing
+        index_file:     Path to the taxonomy index
+        taxon_list:     rank and name of the taxa CheckM has marker sets for
+    Returns:
+        The genomes to check with each marker set.
+    """
+    marker_sets = {}
+    lineages = {}
+    for genome_file in genome_files:
+        taxid = genome_taxids.get(genome_file.stem)
+        if taxid is None:
+            marker_set = UNKNOWN_TAXON
+        else:
+            if taxid not in lineages:
+                lineages[taxid] = get_lineage(index_file, taxid)
+            marker_set = choose_marker_set(lineages[taxid], taxon_list)
+        marker_sets.setdefault(marker_set, []).append(genome_file)
+    return marker_sets
+
+
+def link_marker_set_groups(marker_sets: Dict[Tuple[str, str], List[Path]], out_dir: Path,
+                           groups_file: Path) -> None:
+    """Link the genomes for each marker set into a directory of their own for CheckM and list the groups.
+    Arguments:
+        marker_sets:    the genomes to check with each marker set
+        out_dir:        directory to create a numbered directory for each group in
+        groups_file:    Path to a tab-separated file listing group, rank, taxon and amount of genomes
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with open(groups_file, "w") as groups:
+        groups.write("group\trank\ttaxon\tgenomes\n")
+        for group_number, (rank, taxon) in enumerate(sorted(marker_sets), start=1):
+            group_dir = Path(out_dir, "group_{}".format(group_number))
+            group_dir.mkdir(exist_ok=True)
+            for genome_file in sorted(marker_sets[(rank, taxon)]):
+                os.symlink(genome_file.resolve(), group_dir / genome_file.name)
+            groups.write("{}\t{}\t{}\t{}\n".format(group_dir.name, rank, taxon, len(marker_sets[(rank, taxon)])))
+
+
+def merge_checkm_tables(checkm_tables: List[Path], outfile: Path) -> None:
+    """Combine CheckM's tables for each group (or chunk of bins) into one table sorted by bin, as written by
+    lineage_wf."""
+    rows = []
+    for checkm_table in checkm_tables:
+        if not Path(checkm_table).exists():
+            continue
+        with open(checkm_table, "r") as table:
+            rows += [row for row in csv.reader(table, delimiter="\t")][1:]
+    with open(outfile, "w") as merged:
+        merged.write("\t".join(CHECKM_HEADER) + "\n")
+        for row in sorted(rows):
+            merged.write("\t".join(row) + "\n")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="assign: group genomes or bins by the CheckM marker set of their known "
+                                        "taxon; merge: combine CheckM's tables for each group.")
+    parser.add_argument("action", action="store", choices=["assign", "merge"])
+    parser.add_argument("inputs", action="store", nargs="*",
+                        help="assign: directory of genomes or bins; merge: CheckM tables of each group")
+    parser.add_argument("-x", "--extension", action="store", default="fa",
+                        help="Extension of genome files (default: fa)")
+    parser.add_argument("-m", "--metadata", action="store", help="CAMISIM metadata file giving source taxids")
+    parser.add_argument("-i", "--taxonomy_index", action="store", help="Taxonomy index written by taxonomy_cache.py")
+    parser.add_argument("-t", "--taxon_list", action="store", help="Output of checkm taxon_list")
+    parser.add_argument("--matches", action="store",
+                        help="dRep's Ndb.csv or the gold standard evaluation, matching bins to source genomes; "
+                             "without this, genomes are treated as source genomes")
+    parser.add_argument("-g", "--groups_dir", action="store", help="Directory to link each group's genomes into")
+    parser.add_argument("-o", "--outfile", action="store", required=True,
+                        help="assign: tab-separated file listing the groups; merge: combined CheckM table")
+    args = parser.parse_args()
+
+    if args.action == "merge":
+        merge_checkm_tables([Path(table) for table in args.inputs], Path(args.outfile))
+        sys.exit(0)
+    if len(args.inputs) != 1 or not all([args.metadata, args.taxonomy_index, args.taxon_list, args.groups_dir]):
+        parser.error("assign needs exactly one directory, --metadata, --taxonomy_index, --taxon_list and "
+                     "--groups_dir.")
+    source_taxids = get_source_taxids(Path(args.metadata))
+    genomes = sorted(Path(args.inputs[0]).glob("*.{}".format(args.extension)))
+    if args.matches:
+        closest = get_closest_genomes(Path(args.matches))
+        taxids = {genome.stem: source_taxids.get(closest.get(genome.stem.replace(".", "_"))) for genome in genomes}
+    else:
+        taxids = {genome.stem: source_taxids.get(genome.stem) for genome in genomes}
+    link_marker_set_groups(assign_marker_sets(genomes, taxids, Path(args.taxonomy_index),
+                                              read_taxon_list(Path(args.taxon_list))),
+                           Path(args.groups_dir), Path(args.outfile))
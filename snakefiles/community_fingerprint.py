@@ -0,0 +1,192 @@
+"""Summarise each community's inputs as a fingerprint, so only communities whose genomes, abundances or simulation
+parameters changed are simulated again, and communities with identical inputs are simulated only once."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# imported as a sibling module by the Snakefile and as part of the snakefiles package elsewhere
+try:
+    import snakemake_helpers as helpers
+except ImportError:
+    from snakefiles import snakemake_helpers as helpers
+
+HASH_BLOCK_SIZE = 1024 ** 2
+# content hashes of genomes, reused as long as a genome's size and modification time are unchanged
+HASH_CACHE_FILE = "genome_hashes.json"
+# which communities share which earlier community's reads, kept so this doesn't change once their reads are deleted
+SHARED_FILE = "shared_communities.json"
+
+
+def hash_genome(genome_file: Path, hash_cache: Dict[str, dict]) -> str:
+    """Hash the content of a genome file, reusing its earlier hash if the file is unchanged.
+    Arguments:
+        genome_file:    Path to the genome
+        hash_cache:     earlier hashes by absolute path, along with size and modification time; updated in place
+    Returns:
+        The SHA-256 hex digest of the file, or "missing" if the file does not exist.
+    """
+    genome_path = str(Path(genome_file).resolve())
+    if not Path(genome_path).is_file():
+        return "missing"
+    file_stat = os.stat(genome_path)
+    cached = hash_cache.get(genome_path)
+    if cached and cached["size"] == file_stat.st_size and cached["mtime_ns"] == file_stat.st_mtime_ns:
+        return cached["sha256"]
+    genome_hash = hashlib.sha256()
+    with open(genome_path, "rb") as content:
+        for block in iter(lambda: content.read(HASH_BLOCK_SIZE), b""):
+            genome_hash.update(block)
+    hash_cache[genome_path] = {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns,
+                               "sha256": genome_hash.hexdigest()}
+    return genome_hash.hexdigest()
+
+
+def describe_community(samples_table: pd.DataFrame, sample: str, genome_hashes: Dict[str, str],
+                       parameters: Dict[str, object]) -> List[str]:
+    """List everything a community's simulated reads depend on, independent of row order and file location.
+    Arguments:
+        samples_table:  the community file as read by pandas
+        sample:         name of the community
+        genome_hashes:  content hash of each genome by the path given in the community file; for records of an
+                        archive, the hash of the archive
+        parameters:     simulation parameters
+    Returns:
+        One line per simulation parameter, then one line per member genome giving its file name, content hash,
+        sequence type and abundance.
+    """
+    members = samples_table.loc[samples_table[sample] != 0]
+    # genome IDs are taken from file names, so a renamed genome gives differently named outputs
+    member_lines = sorted("{}\t{}\t{}\t{}".format(Path(genome).name, genome_hashes[genome], seq_type,
+                                                  repr(float(abundance)))
+                          for genome, seq_type, abundance in zip(members["genomes"], members["seq_type"],
+                                                                 members[sample]))
+    parameter_lines = ["{}={}".format(parameter, parameters[parameter]) for parameter in sorted(parameters)]
+    return parameter_lines + member_lines
+
+
+def get_fingerprint(description: List[str]) -> str:
+    """Hash the description of a community's inputs."""
+    return hashlib.sha256("\n".join(description).encode("utf-8")).hexdigest()
+
+
+def write_fingerprints(samples_file: Path, samples: List[str], parameters: Dict[str, object],
+                       out_dir: Path) -> Dict[str, str]:
+    """Write each community's fingerprint and the inputs it summarises to a file of its own. Files are only
+    written if the fingerprint changed, so unchanged communities are not simulated again.
+    Arguments:
+        samples_file:   Path to the community file
+        samples:        names of the communities
+        parameters:     simulation parameters, shared by all communities
+        out_dir:        directory to write {sample}.txt to for each community, along with the cache of genome hashes
+    Returns:
+        The fingerprint of each community.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    cache_file = Path(out_dir, HASH_CACHE_FILE)
+    hash_cache = {}
+    if cache_file.exists():
+        with open(cache_file, "r") as cache:
+            hash_cache = json.load(cache)
+    samples_table = pd.read_csv(samples_file, sep="\t", index_col=False)
+    member_genomes = set(samples_table.loc[(samples_table[samples] != 0).any(axis=1), "genomes"])
+    # a record of an archive changes whenever its archive does
+    genome_hashes = {genome: hash_genome(helpers.split_genome_reference(genome)[0], hash_cache)
+                     for genome in member_genomes}
+    fingerprints = {}
+    for sample in samples:
+        description = describe_community(samples_table, sample, genome_hashes, parameters)
+        fingerprints[sample] = get_fingerprint(description)
+        content = "\n".join([fingerprints[sample]] + description) + "\n"
+        fingerprint_file = Path(out_dir, "{}.txt".format(sample))
+        if not fingerprint_file.exists() or fingerprint_file.read_text() != content:
+            fingerprint_file.write_text(content)
+    # cluster jobs read the Snakefile at the same time, so replace the cache in one step
+    with tempfile.NamedTemporaryFile("w", dir=out_dir, suffix=".tmp", delete=False) as tmp_cache:
+        json.dump(hash_cache, tmp_cache)
+    os.replace(tmp_cache.name, cache_file)
+    return fingerprints
+
+
+def get_shared_communities(fingerprints: Dict[str, str], existing: Optional[Iterable[str]] = None,
+                           previous: Optional[Dict[str, List[str]]] = None) -> Dict[str, str]:
+    """Find communities with the same fingerprint as a community listed before them whose reads can be shared.
+    Arguments:
+        fingerprints:   the fingerprint of each community, in the order of the community file
+        existing:       communities whose simulated reads exist (default: all communities)
+        previous:       fingerprint and source community ("" for none) of each community from an earlier run
+    Returns:
+        For each community whose inputs duplicate an earlier community's, the name of that community.
+    """
+    existing = set(fingerprints if existing is None else existing)
+    previous = previous or {}
+    first_community = {}
+    shared = {}
+    for sample, fingerprint in fingerprints.items():
+        earlier_fingerprint, earlier_source = previous.get(sample, ["", ""])
+        unchanged = earlier_fingerprint == fingerprint
+        if unchanged and (not earlier_source or fingerprints.get(earlier_source) == fingerprint):
+            # reads were made before, possibly deleted since: keep how they were made so the job making them does
+            # not change and trigger a rerun
+            if earlier_source:
+                shared[sample] = earlier_source
+            elif sample in existing:
+                first_community.setdefault(fingerprint, sample)
+        elif fingerprint in first_community:
+            shared[sample] = first_community[fingerprint]
+        else:
+            # simulated in this run; communities whose reads were deleted are not shared from, as sharing them would
+            # simulate them again along with everything downstream of them
+            first_community[fingerprint] = sample
+    return shared
+
+
+def update_shared_communities(fingerprints: Dict[str, str], existing: Iterable[str], out_dir: Path) -> Dict[str, str]:
+    """Find communities that share an earlier community's reads, keeping the choice made in earlier runs for
+    communities whose fingerprint is unchanged, and record the choices for the next run.
+    Arguments:
+        fingerprints:   the fingerprint of each community, in the order of the community file
+        existing:       communities whose simulated reads exist
+        out_dir:        directory holding the record of earlier choices
+    Returns:
+        For each community whose inputs duplicate an earlier community's, the name of that community.
+    """
+    shared_file = Path(out_dir, SHARED_FILE)
+    previous = {}
+    if shared_file.exists():
+        with open(shared_file, "r") as shared_record:
+            previous = json.load(shared_record)
+    shared = get_shared_communities(fingerprints, existing, previous)
+    record = dict(previous, **{sample: [fingerprint, shared.get(sample, "")]
+                               for sample, fingerprint in fingerprints.items()})
+    with tempfile.NamedTemporaryFile("w", dir=out_dir, suffix=".tmp", delete=False) as tmp_record:
+        json.dump(record, tmp_record)
+    os.replace(tmp_record.name, shared_file)
+    return shared
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Write the fingerprint of each community in a community file and list "
+                                        "communities with identical inputs.")
+    parser.add_argument("samples_file", action="store", help="Community file")
+    parser.add_argument("-p", "--parameters", action="store", nargs="+", default=[],
+                        help="Simulation parameters as name=value, as given in the config file")
+    parser.add_argument("-o", "--out_dir", action="store", default="fingerprints",
+                        help="Directory to write fingerprints to (default: fingerprints)")
+    args = parser.parse_args()
+
+    with open(args.samples_file, "r") as community_file:
+        community_names = community_file.readline().strip().split("\t")[2:]
+    community_fingerprints = write_fingerprints(Path(args.samples_file), community_names,
+                                                dict(parameter.split("=", 1) for parameter in args.parameters),
+                                                Path(args.out_dir))
+    shared_communities = get_shared_communities(community_fingerprints)
+    for community_name, community_fingerprint in community_fingerprints.items():
+        print("{}\t{}\t{}".format(community_name, community_fingerprint, shared_communities.get(community_name, "")))
@@ -0,0 +1,212 @@
+"""Share outputs of deterministic steps between runs, keyed by the content of their inputs.
+Only uses the standard library so it can run inside any rule's conda environment."""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+
+HASH_BLOCK_SIZE = 1024 ** 2
+# entries are named by their key; anything else in the cache directory is still being written
+TMP_PREFIX = ".tmp"
+
+
+def hash_path(path: Path) -> str:
+    """Hash the content of a file, or the names and content of all files in a directory.
+    Arguments:
+        path:   Path to the file or directory
+    Returns:
+        The SHA-256 hex digest.
+    """
+    path_hash = hashlib.sha256()
+    files = [(Path("."), path)] if path.is_file() else sorted((file.relative_to(path), file)
+                                                                for file in path.rglob("*") if file.is_file())
+    for relative_path, file in files:
+        path_hash.update(str(relative_path).encode("utf-8") + b"\0")
+        with open(file, "rb") as content:
+            for block in iter(lambda: content.read(HASH_BLOCK_SIZE), b""):
+                path_hash.update(block)
+    return path_hash.hexdigest()
+
+
+def get_cache_key(key_parts: List[str], inputs: List[Path]) -> str:
+    """Combine a step's name, parameters and the names and content of its inputs into one key.
+    Arguments:
+        key_parts:  strings identifying the step and its parameters
+        inputs:     input files and directories, including scripts and environment files used by the step
+    Returns:
+        The SHA-256 hex digest identifying the step's outputs.
+    """
+    key = hashlib.sha256()
+    for key_part in key_parts:
+        key.update(key_part.encode("utf-8") + b"\0")
+    # outputs can depend on the names of input files, e.g. CheckM names bins after their files
+    for input_path in inputs:
+        key.update(Path(input_path).name.encode("utf-8") + b"\0")
+        key.update(hash_path(Path(input_path)).encode("ascii"))
+    return key.hexdigest()
+
+
+def link_path(source: Path, target: Path) -> None:
+    """Hard link a file or all files in a directory, copying where linking is not possible."""
+    if source.is_dir():
+        for file in source.rglob("*"):
+            if file.is_file():
+                link_path(file, target / file.relative_to(source))
+        target.mkdir(parents=True, exist_ok=True)
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        # different file systems
+        shutil.copy2(source, target)
+
+
+def copy_path(source: Path, target: Path) -> None:
+    """Copy a file or directory as a reflink where the file system supports it, so the copy takes no extra space
+    but has its own inode. Falls back to a plain copy where cp has no --reflink option."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.run(["cp", "-R", "--reflink=auto", str(source), str(target)], check=True,
+                       stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        remove_path(target)
+        if source.is_dir():
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+
+
+def touch_path(path: Path) -> None:
+    """Set the modification time of a file or a directory and everything in it to now."""
+    for file in [path, *(path.rglob("*") if path.is_dir() else [])]:
+        os.utime(file)
+
+
+def remove_path(path: Path) -> None:
+    """Remove a file or directory if it exists."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+
+def restore_outputs(cache_dir: Path, key: str, outputs: List[Path]) -> bool:
+    """Restore a step's outputs from the cache if they were stored before.
+    Arguments:
+        cache_dir:  directory holding the cache
+        key:        key identifying the step's outputs
+        outputs:    where the step writes its outputs, in the order they were stored in
+    Returns:
+        True if all outputs were restored, False if they are not in the cache.
+    """
+    entry = Path(cache_dir) / key
+    cached_outputs = [entry / str(output_number) for output_number in range(len(outputs))]
+    if not all(cached_output.exists() for cached_output in cached_outputs):
+        return False
+    try:
+        for cached_output, output in zip(cached_outputs, outputs):
+            remove_path(Path(output))
+            # entries share their inodes with the outputs of the run that stored them, so restore a copy: touching a
+            # link would make that run's outputs look newer than the steps after them
+            copy_path(cached_output, Path(output))
+            # restored outputs must not look older than the inputs they were made from
+            touch_path(Path(output))
+        os.utime(entry)
+    except OSError:
+        # the entry was evicted while restoring; leave no partial outputs for the step to trip over
+        for output in outputs:
+            remove_path(Path(output))
+        return False
+    return True
+
+
+def store_outputs(cache_dir: Path, key: str, outputs: List[Path]) -> Path:
+    """Store a step's outputs in the cache.
+    Arguments:
+        cache_dir:  directory holding the cache
+        key:        key identifying the step's outputs
+        outputs:    the step's outputs
+    Returns:
+        The path to the cache entry.
+    """
+    entry = Path(cache_dir) / key
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    # write to a temporary directory first so concurrent runs never see a half-written entry
+    tmp_entry = Path(tempfile.mkdtemp(dir=cache_dir, prefix=TMP_PREFIX))
+    for output_number, output in enumerate(outputs):
+        link_path(Path(output), tmp_entry / str(output_number))
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # another run stored the same outputs first
+        shutil.rmtree(tmp_entry)
+    return entry
+
+
+def get_size(path: Path) -> int:
+    """Get the size of all files in a directory in bytes."""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def evict_entries(cache_dir: Path, max_bytes: int, keep: str = "") -> List[str]:
+    """Remove the least recently used entries until the cache is no larger than the given size.
+    Arguments:
+        cache_dir:  directory holding the cache
+        max_bytes:  maximum size of the cache in bytes
+        keep:       key of an entry never to remove
+    Returns:
+        The keys of all removed entries.
+    """
+    entries = sorted((entry for entry in Path(cache_dir).iterdir()
+                      if entry.is_dir() and not entry.name.startswith(TMP_PREFIX)),
+                     key=lambda entry: entry.stat().st_mtime)
+    sizes = {entry: get_size(entry) for entry in entries}
+    total_size = sum(sizes.values())
+    removed = []
+    for entry in entries:
+        if total_size <= max_bytes:
+            break
+        if entry.name == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= sizes[entry]
+        removed.append(entry.name)
+    return removed
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Restore a step's outputs from a cache shared between runs, or store them "
+                                        "after running the step. Outputs are restored as copies (reflinks where possible).")
+    parser.add_argument("action", action="store", choices=["restore", "store"],
+                        help="restore: exit with status 1 if the outputs are not cached; store: cache the outputs")
+    parser.add_argument("-c", "--cache_dir", action="store", default="",
+                        help="Directory holding the cache (default: caching is switched off)")
+    parser.add_argument("--max_size", action="store", type=float, default=100,
+                        help="Size in GB above which the least recently used entries are removed (default: 100)")
+    parser.add_argument("-k", "--key", action="extend", nargs="+", default=[],
+                        help="Strings identifying the step and its parameters")
+    parser.add_argument("-i", "--inputs", action="extend", nargs="+", default=[],
+                        help="Inputs of the step, including scripts and environment files it uses")
+    parser.add_argument("-o", "--outputs", action="extend", nargs="+", default=[],
+                        help="Outputs of the step, in the same order for storing and restoring")
+    args = parser.parse_args()
+
+    if not args.cache_dir:
+        sys.exit(1 if args.action == "restore" else 0)
+    cache_key = get_cache_key(args.key, [Path(input_path) for input_path in args.inputs])
+    output_paths = [Path(output) for output in args.outputs]
+    if args.action == "restore":
+        if not restore_outputs(Path(args.cache_dir), cache_key, output_paths):
+            sys.exit(1)
+        print("Restored {} from cache entry {}".format(" ".join(args.outputs), cache_key), file=sys.stderr)
+    else:
+        store_outputs(Path(args.cache_dir), cache_key, output_paths)
+        evict_entries(Path(args.cache_dir), int(args.max_size * 1024 ** 3), keep=cache_key)
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Write the current disk usage of all files belonging to one community to the disk usage log of a step; a rerun of the
+# step replaces its snapshot.
+# Plain bash so it can run inside any rule's conda environment.
+# Usage: record_disk_usage.sh SAMPLE STEP LOGFILE
+sample=$1
+step=$2
+log_file=$3
+
+mkdir -p "$(dirname "$log_file")"
+candidates=(camisim_out/"$sample" camisim_old_runs/"$sample" camisim_fasta_"$sample" camisim_taxonomy/"$sample"
+            qc/"$sample" trimReads/"$sample" metaspades/"$sample" mapped/"$sample".sam mapped/"$sample".sort.bam
+            coverage/"$sample".txt metabat2/"$sample" checkm/"$sample".checkm.txt checkm/"$sample".checkm
+            ref_checkm/"$sample"_refgenomes.checkm.txt ref_checkm/"$sample"_refgenomes.checkm
+            stats/"$sample".tsv ref_stats/"$sample"_refgenomes.tsv bins_all/"$sample" drep_genomes/"$sample"
+            drep_old/"$sample" gold_standard/"$sample".tsv
+            summaries/general_summary_"$sample".xlsx summaries/bin_summary_"$sample".xlsx)
+paths=()
+for candidate in "${candidates[@]}"; do
+    if [ -e "$candidate" ]; then
+        paths+=("$candidate")
+    fi
+done
+usage=0
+# du counts hardlinked files only once per invocation
+if [ ${#paths[@]} -gt 0 ]; then
+    usage=$(du -scb "${paths[@]}" | tail -n 1 | cut -f 1)
+fi
+printf "%s\t%s\t%s\n" "$step" "$(date +%s)" "$usage" > "$log_file"
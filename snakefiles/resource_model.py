@@ -0,0 +1,115 @@
+"""Predict memory and runtime of a community's steps from their resource usage in earlier runs."""
+
+import json
+import pathlib
+
+from argparse import ArgumentParser
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# sizes of a community known before it is simulated, as reported by resource_report.py
+FEATURES = ["genome_bp", "genome_count", "read_bases"]
+# Snakemake resource and how to get it from resource_report.py's columns
+RESOURCES = {"mem_mb": lambda usage: usage["max_rss_mb"],
+             "runtime": lambda usage: usage["wall_time_s"] / 60}
+MODELED_STEPS = ["metaspades", "metabat2"]
+
+
+def fit_linear(features: pd.DataFrame, observed: pd.Series) -> dict:
+    """Fit resource usage as a linear function of community size that never decreases with size.
+    Features whose coefficient would be negative are left out one at a time, smallest coefficient first.
+    Arguments:
+        features:   size of each community
+        observed:   resource usage for each community
+    Returns:
+        Intercept and coefficient of each feature used.
+    """
+    used_features = list(features.columns)
+    while True:
+        design = np.column_stack([np.ones(len(features))] + [features[feature].to_numpy(dtype=float)
+                                                              for feature in used_features])
+        solution = np.linalg.lstsq(design, observed.to_numpy(dtype=float), rcond=None)[0]
+        coefficients = dict(zip(used_features, solution[1:].tolist()))
+        negative = [feature for feature, coefficient in coefficients.items() if coefficient < 0]
+        if not negative:
+            return {"intercept": float(solution[0]), "coefficients": coefficients}
+        used_features.remove(min(negative, key=coefficients.get))
+
+
+def fit_resource_model(resource_usage: pd.DataFrame, steps: List[str] = MODELED_STEPS,
+                       min_observations: int = 5) -> Dict[str, Dict[str, dict]]:
+    """Fit memory and runtime of steps against community size.
+    Arguments:
+        resource_usage:     resource usage and community sizes as reported by resource_report.py, from any
+                            amount of runs
+        steps:              steps to fit models for
+        min_observations:   least amount of benchmarked jobs needed to fit a step's model
+    Returns:
+        For each step with enough observations, a linear model for each resource, along with the amount of
+        observations and the smallest value observed.
+    """
+    resource_model = {}
+    for step in steps:
+        step_usage = resource_usage.loc[resource_usage["step"] == step].dropna(subset=FEATURES)
+        for resource, get_usage in RESOURCES.items():
+            observed = get_usage(step_usage).dropna()
+            if len(observed) < min_observations:
+                continue
+            fit = fit_linear(step_usage.loc[observed.index, FEATURES], observed)
+            fit.update({"observations": len(observed), "min_observed": float(observed.min())})
+            resource_model.setdefault(step, {})[resource] = fit
+    return resource_model
+
+
+def load_resource_model(model_file: str) -> Dict[str, Dict[str, dict]]:
+    """Read a model written by this script; no model if no file is given."""
+    if not model_file:
+        return {}
+    with open(model_file, "r") as model:
+        return json.load(model)
+
+
+def predict_resource(resource_model: Dict[str, Dict[str, dict]], step: str, resource: str,
+                     community_size: Dict[str, float]) -> Optional[float]:
+    """Predict a step's resource usage for a community.
+    Arguments:
+        resource_model: model as returned by fit_resource_model
+        step:           name of the step
+        resource:       Snakemake resource to predict (mem_mb or runtime)
+        community_size: value of each feature for the community
+    Returns:
+        The predicted usage, at least the smallest usage observed; None if the step's resource was not modeled.
+    """
+    fit = resource_model.get(step, {}).get(resource)
+    if fit is None:
+        return None
+    prediction = fit["intercept"] + sum(coefficient * community_size[feature]
+                                        for feature, coefficient in fit["coefficients"].items())
+    return max(prediction, fit["min_observed"])
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Fit models of memory and runtime of assembly and binning against "
+                                        "community size from the resource reports of earlier runs.")
+    parser.add_argument("resource_reports", action="store", nargs="+",
+                        help="Resource reports (summaries/resource_usage.tsv) of earlier runs")
+    parser.add_argument("--min_observations", action="store", type=int, default=5,
+                        help="Least amount of benchmarked jobs needed to fit a step's model (default: 5)")
+    parser.add_argument("-o", "--outfile", action="store", default="resource_model.json",
+                        help="Name of JSON file to write the model to (default: resource_model.json)")
+    args = parser.parse_args()
+
+    all_usage = pd.concat([pd.read_csv(report, sep="\t") for report in args.resource_reports], ignore_index=True)
+    for feature in FEATURES:
+        # reports written before a feature was added
+        if feature not in all_usage.columns:
+            all_usage[feature] = np.nan
+    model = fit_resource_model(all_usage, min_observations=args.min_observations)
+    with open(args.outfile, "w") as model_out:
+        json.dump(model, model_out, indent=2)
+    for step_name in MODELED_STEPS:
+        if step_name not in model:
+            print("Not enough benchmarked jobs to model {}; its resources are estimated from community size."
+                  .format(step_name))
@@ -1,7 +1,27 @@
+import functools
+import math
 import pathlib
 
+from typing import Dict, Optional, Tuple
+
 import pandas as pd
 
+# metaSPAdes' memory limit used before memory was estimated from community size, in GB
+MAX_ASSEMBLY_MEM_GB = 120
+# records of a multi-FASTA or GenBank archive are given as ARCHIVE::RECORD_ID in the community file
+ARCHIVE_SEPARATOR = "::"
+
+
+def split_genome_reference(genome: str) -> Tuple[pathlib.Path, Optional[str]]:
+    """Split a genome given in the community file into its file and, for records of an archive, the record ID.
+    Arguments:
+        genome: path to a genome file, or ARCHIVE::RECORD_ID for a record of a multi-FASTA or GenBank archive
+    Returns:
+        The path to the file and the record ID, or None if the genome is a file of its own.
+    """
+    genome_file, separator, record_id = str(genome).partition(ARCHIVE_SEPARATOR)
+    return pathlib.Path(genome_file), record_id if separator else None
+
 # hacky helper function for identifying whether plasmids are present
 def check_plasmids(samples_file: pathlib.Path, sample: str) -> bool:
     """Identify whether a set of input sequences includes plasmids
@@ -17,4 +37,120 @@ def check_plasmids(samples_file: pathlib.Path, sample: str) -> bool:
     samples_table = samples_table.loc[samples_table[sample] != 0]
     # does the sequence type column contain plasmids?
     plasmid_check = samples_table["seq_type"].str.contains("plasmid")
-    return plasmid_check.any()
\ No newline at end of file
+    return plasmid_check.any()
+
+
+@functools.lru_cache(maxsize=None)
+def get_record_lengths(genome_file: pathlib.Path) -> Dict[str, int]:
+    """Get the length of each record in a GenBank or FASTA file from its LOCUS lines or by counting FASTA sequence
+    characters.
+    Arguments:
+        genome_file:    path to the GenBank or FASTA file
+    Returns:
+        The length of each record in bp by its ID (the accession and version of GenBank records, the first word of
+        the header of FASTA records); empty if the file does not exist (yet).
+    """
+    genome_file = pathlib.Path(genome_file)
+    if not genome_file.exists():
+        return {}
+    record_lengths = {}
+    record_id = ""
+    with open(genome_file, "r") as genome:
+        first_line = genome.readline()
+        genome.seek(0)
+        if first_line.startswith("LOCUS"):
+            for line in genome:
+                # LOCUS       LT598663             2888087 bp    DNA     linear   BCT 22-JUL-2016
+                if line.startswith("LOCUS"):
+                    record_id = line.split()[1]
+                    record_lengths[record_id] = int(line.split()[2])
+                # VERSION     LT598663.1
+                elif line.startswith("VERSION") and len(line.split()) > 1:
+                    record_lengths[line.split()[1]] = record_lengths.pop(record_id)
+                    record_id = line.split()[1]
+        else:
+            for line in genome:
+                if line.startswith(">"):
+                    record_id = line[1:].split()[0] if line[1:].strip() else ""
+                    record_lengths.setdefault(record_id, 0)
+                else:
+                    record_lengths[record_id] = record_lengths.get(record_id, 0) + len(line.strip())
+    return record_lengths
+
+
+def estimate_genome_length(genome_file: pathlib.Path) -> int:
+    """Get the length of a genome from its GenBank LOCUS lines or by counting FASTA sequence characters.
+    Arguments:
+        genome_file:    path to the GenBank or FASTA file, or ARCHIVE::RECORD_ID for a record of an archive
+    Returns:
+        The total length of all records in bp, or of the given record of an archive; 0 if the file does not exist
+        (yet).
+    """
+    genome_path, record_id = split_genome_reference(genome_file)
+    record_lengths = get_record_lengths(genome_path)
+    if record_id is not None:
+        return record_lengths.get(record_id, 0)
+    return sum(record_lengths.values())
+
+
+def get_community_size(samples_file: pathlib.Path, sample: str) -> Dict[str, int]:
+    """Get the amount of genomes and their total length in a community.
+    Arguments:
+        samples_file:   path to file listing sample compositions
+        sample:         name of the sample to examine
+    Returns:
+        The amount of genomes with non-zero abundance and their total length in bp.
+    """
+    samples_table = pd.read_csv(samples_file, sep="\t", index_col=False)
+    samples_table = samples_table.loc[samples_table[sample] != 0]
+    genome_files = samples_table.iloc[:, 0]
+    return {"genomes": len(genome_files),
+            "genome_bp": sum(estimate_genome_length(pathlib.Path(genome_file)) for genome_file in genome_files)}
+
+
+@functools.lru_cache(maxsize=None)
+def get_community_priorities(samples_file: pathlib.Path) -> Dict[str, int]:
+    """Rank communities by the work needed to assemble and bin them so the largest ones are scheduled first.
+    Arguments:
+        samples_file:   path to file listing sample compositions
+    Returns:
+        Priority of each community, from 0 for the smallest to one less than the amount of communities
+        for the largest; ties are broken by the amount of genomes.
+    """
+    samples = pd.read_csv(samples_file, sep="\t", index_col=False, nrows=0).columns[2:]
+    sizes = {sample: get_community_size(samples_file, sample) for sample in samples}
+    ranked = sorted(samples, key=lambda sample: (sizes[sample]["genome_bp"], sizes[sample]["genomes"]))
+    return {sample: rank for rank, sample in enumerate(ranked)}
+
+
+def estimate_assembly_mem_mb(genome_bp: int, read_gbp: float) -> int:
+    """Estimate metaSPAdes' peak memory from the size of the community and the amount of reads.
+    The de Bruijn graph grows with the genomes' length, read errors add k-mers in proportion to the reads.
+    Arguments:
+        genome_bp:  total length of the community's genomes in bp
+        read_gbp:   amount of simulated reads in Gbp
+    Returns:
+        Memory in MB, at least 8 GB and at most the limit metaSPAdes used to be run with.
+    """
+    mem_gb = 8 + 100 * genome_bp / 1e9 + 4 * read_gbp
+    return int(min(math.ceil(mem_gb), MAX_ASSEMBLY_MEM_GB) * 1024)
+
+
+def estimate_assembly_runtime(genome_bp: int, read_gbp: float) -> int:
+    """Estimate metaSPAdes' runtime in minutes from the size of the community and the amount of reads."""
+    return int(math.ceil(30 + 60 * read_gbp + 600 * genome_bp / 1e9))
+
+
+def estimate_checkm_runtime(genomes: int) -> int:
+    """Estimate CheckM's runtime in minutes from the amount of genomes (or bins) it places."""
+    return 30 + 2 * genomes
+
+
+def estimate_binning_mem_mb(genome_bp: int) -> int:
+    """Estimate MetaBAT2's peak memory in MB from the total length of the community's genomes."""
+    return int(math.ceil(2 + 10 * genome_bp / 1e9) * 1024)
+
+
+def estimate_binning_runtime(genome_bp: int) -> int:
+    """Estimate MetaBAT2's runtime in minutes from the total length of the community's genomes."""
+    return int(math.ceil(10 + 100 * genome_bp / 1e9))
@@ -0,0 +1,220 @@
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# make MAGICIAN's scripts importable the same way as in the tests
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import camisim_setup.extract_camisim_data as extract_cami
+import camisim_setup.generate_camisim_config as generate_config
+import generate_summary.extract_stats as extract_stats
+import generate_summary.make_comparison_table as comparison_table
+import synthetic_data
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines.json"
+SAMPLE = "benchmark_sample"
+# differences below these are measurement noise on small inputs, not regressions
+TIME_SLACK_S = 0.05
+MEMORY_SLACK_MB = 1
+# input sizes for each scale; "large" writes several gigabases to disk
+SCALES = {"small": {"genbank_count": 20, "genbank_length": 50_000,
+                    "fasta_count": 20, "fasta_length": 100_000,
+                    "genome_count": 50, "bin_count": 100},
+          "medium": {"genbank_count": 200, "genbank_length": 200_000,
+                     "fasta_count": 50, "fasta_length": 2_000_000,
+                     "genome_count": 1_000, "bin_count": 2_000},
+          "large": {"genbank_count": 1_000, "genbank_length": 1_000_000,
+                    "fasta_count": 500, "fasta_length": 5_000_000,
+                    "genome_count": 10_000, "bin_count": 20_000}}
+
+
+@contextlib.contextmanager
+def working_directory(path: Path):
+    """Temporarily change the working directory, for functions writing to the current directory."""
+    previous_dir = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous_dir)
+
+
+def prepare_inputs(scale: str, data_dir: Path) -> Dict[str, Path]:
+    """Generate synthetic inputs for all benchmarks at the given scale.
+    Arguments:
+        scale:      name of the scale (small, medium, large)
+        data_dir:   directory to write inputs to
+    Returns:
+        Paths to the generated inputs.
+    """
+    # identical inputs on every run keep results comparable to the baselines
+    random.seed(scale)
+    sizes = SCALES[scale]
+    genome_names = ["genome_{}.fa".format(genome_number) for genome_number in range(sizes["genome_count"])]
+    bin_names = synthetic_data.get_bin_names(SAMPLE, sizes["bin_count"])
+    inputs = {"community_file": synthetic_data.write_genbank_community(data_dir / "genbank",
+                                                                       sizes["genbank_count"],
+                                                                       sizes["genbank_length"], SAMPLE),
+              "id_to_genome": synthetic_data.write_fasta_set(data_dir / "fasta", sizes["fasta_count"],
+                                                             sizes["fasta_length"]),
+              "bb_stats": synthetic_data.write_statswrapper_table(data_dir / "bins_stats.tsv", bin_names),
+              "ref_stats": synthetic_data.write_statswrapper_table(data_dir / "ref_stats.tsv", genome_names),
+              "checkm": synthetic_data.write_checkm_table(data_dir / "checkm.tsv", bin_names + genome_names),
+              "ndb": synthetic_data.write_ndb(data_dir / "Ndb.csv", genome_names, bin_names),
+              "work_dir": data_dir / "work"}
+    inputs["work_dir"].mkdir(exist_ok=True)
+    # the general summary is built from the other inputs like extract_stats.py does
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        drep_stats = extract_stats.get_drep_stats(inputs["ndb"])
+    inputs["summary"] = synthetic_data.write_summary_workbook(data_dir / "summary.xlsx",
+                                                              extract_stats.get_bb_stats(inputs["bb_stats"]),
+                                                              extract_stats.get_bb_stats(inputs["ref_stats"]),
+                                                              extract_stats.get_checkm_stats(inputs["checkm"]),
+                                                              drep_stats)
+    return inputs
+
+
+def get_benchmarks(inputs: Dict[str, Path]) -> Dict[str, Callable]:
+    """Set up the functions to benchmark with their inputs.
+    Arguments:
+        inputs: Paths to the generated inputs
+    Returns:
+        A function without arguments for each benchmarked function.
+    """
+    def camisim_per_sample():
+        with working_directory(inputs["work_dir"]):
+            extract_cami.get_camisim_per_sample(inputs["community_file"], SAMPLE)
+
+    def drep_stats():
+        # get_drep_stats prints its result
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            extract_stats.get_drep_stats(inputs["ndb"])
+
+    return {"get_camisim_per_sample": camisim_per_sample,
+            "get_sample_size": lambda: generate_config.get_sample_size(inputs["id_to_genome"]),
+            "get_bb_stats": lambda: extract_stats.get_bb_stats(inputs["bb_stats"]),
+            "get_checkm_stats": lambda: extract_stats.get_checkm_stats(inputs["checkm"]),
+            "get_drep_stats": drep_stats,
+            "create_comparison_table": lambda: comparison_table.create_comparison_table(inputs["summary"])}
+
+
+def measure(benchmark: Callable, repeats: int) -> Dict[str, float]:
+    """Time a function and record its peak memory use. Timing and memory are measured in separate runs
+    since tracing allocations slows down the function.
+    Arguments:
+        benchmark:  function to measure
+        repeats:    amount of timed runs; the fastest is reported
+    Returns:
+        The fastest wall time in seconds and the peak of memory allocated by Python in MB.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        benchmark()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        benchmark()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_s": round(min(timings), 4), "peak_mb": round(peak / 1024 ** 2, 2)}
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]],
+                     time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """Compare benchmark results to stored baselines.
+    Arguments:
+        results:            time and peak memory for each benchmark
+        baselines:          stored time and peak memory for each benchmark at the same scale
+        time_tolerance:     fraction by which a benchmark may be slower than its baseline
+        memory_tolerance:   fraction by which a benchmark may use more memory than its baseline
+    Returns:
+        A description of each regression found; benchmarks without a baseline are skipped.
+    """
+    regressions = []
+    for benchmark, result in results.items():
+        if benchmark not in baselines:
+            continue
+        for metric, tolerance, slack in [("time_s", time_tolerance, TIME_SLACK_S),
+                                         ("peak_mb", memory_tolerance, MEMORY_SLACK_MB)]:
+            baseline = baselines[benchmark][metric]
+            if result[metric] > max(baseline * (1 + tolerance), baseline + slack):
+                regressions.append("{}: {} is {} (baseline {}, tolerance {:.0%})".format(benchmark, metric,
+                                                                                       result[metric], baseline,
+                                                                                       tolerance))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark MAGICIAN's Python stages on synthetic inputs and compare "
+                                        "the results to stored baselines.")
+    parser.add_argument("--scale", action="store", choices=list(SCALES), default="small",
+                        help="Size of the synthetic inputs (default: small)")
+    parser.add_argument("--benchmarks", action="store", nargs="+",
+                        help="Only run the given benchmarks (default: all)")
+    parser.add_argument("--repeats", action="store", type=int, default=3,
+                        help="Amount of timed runs per benchmark (default: 3)")
+    parser.add_argument("--data_dir", action="store",
+                        help="Directory to write synthetic inputs to (default: temporary directory)")
+    parser.add_argument("--baselines", action="store", default=str(BASELINE_FILE),
+                        help="JSON file with baselines (default: baselines.json next to this script)")
+    parser.add_argument("--update_baselines", action="store_true",
+                        help="Store the results as new baselines for this scale instead of comparing")
+    parser.add_argument("--time_tolerance", action="store", type=float, default=0.5,
+                        help="Fraction by which a benchmark may be slower than its baseline (default: 0.5)")
+    parser.add_argument("--memory_tolerance", action="store", type=float, default=0.2,
+                        help="Fraction by which a benchmark may use more memory than its baseline (default: 0.2)")
+    parser.add_argument("-o", "--outfile", action="store", help="JSON file to write results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(args.data_dir) if args.data_dir else Path(tmp_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        benchmarks = get_benchmarks(prepare_inputs(args.scale, data_dir.resolve()))
+        selected = args.benchmarks if args.benchmarks else list(benchmarks)
+        unknown = set(selected) - set(benchmarks)
+        if unknown:
+            parser.error("Unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+        results = {}
+        for name in selected:
+            results[name] = measure(benchmarks[name], args.repeats)
+            print("{}\t{}\t{:.4f} s\t{:.2f} MB".format(args.scale, name, results[name]["time_s"],
+                                                      results[name]["peak_mb"]))
+
+    if args.outfile:
+        with open(args.outfile, "w") as result_file:
+            json.dump({args.scale: results}, result_file, indent=2)
+
+    baseline_path = Path(args.baselines)
+    all_baselines = {}
+    if baseline_path.exists():
+        with open(baseline_path, "r") as baseline_file:
+            all_baselines = json.load(baseline_file)
+    if args.update_baselines:
+        all_baselines.setdefault(args.scale, {}).update(results)
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(all_baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print("Updated baselines for scale {} in {}".format(args.scale, baseline_path))
+    else:
+        regressions = find_regressions(results, all_baselines.get(args.scale, {}), args.time_tolerance,
+                                       args.memory_tolerance)
+        for regression in regressions:
+            print("REGRESSION: {}".format(regression), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,191 @@
+import random
+
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from Bio.Seq import Seq
+from Bio.SeqFeature import FeatureLocation, SeqFeature
+from Bio.SeqRecord import SeqRecord
+from Bio import SeqIO
+
+# map random bytes to nucleotides without going through Python-level loops
+NUCLEOTIDE_TABLE = bytes.maketrans(bytes(range(256)), b"ACGT" * 64)
+# write large sequences in blocks to keep memory use of the generators low
+BLOCK_SIZE = 10_000_000
+
+
+def random_sequence(length: int) -> str:
+    """Generate a random nucleotide sequence.
+    Arguments:
+        length: length of the sequence in bp
+    Returns:
+        A random sequence of A, C, G and T.
+    """
+    return random.randbytes(length).translate(NUCLEOTIDE_TABLE).decode("ascii")
+
+
+def write_fasta_set(out_dir: Path, genome_count: int, genome_length: int) -> Path:
+    """Write a set of single-record FASTA files and an id_to_genome file listing them.
+    Arguments:
+        out_dir:        directory to write genomes to
+        genome_count:   amount of genomes to write
+        genome_length:  length of each genome in bp
+    Returns:
+        The path to the id_to_genome file.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    id_file = Path(out_dir, "id_to_genome_file")
+    with open(id_file, "w") as id_to_genome:
+        for genome_number in range(genome_count):
+            fasta_path = Path(out_dir, "genome_{}.fa".format(genome_number)).resolve()
+            with open(fasta_path, "w") as fasta_file:
+                fasta_file.write(">genome_{}\n".format(genome_number))
+                for block_start in range(0, genome_length, BLOCK_SIZE):
+                    block = random_sequence(min(BLOCK_SIZE, genome_length - block_start))
+                    fasta_file.write("\n".join(block[i:i + 80] for i in range(0, len(block), 80)) + "\n")
+            id_to_genome.write("genome_{}\t{}\n".format(genome_number, fasta_path))
+    return id_file
+
+
+def write_genbank_community(out_dir: Path, genome_count: int, genome_length: int, sample: str) -> Path:
+    """Write a set of GenBank files and a community file giving their abundances in one community.
+    Arguments:
+        out_dir:        directory to write GenBank files to
+        genome_count:   amount of GenBank files to write
+        genome_length:  length of each record in bp
+        sample:         name of the community column
+    Returns:
+        The path to the community file.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    genbank_files = []
+    for genome_number in range(genome_count):
+        record = SeqRecord(Seq(random_sequence(genome_length)), id="NZ_SYN{:06d}.1".format(genome_number),
+                           name="NZ_SYN{:06d}".format(genome_number),
+                           description="Synthetic bacterium strain syn{} chromosome".format(genome_number),
+                           annotations={"molecule_type": "DNA", "source": "Synthetic bacterium",
+                                        "organism": "Synthetic bacterium"})
+        record.features.append(SeqFeature(FeatureLocation(0, genome_length), type="source",
+                                          qualifiers={"organism": ["Synthetic bacterium"],
+                                                      "strain": ["syn{}".format(genome_number)],
+                                                      "db_xref": ["taxon:{}".format(1000 + genome_number)]}))
+        genbank_path = Path(out_dir, "NZ_SYN{:06d}.gbk".format(genome_number)).resolve()
+        SeqIO.write(record, genbank_path, "genbank")
+        genbank_files.append(str(genbank_path))
+    community_file = Path(out_dir, "community.tsv")
+    abundances = [round(random.uniform(0.1, 10), 2) for _ in genbank_files]
+    pd.DataFrame({"genomes": genbank_files, sample: abundances}).to_csv(community_file, sep="\t", index=False)
+    return community_file
+
+
+def get_bin_names(sample: str, bin_count: int) -> List[str]:
+    """Name bins the way MetaBAT2 does.
+    Arguments:
+        sample:     name of the community
+        bin_count:  amount of bins
+    Returns:
+        The file names of all bins.
+    """
+    return ["{}.bin.{}.fa".format(sample, bin_number) for bin_number in range(1, bin_count + 1)]
+
+
+def write_statswrapper_table(out_file: Path, genome_names: List[str]) -> Path:
+    """Write a table in the format of BBTools's statswrapper.sh.
+    Arguments:
+        out_file:       Path to write the table to
+        genome_names:   file names of the genomes or bins in the table
+    Returns:
+        The path to the table.
+    """
+    row_count = len(genome_names)
+    scaf_bp = [random.randint(500_000, 10_000_000) for _ in range(row_count)]
+    n_scaffolds = [random.randint(1, 500) for _ in range(row_count)]
+    stats = pd.DataFrame({"n_scaffolds": n_scaffolds, "n_contigs": [n + random.randint(0, 20) for n in n_scaffolds],
+                          "scaf_bp": scaf_bp, "contig_bp": scaf_bp, "gap_pct": 0,
+                          "scaf_N50": [random.randint(1, n) for n in n_scaffolds],
+                          "scaf_L50": [bp // n for bp, n in zip(scaf_bp, n_scaffolds)],
+                          "ctg_N50": 1, "ctg_L50": 1, "scaf_N90": 1, "scaf_L90": 1, "ctg_N90": 1, "ctg_L90": 1,
+                          "scaf_max": scaf_bp, "ctg_max": scaf_bp, "scaf_n_gt50K": 1, "scaf_pct_gt50K": 100,
+                          "gc_avg": [round(random.uniform(0.25, 0.75), 5) for _ in range(row_count)],
+                          "gc_std": 0.03,
+                          "filename": ["/synthetic/{}".format(name) for name in genome_names]})
+    stats.to_csv(out_file, sep="\t", index=False)
+    return Path(out_file)
+
+
+def write_checkm_table(out_file: Path, genome_names: List[str]) -> Path:
+    """Write a table in the format of CheckM's tab-separated quality assessment.
+    Arguments:
+        out_file:       Path to write the table to
+        genome_names:   file names of the genomes or bins in the table
+    Returns:
+        The path to the table.
+    """
+    row_count = len(genome_names)
+    checkm = pd.DataFrame({"Bin Id": [name.replace(".fa", "") for name in genome_names],
+                           "Marker lineage": "f__Enterobacteriaceae (UID5124)", "# genomes": 134,
+                           "# markers": 1173, "# marker sets": 336, "0": 79, "1": 1068, "2": 26, "3": 0, "4": 0,
+                           "5": 0,
+                           "Completeness": [round(random.uniform(10, 100), 2) for _ in range(row_count)],
+                           "Contamination": [round(random.uniform(0, 20), 2) for _ in range(row_count)],
+                           "Strain heterogeneity": [round(random.uniform(0, 100), 2) for _ in range(row_count)]})
+    checkm.to_csv(out_file, sep="\t", index=False)
+    return Path(out_file)
+
+
+def write_ndb(out_file: Path, genome_names: List[str], bin_names: List[str]) -> Path:
+    """Write a table in the format of dRep's Ndb.csv. Each genome is clustered with one bin, surplus bins
+    form singleton clusters.
+    Arguments:
+        out_file:       Path to write the table to
+        genome_names:   file names of the source genomes
+        bin_names:      file names of the bins
+    Returns:
+        The path to the table.
+    """
+    rows = []
+    for cluster, genome_name in enumerate(genome_names, 1):
+        cluster_members = [genome_name]
+        if cluster <= len(bin_names):
+            cluster_members.append(bin_names[cluster - 1])
+        for query in cluster_members:
+            for reference in cluster_members:
+                coverage = 1.0 if query == reference else round(random.uniform(0.5, 1), 6)
+                ani = 1.0 if query == reference else round(random.uniform(0.95, 1), 6)
+                rows.append([query, reference, 1000000, 0, coverage, coverage, ani, 1000000, 1000000, coverage,
+                             cluster])
+    for cluster, bin_name in enumerate(bin_names[len(genome_names):], len(genome_names) + 1):
+        rows.append([bin_name, bin_name, 1000000, 0, 1.0, 1.0, 1.0, 1000000, 1000000, 1.0, cluster])
+    pd.DataFrame(rows, columns=["querry", "reference", "alignment_length", "similarity_errors", "ref_coverage",
+                                "querry_coverage", "ani", "reference_length", "querry_length",
+                                "alignment_coverage", "primary_cluster"]).to_csv(out_file, index=False)
+    return Path(out_file)
+
+
+def write_summary_workbook(out_file: Path, bb_stats: pd.DataFrame, reference_stats: pd.DataFrame,
+                           checkm_stats: pd.DataFrame, drep_stats: pd.DataFrame) -> Path:
+    """Write a general summary in the format written by extract_stats.py with dRep evaluation.
+    Arguments:
+        out_file:           Path to write the workbook to
+        bb_stats:           statistics of bins as returned by get_bb_stats
+        reference_stats:    statistics of source genomes as returned by get_bb_stats
+        checkm_stats:       CheckM results for bins and source genomes as returned by get_checkm_stats
+        drep_stats:         dRep results as returned by get_drep_stats
+    Returns:
+        The path to the workbook.
+    """
+    bb_stats = pd.merge(bb_stats, drep_stats.drop_duplicates(subset=["reference"]), how="left",
+                        left_on="bin_name", right_on="reference")
+    reference_stats = pd.merge(reference_stats, drep_stats.drop_duplicates(subset=["query"]), how="left",
+                               left_on="bin_name", right_on="query")
+    columns = ["bin_name", "scaf_bp", "gc_avg", "n_scaffolds", "n_contigs", "scaffold_L50", "scaffold_N50",
+               "primary_cluster"]
+    bb_stats = bb_stats[columns].assign(genome_type="synthetic_MAG")
+    reference_stats = reference_stats[columns].assign(genome_type="reference")
+    with pd.ExcelWriter(out_file) as writer:
+        pd.concat([bb_stats, reference_stats], ignore_index=True).to_excel(writer, sheet_name="BB_stats")
+        checkm_stats.to_excel(writer, sheet_name="CheckM")
+        drep_stats.to_excel(writer, sheet_name="dRep")
+    return Path(out_file)
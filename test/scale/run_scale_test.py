@@ -0,0 +1,194 @@
+import io
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmark"))
+
+import synthetic_data
+
+MAGICIAN_DIR = Path(__file__).resolve().parents[2]
+STUB_SCRIPT = Path(__file__).resolve().parent / "stub_tools.py"
+STUB_NAMES = ["python2", "samtools", "fastqc", "bbduk.sh", "metaspades.py", "rename.sh", "bbmap.sh",
+              "jgi_summarize_bam_contig_depths", "metabat", "statswrapper.sh", "checkm", "dRep", "pigz",
+              "bgzip", "minimap2", "strobealign"]
+# taxonomy for genomes read from FASTA files, which MAGICIAN assigns to Bacteria (taxid 2)
+TAXDUMP = {"nodes.dmp": "1\t|\t1\t|\tno rank\t|\n2\t|\t1\t|\tsuperkingdom\t|\n",
+           "names.dmp": "1\t|\troot\t|\t\t|\tscientific name\t|\n2\t|\tBacteria\t|\t\t|\tscientific name\t|\n",
+           "merged.dmp": ""}
+
+
+def write_stub_wrapper(wrapper_path: Path, tool: str) -> None:
+    """Write an executable calling the stub for a tool.
+    Wrappers are used instead of links since some steps resolve the path to the tool they call.
+    Arguments:
+        wrapper_path:   Path to write the wrapper to
+        tool:           name of the tool to stand in for
+    """
+    wrapper_path.write_text('#!/usr/bin/env bash\nexec "{}" "{}" {} "$@"\n'.format(sys.executable, STUB_SCRIPT,
+                                                                                   tool))
+    wrapper_path.chmod(0o755)
+
+
+def install_stub_tools(bin_dir: Path) -> None:
+    """Make the stub tools callable under the names of the tools they stand in for.
+    Arguments:
+        bin_dir:    directory to put on the PATH
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for stub_name in STUB_NAMES:
+        write_stub_wrapper(bin_dir / stub_name, stub_name)
+
+
+def make_fake_camisim(camisim_dir: Path) -> None:
+    """Create a directory with the files MAGICIAN expects in a CAMISIM installation.
+    Arguments:
+        camisim_dir:    directory to create
+    """
+    art_dir = camisim_dir / "tools" / "art_illumina-2.3.6"
+    (art_dir / "profiles").mkdir(parents=True, exist_ok=True)
+    (camisim_dir / "metagenomesimulation.py").touch()
+    write_stub_wrapper(art_dir / "art_illumina", "art_illumina")
+    with tarfile.open(camisim_dir / "tools" / "ncbi-taxonomy_20170222.tar.gz", "w:gz") as taxdump:
+        for dump_name, dump_content in TAXDUMP.items():
+            dump_info = tarfile.TarInfo("ncbi-taxonomy_20170222/{}".format(dump_name))
+            dump_info.size = len(dump_content.encode("utf-8"))
+            taxdump.addfile(dump_info, io.BytesIO(dump_content.encode("utf-8")))
+
+
+def write_community_table(out_file: Path, genome_file: Path, community_count: int,
+                          genomes_per_community: int) -> Path:
+    """Write a MAGICIAN input table with the given amount of communities, each drawing a random
+    subset of the genomes.
+    Arguments:
+        out_file:               Path to write the table to
+        genome_file:            id_to_genome file listing the genomes to choose from
+        community_count:        amount of communities (columns) in the table
+        genomes_per_community:  amount of genomes with nonzero abundance in each community
+    Returns:
+        The path to the table.
+    """
+    genome_paths = pd.read_csv(genome_file, sep="\t", header=None, names=["genome_id", "genomes"])["genomes"]
+    communities = {"genomes": genome_paths, "seq_type": "chromosome"}
+    for community_number in range(community_count):
+        chosen = set(random.sample(range(len(genome_paths)), min(genomes_per_community, len(genome_paths))))
+        communities["community_{}".format(community_number)] = [random.randint(1, 10) if genome in chosen else 0
+                                                                for genome in range(len(genome_paths))]
+    pd.DataFrame(communities).to_csv(out_file, sep="\t", index=False)
+    return Path(out_file)
+
+
+def run_magician(community_file: Path, run_dir: Path, config_file: Path, env: Dict[str, str], cores: int,
+                 snake_flags: List[str], simulator: str, evaluation: str) -> float:
+    """Run MAGICIAN with tools taken from the PATH and time it.
+    Arguments:
+        community_file: Path to the input table
+        run_dir:        directory to run in; MAGICIAN's output is logged to magician.log here
+        config_file:    Path to the config file pointing to the fake CAMISIM installation
+        env:            environment with the stub tools on the PATH
+        cores:          amount of cores for Snakemake
+        snake_flags:    additional flags for Snakemake
+        simulator:      read simulation engine to use
+        evaluation:     how to match bins to source genomes
+    Returns:
+        The wall time of the run in seconds.
+    """
+    magician_cmd = [sys.executable, str(MAGICIAN_DIR / "run_magician.py"), str(community_file),
+                    "--config_file", str(config_file), "--cores", str(cores), "--no_conda",
+                    "--simulator", simulator, "--evaluation", evaluation,
+                    # a single flag would be taken for an option of run_magician.py without "="
+                    "--snake_flags={}".format(" ".join(["--quiet", *snake_flags]))]
+    start = time.perf_counter()
+    with open(run_dir / "magician.log", "a") as magician_log:
+        subprocess.run(magician_cmd, cwd=run_dir, env=env, check=True, stdout=magician_log, stderr=magician_log)
+    return time.perf_counter() - start
+
+
+def run_scale_test(widths: List[int], work_dir: Path, genome_count: int, genome_length: int,
+                   genomes_per_community: int, cores: int, simulator: str, evaluation: str,
+                   dry_run_only: bool) -> pd.DataFrame:
+    """Time MAGICIAN's dry run and full run with stub tools on community tables of increasing width.
+    Arguments:
+        widths:                 amounts of communities to test
+        work_dir:               directory to write inputs and runs to
+        genome_count:           amount of synthetic genomes to choose from
+        genome_length:          length of each synthetic genome in bp
+        genomes_per_community:  amount of genomes in each community
+        cores:                  amount of cores for Snakemake
+        simulator:              read simulation engine to use
+        evaluation:             how to match bins to source genomes
+        dry_run_only:           only time building the DAG, without running any jobs
+    Returns:
+        Wall time of dry run and full run for each width, overall and per community.
+    """
+    random.seed(0)
+    genome_file = synthetic_data.write_fasta_set(work_dir / "genomes", genome_count, genome_length)
+    camisim_dir = work_dir / "fake_camisim"
+    make_fake_camisim(camisim_dir)
+    install_stub_tools(work_dir / "stub_bin")
+    config_file = work_dir / "scale_config.yml"
+    with open(config_file, "w") as config:
+        yaml.safe_dump({"camisim_path": str(camisim_dir), "conda_frontend": "conda"}, config)
+    env = dict(os.environ, PATH="{}{}{}".format(work_dir / "stub_bin", os.pathsep, os.environ["PATH"]))
+
+    timings = []
+    for width in widths:
+        run_dir = work_dir / "width_{}".format(width)
+        run_dir.mkdir(exist_ok=True)
+        community_file = write_community_table(run_dir / "communities.tsv", genome_file, width,
+                                               genomes_per_community)
+        dry_run_s = run_magician(community_file, run_dir, config_file, env, cores, ["-n"], simulator, evaluation)
+        run_s = float("nan")
+        if not dry_run_only:
+            run_s = run_magician(community_file, run_dir, config_file, env, cores, [], simulator, evaluation)
+        timings.append({"communities": width, "dry_run_s": round(dry_run_s, 2), "run_s": round(run_s, 2),
+                        "dry_run_s_per_community": round(dry_run_s / width, 4),
+                        "run_s_per_community": round(run_s / width, 4)})
+        print("{} communities: dry run {:.2f} s, run {:.2f} s".format(width, dry_run_s, run_s))
+    return pd.DataFrame(timings)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Run MAGICIAN end to end with stub tools on synthetic community tables "
+                                        "to measure the overhead of MAGICIAN itself as the amount of "
+                                        "communities grows.")
+    parser.add_argument("--widths", action="store", nargs="+", type=int, default=[1, 10, 100],
+                        help="Amounts of communities to test (default: 1 10 100)")
+    parser.add_argument("--genomes", action="store", type=int, default=20,
+                        help="Amount of synthetic genomes to draw communities from (default: 20)")
+    parser.add_argument("--genome_length", action="store", type=int, default=20000,
+                        help="Length of each synthetic genome in bp (default: 20000)")
+    parser.add_argument("--genomes_per_community", action="store", type=int, default=4,
+                        help="Amount of genomes in each community (default: 4)")
+    parser.add_argument("--cores", action="store", type=int, default=4,
+                        help="Amount of cores Snakemake should use (default: 4)")
+    parser.add_argument("--simulator", action="store", choices=["camisim", "art"], default="camisim",
+                        help="Read simulation engine (default: camisim)")
+    parser.add_argument("--evaluation", action="store", choices=["drep", "gold_standard"], default="drep",
+                        help="How to match bins to source genomes (default: drep)")
+    parser.add_argument("--dry_run_only", action="store_true",
+                        help="Only time building the workflow, without running any jobs")
+    parser.add_argument("--work_dir", action="store",
+                        help="Directory to run in (default: temporary directory, removed afterwards)")
+    parser.add_argument("-o", "--outfile", action="store", default="scale_test.tsv",
+                        help="Name of tab-separated file to write timings to (default: scale_test.tsv)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(args.work_dir) if args.work_dir else Path(tmp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        scale_timings = run_scale_test(sorted(args.widths), work_dir.resolve(), args.genomes, args.genome_length,
+                                       args.genomes_per_community, args.cores, args.simulator, args.evaluation,
+                                       args.dry_run_only)
+    scale_timings.to_csv(args.outfile, sep="\t", index=False)
@@ -0,0 +1,326 @@
+"""Lightweight stand-ins for the external tools called by MAGICIAN's Snakefile.
+The tool to imitate is given as the first argument (e.g. "stub_tools.py metabat -i ...").
+Each stub writes outputs in the format MAGICIAN's rules and scripts expect, from small inputs and in
+very little time; the contents are not meaningful.
+"""
+import configparser
+import gzip
+import shutil
+import sys
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from Bio import SeqIO
+
+READ_LENGTH = 150
+# read pairs written per genome, regardless of the sample size requested
+READS_PER_GENOME = 60
+# consecutive reads pooled into one contig by the assembler stub; yields contigs above 1000 bp
+READS_PER_CONTIG = 10
+CONTIGS_PER_BIN = 3
+
+
+def get_key_values(args: List[str]) -> Dict[str, str]:
+    """Parse BBTools-style key=value arguments."""
+    return dict(arg.split("=", 1) for arg in args if "=" in arg)
+
+
+def get_option(args: List[str], option: str, default: str = "") -> str:
+    """Get the value following an option, e.g. "-o out"."""
+    if option in args:
+        return args[args.index(option) + 1]
+    return default
+
+
+def read_fastq(fastq_file: Path) -> Iterator[Tuple[str, str]]:
+    """Yield name and sequence of all reads in a (gzipped) FASTQ file."""
+    opener = gzip.open if str(fastq_file).endswith(".gz") else open
+    with opener(fastq_file, "rt") as fastq:
+        for line_number, line in enumerate(fastq):
+            if line_number % 4 == 0:
+                name = line[1:].strip()
+            elif line_number % 4 == 1:
+                yield name, line.strip()
+
+
+def write_reads(fasta_path: Path, out_prefix: str, read_pairs: int) -> None:
+    """Write read pairs taken from evenly spaced positions of each genome, named like ART's reads."""
+    with open("{}1.fq".format(out_prefix), "w") as mate_1, open("{}2.fq".format(out_prefix), "w") as mate_2:
+        for record in SeqIO.parse(fasta_path, "fasta"):
+            sequence = str(record.seq)
+            step = max(1, (len(sequence) - READ_LENGTH) // read_pairs)
+            for read_number in range(read_pairs):
+                start = (read_number * step) % max(1, len(sequence) - READ_LENGTH)
+                read = sequence[start:start + READ_LENGTH]
+                for mate, mate_file in [("1", mate_1), ("2", mate_2)]:
+                    mate_file.write("@{}-{}/{}\n{}\n+\n{}\n".format(record.id, read_number, mate, read,
+                                                                   "I" * len(read)))
+
+
+def gzip_file(raw_file: str) -> None:
+    """Compress a file and remove the uncompressed copy."""
+    with open(raw_file, "rb") as file_in, gzip.open("{}.gz".format(raw_file), "wb", compresslevel=1) as file_out:
+        shutil.copyfileobj(file_in, file_out)
+    Path(raw_file).unlink()
+
+
+def camisim(args: List[str]) -> None:
+    """python2 metagenomesimulation.py CONFIG: write one read pair file per genome, gzipped unless compress=0."""
+    if not args or not args[0].endswith("metagenomesimulation.py"):
+        raise SystemExit("python2 stub only runs CAMISIM's metagenomesimulation.py")
+    config = configparser.ConfigParser()
+    config.read(args[1])
+    output_dir = Path(config["Main"]["output_directory"])
+    reads_dir = output_dir / "2000.01.01_00.00.00_sample_0" / "reads"
+    reads_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "internal").mkdir(exist_ok=True)
+    with open(config["community0"]["id_to_genome_file"], "r") as id_file:
+        for line in id_file:
+            if line.strip():
+                genome_id, fasta_path = line.strip().split("\t")[:2]
+                write_reads(Path(fasta_path), str(reads_dir / genome_id), READS_PER_GENOME)
+                if config["Main"].get("compress", "1") != "0":
+                    gzip_file(str(reads_dir / "{}1.fq".format(genome_id)))
+                    gzip_file(str(reads_dir / "{}2.fq".format(genome_id)))
+
+
+def art_illumina(args: List[str]) -> None:
+    """art_illumina -i FASTA -o PREFIX ...: write uncompressed read pairs."""
+    write_reads(Path(get_option(args, "-i")), get_option(args, "-o"), READS_PER_GENOME)
+
+
+def samtools(args: List[str]) -> None:
+    """samtools view/sort: pass the mapping through unchanged."""
+    if args[0] == "view":
+        with open(args[-1], "r") as sam:
+            shutil.copyfileobj(sam, sys.stdout)
+    else:
+        shutil.copyfileobj(sys.stdin, sys.stdout)
+
+
+def fastqc(args: List[str]) -> None:
+    """fastqc -o DIR READS...: write one report per read file."""
+    out_dir = Path(get_option(args, "-o"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for read_file in args[2:]:
+        report_name = Path(read_file).name
+        for extension in [".gz", ".fq", ".fastq"]:
+            report_name = report_name[:-len(extension)] if report_name.endswith(extension) else report_name
+        Path(out_dir, "{}_fastqc.html".format(report_name)).write_text("<html></html>\n")
+
+
+def bbduk(args: List[str]) -> None:
+    """bbduk.sh in= in2= out= out2= outs=: copy reads untrimmed, (de)compressing by extension, and report the input
+    size."""
+    options = get_key_values(args)
+    read_count = 0
+    base_count = 0
+    for in_key, out_key in [("in", "out"), ("in2", "out2")]:
+        for _, sequence in read_fastq(Path(options[in_key])):
+            read_count += 1
+            base_count += len(sequence)
+        Path(options[out_key]).parent.mkdir(parents=True, exist_ok=True)
+        in_opener = gzip.open if options[in_key].endswith(".gz") else open
+        out_opener = gzip.open if options[out_key].endswith(".gz") else open
+        with in_opener(options[in_key], "rb") as reads_in, out_opener(options[out_key], "wb") as reads_out:
+            shutil.copyfileobj(reads_in, reads_out)
+    with (gzip.open if options["outs"].endswith(".gz") else open)(options["outs"], "wt"):
+        pass
+    sys.stderr.write("Input:                  \t{} reads \t\t{} bases.\n".format(read_count, base_count))
+
+
+def metaspades(args: List[str]) -> None:
+    """metaspades.py -1 R1 -o DIR: pool consecutive forward reads into contigs."""
+    out_dir = Path(get_option(args, "-o"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    contigs = []
+    current_contig = ""
+    for read_number, (_, sequence) in enumerate(read_fastq(Path(get_option(args, "-1"))), 1):
+        current_contig += sequence
+        if read_number % READS_PER_CONTIG == 0:
+            contigs.append(current_contig)
+            current_contig = ""
+    if current_contig:
+        contigs.append(current_contig)
+    with open(out_dir / "scaffolds.fasta", "w") as scaffolds:
+        for contig_number, contig in enumerate(contigs, 1):
+            scaffolds.write(">NODE_{}_length_{}_cov_1.0\n{}\n".format(contig_number, len(contig), contig))
+    shutil.copyfile(out_dir / "scaffolds.fasta", out_dir / "contigs.fasta")
+
+
+def rename(args: List[str]) -> None:
+    """rename.sh in= out= prefix= minscaf=: drop short scaffolds and prefix their names."""
+    options = get_key_values(args)
+    min_length = int(options.get("minscaf", 0))
+    with open(options["out"], "w") as renamed:
+        for record in SeqIO.parse(options["in"], "fasta"):
+            if len(record) >= min_length:
+                renamed.write(">{}_{}\n{}\n".format(options["prefix"], record.id, record.seq))
+
+
+def write_mapping(contig_file: Path, reads_file: Path, sam) -> None:
+    """Map forward reads to the contig the assembler stub built from them and write them to an open SAM file."""
+    contigs = [(record.id, len(record)) for record in SeqIO.parse(contig_file, "fasta")]
+    sam.write("@HD\tVN:1.4\tSO:unsorted\n")
+    sam.writelines("@SQ\tSN:{}\tLN:{}\n".format(name, length) for name, length in contigs)
+    for read_number, (read_name, sequence) in enumerate(read_fastq(reads_file)):
+        contig_index = read_number // READS_PER_CONTIG
+        # reads of scaffolds dropped for being too short stay unmapped
+        if contig_index >= len(contigs):
+            continue
+        position = (read_number % READS_PER_CONTIG) * READ_LENGTH + 1
+        sam.write("{}\t0\t{}\t{}\t60\t{}M\t*\t0\t0\t{}\t{}\n".format(read_name.split("/")[0],
+                                                                   contigs[contig_index][0], position,
+                                                                   len(sequence), sequence, "I" * len(sequence)))
+
+
+def bbmap(args: List[str]) -> None:
+    """bbmap.sh in= ref= outm=: map reads to the contig the assembler stub built from them."""
+    options = get_key_values(args)
+    with open(options["outm"], "w") as sam:
+        write_mapping(Path(options["ref"]), Path(options["in"]), sam)
+
+
+def minimap2(args: List[str]) -> None:
+    """minimap2 -ax sr ... REF R1 R2 / strobealign ... REF R1 R2: map reads like the BBMap stub, writing to stdout."""
+    write_mapping(Path(args[-3]), Path(args[-2]), sys.stdout)
+
+
+def jgi_summarize_bam_contig_depths(args: List[str]) -> None:
+    """jgi_summarize_bam_contig_depths BAM --outputDepth DEPTH: count reads per contig."""
+    mapping = args[0]
+    contig_lengths = {}
+    read_counts = {}
+    with open(mapping, "r") as sam:
+        for line in sam:
+            fields = line.split("\t")
+            if line.startswith("@SQ"):
+                contig_lengths[fields[1][3:]] = int(fields[2].strip()[3:])
+            elif not line.startswith("@"):
+                read_counts[fields[2]] = read_counts.get(fields[2], 0) + 1
+    with open(get_option(args, "--outputDepth"), "w") as depth_file:
+        depth_file.write("contigName\tcontigLen\ttotalAvgDepth\t{0}\t{0}-var\n".format(mapping))
+        for contig, length in contig_lengths.items():
+            depth = read_counts.get(contig, 0) * READ_LENGTH / length
+            depth_file.write("{}\t{}\t{:.4f}\t{:.4f}\t0\n".format(contig, length, depth, depth))
+
+
+def metabat(args: List[str]) -> None:
+    """metabat -i ASSEMBLY -o PREFIX --saveCls: bin consecutive contigs together."""
+    out_prefix = get_option(args, "-o")
+    Path(out_prefix).parent.mkdir(parents=True, exist_ok=True)
+    records = list(SeqIO.parse(get_option(args, "-i"), "fasta"))
+    with open(out_prefix, "w") as cluster_file:
+        for bin_number, bin_start in enumerate(range(0, len(records), CONTIGS_PER_BIN), 1):
+            bin_records = records[bin_start:bin_start + CONTIGS_PER_BIN]
+            SeqIO.write(bin_records, "{}.{}.fa".format(out_prefix, bin_number), "fasta")
+            cluster_file.writelines("{}\t{}\n".format(record.id, bin_number) for record in bin_records)
+
+
+def statswrapper(args: List[str]) -> None:
+    """statswrapper.sh FASTA...: write assembly statistics for each file."""
+    header = ["n_scaffolds", "n_contigs", "scaf_bp", "contig_bp", "gap_pct", "scaf_N50", "scaf_L50", "ctg_N50",
+              "ctg_L50", "scaf_N90", "scaf_L90", "ctg_N90", "ctg_L90", "scaf_max", "ctg_max", "scaf_n_gt50K",
+              "scaf_pct_gt50K", "gc_avg", "gc_std", "filename"]
+    sys.stdout.write("\t".join(header) + "\n")
+    for fasta_path in args:
+        lengths = []
+        gc_count = 0
+        for record in SeqIO.parse(fasta_path, "fasta"):
+            lengths.append(len(record))
+            gc_count += record.seq.count("G") + record.seq.count("C")
+        total = sum(lengths)
+        lengths.sort(reverse=True)
+        # BBTools swaps N50 and L50: scaf_N50 holds the count, scaf_L50 the length
+        covered = 0
+        n50_count, l50_length = 0, 0
+        for n50_count, l50_length in enumerate(lengths, 1):
+            covered += l50_length
+            if covered * 2 >= total:
+                break
+        stats = [len(lengths), len(lengths), total, total, 0, n50_count, l50_length, n50_count, l50_length,
+                 len(lengths), lengths[-1], len(lengths), lengths[-1], lengths[0], lengths[0],
+                 sum(1 for length in lengths if length > 50000), 0, round(gc_count / total, 5), 0,
+                 str(Path(fasta_path).resolve())]
+        sys.stdout.write("\t".join(str(stat) for stat in stats) + "\n")
+
+
+def checkm(args: List[str]) -> None:
+    """checkm lineage_wf|taxonomy_wf [RANK TAXON] -f TABLE -x EXT IN_DIR OUT_DIR: write a quality table for each
+    genome; checkm taxon_list: list the taxa with marker sets."""
+    if args[0] == "taxon_list":
+        print("  Rank      Taxon               # genomes   # marker genes   # marker sets\n"
+              "  ------------------------------------------------------------------------\n"
+              "  life      Prokaryote          5656        88               73\n"
+              "  domain    Archaea             207         145              103\n"
+              "  domain    Bacteria            5449        104              58")
+        return
+    extension = get_option(args, "-x")
+    in_dir, out_dir = Path(args[-2]), Path(args[-1])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "lineage.ms").write_text("stub\n")
+    genomes = sorted(in_dir.glob("*.{}".format(extension)))
+    with open(get_option(args, "-f"), "w") as checkm_table:
+        checkm_table.write("Bin Id\tMarker lineage\t# genomes\t# markers\t# marker sets\t0\t1\t2\t3\t4\t5+\t"
+                           "Completeness\tContamination\tStrain heterogeneity\n")
+        for genome_number, genome in enumerate(genomes):
+            completeness = 50 + (genome_number * 7) % 50
+            checkm_table.write("{}\tk__Bacteria (UID203)\t5449\t104\t58\t{}\t{}\t0\t0\t0\t0\t{:.2f}\t0.00\t0.00\n"
+                               .format(genome.name[:-len(extension) - 1], 104 - completeness, completeness,
+                                       completeness))
+
+
+def drep(args: List[str]) -> None:
+    """dRep compare OUT_DIR [--skip_plots] -g GENOMES...: cluster each bin with one source genome."""
+    out_dir = Path(args[1])
+    genomes = [Path(genome).name for genome in args[args.index("-g") + 1:]]
+    (out_dir / "data_tables").mkdir(parents=True, exist_ok=True)
+    if "--skip_plots" not in args:
+        (out_dir / "figures").mkdir(parents=True, exist_ok=True)
+        (out_dir / "figures" / "Secondary_clustering_dendrograms.pdf").write_bytes(b"%PDF-1.4\n")
+    bins = sorted(genome for genome in genomes if ".bin." in genome)
+    references = sorted(genome for genome in genomes if ".bin." not in genome)
+    clusters = {reference: [reference] for reference in references}
+    for bin_number, bin_name in enumerate(bins):
+        if references:
+            clusters[references[bin_number % len(references)]].append(bin_name)
+        else:
+            clusters[bin_name] = [bin_name]
+    with open(out_dir / "data_tables" / "Ndb.csv", "w") as ndb:
+        ndb.write("querry,reference,alignment_length,similarity_errors,ref_coverage,querry_coverage,ani,"
+                  "reference_length,querry_length,alignment_coverage,primary_cluster\n")
+        for cluster_number, members in enumerate(clusters.values(), 1):
+            for query in members:
+                for reference in members:
+                    identity = 1 if query == reference else 0.99
+                    ndb.write("{},{},1000,0,{},{},{},1000,1000,{},{}\n".format(query, reference, identity,
+                                                                            identity, identity, identity,
+                                                                            cluster_number))
+
+
+def pigz(args: List[str]) -> None:
+    """pigz FILES...: compress files in place."""
+    for file_name in args:
+        if not file_name.startswith("-") and Path(file_name).exists():
+            gzip_file(file_name)
+
+
+def bgzip(args: List[str]) -> None:
+    """bgzip [-f] [-@ THREADS] [-l LEVEL] FILES...: compress files in place."""
+    for file_name in args:
+        if not file_name.startswith("-") and Path(file_name).is_file():
+            gzip_file(file_name)
+
+
+STUBS = {"python2": camisim, "art_illumina": art_illumina, "samtools": samtools, "fastqc": fastqc,
+         "bbduk.sh": bbduk, "metaspades.py": metaspades, "rename.sh": rename, "bbmap.sh": bbmap,
+         "jgi_summarize_bam_contig_depths": jgi_summarize_bam_contig_depths, "metabat": metabat,
+         "statswrapper.sh": statswrapper, "checkm": checkm, "dRep": drep, "pigz": pigz,
+         "bgzip": bgzip, "minimap2": minimap2, "strobealign": minimap2}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in STUBS:
+        raise SystemExit("Usage: stub_tools.py TOOL [ARGUMENTS]; available tools: {}".format(", ".join(STUBS)))
+    STUBS[sys.argv[1]](sys.argv[2:])
@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import snakefiles.checkm_batch as checkm_batch
+
+
+class TestCheckmBatch(unittest.TestCase):
+    def test_stage_and_split(self):
+        """Give genomes unique names across communities and split results back under their original names."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            genome_dirs = {}
+            for sample in ["first", "second"]:
+                genome_dirs[sample] = {"bins": Path(tmp_dir, sample, "bins"), "refs": Path(tmp_dir, sample, "refs")}
+                for kind, genome_dir in genome_dirs[sample].items():
+                    genome_dir.mkdir(parents=True)
+                # both communities contain the same source genome
+                Path(genome_dirs[sample]["refs"], "genome_a.fa").write_text(">contig\nACGT\n")
+                Path(genome_dirs[sample]["bins"], "{}.bin.1.fa".format(sample)).write_text(">contig\nACGT\n")
+            ids_file = Path(tmp_dir, "genome_ids.tsv")
+            checkm_batch.stage_genomes(genome_dirs, "fa", Path(tmp_dir, "batch"), ids_file)
+            assert sorted(path.name for path in Path(tmp_dir, "batch").iterdir()) == [
+                "first.bins.first.bin.1.fa", "first.refs.genome_a.fa",
+                "second.bins.second.bin.1.fa", "second.refs.genome_a.fa"]
+
+            checkm_table = Path(tmp_dir, "checkm.txt")
+            checkm_table.write_text("Bin Id\tCompleteness\n"
+                                    "first.bins.first.bin.1\t50.0\n"
+                                    "first.refs.genome_a\t99.0\n"
+                                    "second.bins.second.bin.1\t60.0\n"
+                                    "second.refs.genome_a\t99.0\n")
+            genome_ids = checkm_batch.read_genome_ids(ids_file)
+            bins_table = Path(tmp_dir, "second_bins.txt")
+            refs_table = Path(tmp_dir, "second_refs.txt")
+            assert checkm_batch.split_checkm_table(checkm_table, genome_ids, "second", "bins", bins_table) == 1
+            assert checkm_batch.split_checkm_table(checkm_table, genome_ids, "second", "refs", refs_table) == 1
+            assert bins_table.read_text() == "Bin Id\tCompleteness\nsecond.bin.1\t60.0\n"
+            assert refs_table.read_text() == "Bin Id\tCompleteness\ngenome_a\t99.0\n"
@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import snakefiles.checkm_shards as checkm_shards
+import snakefiles.checkm_taxa as checkm_taxa
+
+
+class TestCheckmShards(unittest.TestCase):
+    def test_chunk_genomes(self):
+        """Split bins into chunks of at most the given size, in order of their names."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bin_dir = Path(tmp_dir, "bins")
+            bin_dir.mkdir()
+            for bin_number in range(1, 6):
+                Path(bin_dir, "sample.bin.{}.fa".format(bin_number)).write_text(">contig\nACGT\n")
+            Path(bin_dir, "sample.bin").write_text("")
+            chunk_dirs = checkm_shards.chunk_genomes(bin_dir, "fa", 2, Path(tmp_dir, "chunks"))
+            assert [chunk_dir.name for chunk_dir in chunk_dirs] == ["chunk_1", "chunk_2", "chunk_3"]
+            assert [sorted(genome.name for genome in chunk_dir.iterdir()) for chunk_dir in chunk_dirs] == [
+                ["sample.bin.1.fa", "sample.bin.2.fa"], ["sample.bin.3.fa", "sample.bin.4.fa"], ["sample.bin.5.fa"]]
+
+    def test_chunk_no_bins(self):
+        """A community without bins has no chunks."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            Path(tmp_dir, "bins").mkdir()
+            assert checkm_shards.chunk_genomes(Path(tmp_dir, "bins"), "fa", 2, Path(tmp_dir, "chunks")) == []
+            assert Path(tmp_dir, "chunks").is_dir()
+
+    def test_merge_chunks(self):
+        """Merge the chunks' results into one table sorted by bin, whatever order the chunks are given in."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chunk_tables = []
+            for chunk, bin_name in [("chunk_2", "sample.bin.3"), ("chunk_1", "sample.bin.1")]:
+                chunk_table = Path(tmp_dir, "{}.checkm.txt".format(chunk))
+                chunk_table.write_text("\t".join(checkm_taxa.CHECKM_HEADER) + "\n"
+                                       + "\t".join([bin_name] + ["0"] * 13) + "\n")
+                chunk_tables.append(chunk_table)
+                Path(tmp_dir, "{}.checkm".format(chunk), "bins", bin_name).mkdir(parents=True)
+            checkm_taxa.merge_checkm_tables(chunk_tables, Path(tmp_dir, "checkm.txt"))
+            merged_rows = Path(tmp_dir, "checkm.txt").read_text().splitlines()
+            assert [row.split("\t")[0] for row in merged_rows] == ["Bin Id", "sample.bin.1", "sample.bin.3"]
+
+            checkm_shards.link_chunk_results([Path(tmp_dir, "chunk_2.checkm"), Path(tmp_dir, "chunk_1.checkm")],
+                                             Path(tmp_dir, "merged"))
+            assert sorted(path.name for path in Path(tmp_dir, "merged", "bins").iterdir()) == ["sample.bin.1",
+                                                                                                "sample.bin.3"]
+
+    def test_chunk_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ValueError):
+                checkm_shards.chunk_genomes(Path(tmp_dir), "fa", 0, Path(tmp_dir, "chunks"))
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import camisim_setup.taxonomy_cache as taxonomy_cache
+import snakefiles.checkm_taxa as checkm_taxa
+
+
+class TestCheckmTaxa(unittest.TestCase):
+    taxdump = Path("test/data/taxdump_test.tar.gz")
+    taxon_list = {("life", "Prokaryote"), ("domain", "Bacteria"), ("phylum", "Firmicutes"),
+                  ("genus", "Enterococcus")}
+
+    def test_read_taxon_list(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            taxon_file = Path(tmp_dir, "taxon_list.txt")
+            taxon_file.write_text("  Rank      Taxon                 # genomes   # marker genes   # marker sets\n"
+                                  "  --------------------------------------------------------------------------\n"
+                                  "  domain    Bacteria              5449        104              58\n"
+                                  "  species   Escherichia coli      50          1282             302\n")
+            assert checkm_taxa.read_taxon_list(taxon_file) == {("domain", "Bacteria"),
+                                                               ("species", "Escherichia coli")}
+
+    def test_choose_marker_set(self):
+        """Use the most specific taxon with a marker set, resolving merged taxids."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = taxonomy_cache.build_taxonomy_index(self.taxdump, Path(tmp_dir))
+            lineage = checkm_taxa.get_lineage(index_file, "1353")
+            assert lineage == {"species": "Enterococcus faecium", "genus": "Enterococcus",
+                               "phylum": "Firmicutes", "domain": "Bacteria"}
+            assert checkm_taxa.choose_marker_set(lineage, self.taxon_list) == ("genus", "Enterococcus")
+            # no marker set for Mycoplasma
+            assert checkm_taxa.choose_marker_set(checkm_taxa.get_lineage(index_file, "2104"),
+                                                 self.taxon_list) == ("domain", "Bacteria")
+            assert checkm_taxa.get_lineage(index_file, "9999") == {}
+
+    def test_closest_genomes(self):
+        closest = checkm_taxa.get_closest_genomes(Path("test/data/Ndb.csv"))
+        assert closest["test_hiseq_2500_bin_2"] == "Streptomyces_coelicolor_A32_NC_003888_3"
+
+    def test_groups(self):
+        """Link genomes into one directory per marker set and check bins of unknown origin with all markers."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = taxonomy_cache.build_taxonomy_index(self.taxdump, Path(tmp_dir))
+            genome_files = [Path(tmp_dir, "{}.fa".format(name)) for name in ["sample.bin.1", "sample.bin.2",
+                                                                              "sample.bin.3"]]
+            for genome_file in genome_files:
+                genome_file.write_text(">contig\nACGT\n")
+            marker_sets = checkm_taxa.assign_marker_sets(genome_files, {"sample.bin.1": "1353",
+                                                                        "sample.bin.2": "1352"},
+                                                         index_file, self.taxon_list)
+            assert marker_sets == {("genus", "Enterococcus"): genome_files[:2],
+                                   ("life", "Prokaryote"): genome_files[2:]}
+            groups_file = Path(tmp_dir, "groups.tsv")
+            checkm_taxa.link_marker_set_groups(marker_sets, Path(tmp_dir, "groups"), groups_file)
+            assert groups_file.read_text() == ("group\trank\ttaxon\tgenomes\n"
+                                               "group_1\tgenus\tEnterococcus\t2\n"
+                                               "group_2\tlife\tProkaryote\t1\n")
+            assert sorted(path.name for path in Path(tmp_dir, "groups", "group_1").iterdir()) == [
+                "sample.bin.1.fa", "sample.bin.2.fa"]
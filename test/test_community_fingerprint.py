@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import snakefiles.community_fingerprint as community_fingerprint
+
+PARAMETERS = {"simulator": "camisim", "insert_size": 270, "sample_size_gbp": 2.5}
+
+
+class TestCommunityFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.genome_dir = Path(self.tmp_dir.name, "genomes")
+        self.genome_dir.mkdir()
+        for genome in ["genome_a", "genome_b", "genome_c"]:
+            Path(self.genome_dir, "{}.fa".format(genome)).write_text(">{}\nACGT\n".format(genome))
+        self.samples_file = Path(self.tmp_dir.name, "communities.tsv")
+        self.out_dir = Path(self.tmp_dir.name, "fingerprints")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_communities(self, rows):
+        """Write a community file with the communities first, second and copy."""
+        self.samples_file.write_text("genomes\tseq_type\tfirst\tsecond\tcopy\n" + "".join(
+            "{}\tchromosome\t{}\n".format(Path(self.genome_dir, genome), "\t".join(abundances))
+            for genome, abundances in rows))
+
+    def test_unchanged_communities(self):
+        """Only rewrite fingerprints of communities whose abundances changed."""
+        self.write_communities([("genome_a.fa", ["1", "2", "1"]), ("genome_b.fa", ["0", "1", "0"])])
+        fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                PARAMETERS, self.out_dir)
+        assert fingerprints["first"] == fingerprints["copy"] != fingerprints["second"]
+        assert community_fingerprint.get_shared_communities(fingerprints) == {"copy": "first"}
+        first_mtime = os.stat(Path(self.out_dir, "first.txt")).st_mtime_ns
+        os.utime(Path(self.out_dir, "second.txt"), ns=(0, 0))
+
+        # reordering rows and writing whole numbers as decimals changes nothing
+        self.write_communities([("genome_b.fa", ["0", "3", "0"]), ("genome_a.fa", ["1.0", "2", "1"])])
+        new_fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                    PARAMETERS, self.out_dir)
+        assert new_fingerprints["first"] == fingerprints["first"]
+        assert os.stat(Path(self.out_dir, "first.txt")).st_mtime_ns == first_mtime
+        assert new_fingerprints["second"] != fingerprints["second"]
+        assert os.stat(Path(self.out_dir, "second.txt")).st_mtime_ns != 0
+
+    def test_deleted_reads(self):
+        """Don't share reads that were deleted, and keep how reads were made once they are deleted."""
+        fingerprints = {"first": "a", "second": "b", "copy": "a", "copy_2": "a"}
+        # first was simulated in an earlier run and its reads deleted since
+        previous = {"first": ["a", ""], "second": ["b", ""]}
+        shared = community_fingerprint.get_shared_communities(fingerprints, ["second"], previous)
+        assert shared == {"copy_2": "copy"}
+
+        # after the reads of copy and copy_2 are deleted as well, they keep being made the same way
+        previous.update({"copy": ["a", ""], "copy_2": ["a", "copy"]})
+        assert community_fingerprint.get_shared_communities(fingerprints, [], previous) == {"copy_2": "copy"}
+        # a changed community is simulated again and can be shared from
+        fingerprints["first"] = "c"
+        fingerprints["copy_3"] = "c"
+        assert community_fingerprint.get_shared_communities(fingerprints, [], previous) == {"copy_2": "copy",
+                                                                                          "copy_3": "first"}
+
+    def test_update_shared(self):
+        """Record the shared communities of a run for the next run."""
+        Path(self.out_dir).mkdir()
+        fingerprints = {"first": "a", "copy": "a"}
+        assert community_fingerprint.update_shared_communities(fingerprints, [], self.out_dir) == {"copy": "first"}
+        assert community_fingerprint.update_shared_communities(fingerprints, [], self.out_dir) == {"copy": "first"}
+        fingerprints["copy_2"] = "a"
+        assert community_fingerprint.update_shared_communities(fingerprints, ["first"], self.out_dir) \
+               == {"copy": "first", "copy_2": "first"}
+
+    def test_genome_content(self):
+        """Change the fingerprint when a member genome's content changes, but not a non-member's."""
+        self.write_communities([("genome_a.fa", ["1", "1", "1"]), ("genome_c.fa", ["0", "0", "1"])])
+        fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                PARAMETERS, self.out_dir)
+        Path(self.genome_dir, "genome_c.fa").write_text(">genome_c\nACGTACGT\n")
+        new_fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                    PARAMETERS, self.out_dir)
+        assert new_fingerprints["first"] == fingerprints["first"]
+        assert new_fingerprints["copy"] != fingerprints["copy"]
+
+    def test_archive_records(self):
+        """Change the fingerprints of records of an archive when the archive changes."""
+        archive = Path(self.genome_dir, "genomes.fa")
+        archive.write_text(">genome_x\nACGT\n>genome_y\nTTTT\n")
+        self.write_communities([("genomes.fa::genome_x", ["1", "0", "0"]), ("genomes.fa::genome_y", ["0", "1", "0"]),
+                                ("genome_a.fa", ["0", "0", "1"])])
+        fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                PARAMETERS, self.out_dir)
+        assert fingerprints["first"] != fingerprints["second"]
+        archive.write_text(">genome_x\nACGT\n>genome_y\nTTTTT\n")
+        new_fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first", "second", "copy"],
+                                                                    PARAMETERS, self.out_dir)
+        assert new_fingerprints["first"] != fingerprints["first"]
+        assert new_fingerprints["second"] != fingerprints["second"]
+        assert new_fingerprints["copy"] == fingerprints["copy"]
+
+    def test_parameters(self):
+        """Change all fingerprints when a simulation parameter changes."""
+        self.write_communities([("genome_a.fa", ["1", "1", "1"])])
+        fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first"], PARAMETERS,
+                                                                self.out_dir)
+        new_fingerprints = community_fingerprint.write_fingerprints(self.samples_file, ["first"],
+                                                                    dict(PARAMETERS, insert_size=300), self.out_dir)
+        assert new_fingerprints["first"] != fingerprints["first"]
+
+    def test_hash_cache(self):
+        """Reuse a genome's hash while its size and modification time are unchanged."""
+        genome_file = Path(self.genome_dir, "genome_a.fa")
+        hash_cache = {}
+        genome_hash = community_fingerprint.hash_genome(genome_file, hash_cache)
+        hash_cache[str(genome_file.resolve())]["sha256"] = "cached"
+        assert community_fingerprint.hash_genome(genome_file, hash_cache) == "cached"
+        genome_file.write_text(">genome_a\nACGTT\n")
+        assert community_fingerprint.hash_genome(genome_file, hash_cache) not in {"cached", genome_hash}
+        assert community_fingerprint.hash_genome(Path(self.genome_dir, "missing.fa"), hash_cache) == "missing"
@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+import generate_summary.disk_usage as disk_usage
+
+
+class TestDiskUsage(unittest.TestCase):
+    def test_summarize_usage(self):
+        true_usage = pd.DataFrame({"sample": ["sample1"], "peak_bytes": [9000], "peak_step": ["trim_bbduk"],
+                                   "final_bytes": [3000]})
+        test_usage = disk_usage.summarize_disk_usage([Path("test/data/disk_usage_log.tsv")], "sample1")
+        pd.testing.assert_frame_equal(test_usage, true_usage)
+
+    def test_empty_log(self):
+        with self.assertRaisesRegex(ValueError, "No disk usage recorded for sample1"):
+            disk_usage.summarize_disk_usage([Path("test/data/blank_file")], "sample1")
+
+    def test_step_logs(self):
+        """Merge the snapshots each step logs on its own, ordered by when they were taken."""
+        true_usage = pd.DataFrame({"sample": ["sample1"], "peak_bytes": [9000], "peak_step": ["trim_bbduk"],
+                                   "final_bytes": [3000]})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            step_logs = []
+            for step, timestamp, usage in [("final", 400, 3000), ("run_camisim", 100, 5000),
+                                           ("trim_bbduk", 200, 9000)]:
+                step_logs.append(Path(tmp_dir, "{}.tsv".format(step)))
+                step_logs[-1].write_text("{}\t{}\t{}\n".format(step, timestamp, usage))
+            test_usage = disk_usage.summarize_disk_usage(step_logs + [Path("test/data/blank_file")], "sample1")
+        pd.testing.assert_frame_equal(test_usage, true_usage)
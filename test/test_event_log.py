@@ -0,0 +1,72 @@
+import itertools
+import unittest
+
+from pathlib import Path
+
+import event_log
+
+
+class TestSnakemakeEventParser(unittest.TestCase):
+    snakemake_output = Path(__file__).parent / "data" / "snakemake_output.txt"
+
+    def get_events(self):
+        # every call to the clock advances it by one second
+        event_parser = event_log.SnakemakeEventParser(clock=itertools.count().__next__)
+        with open(self.snakemake_output) as snakemake_output:
+            events = [event for line in snakemake_output for event in event_parser.parse_line(line)]
+        return events + event_parser.finish(1)
+
+    def test_job_events(self):
+        """Report job starts and ends from the output of different Snakemake versions."""
+        events = self.get_events()
+        job_events = [(event["event"], event["jobid"], event["rule"], event["sample"], event["threads"])
+                      for event in events if event["event"] in {"job_start", "job_end"}]
+        assert job_events == [("job_start", 4, "trim_bbduk", "sample1", 4),
+                              ("job_start", 7, "trim_bbduk", "sample2", 1),
+                              ("job_end", 4, "trim_bbduk", "sample1", 4),
+                              ("job_start", 2, "checkm", "sample1", 1),
+                              ("job_end", 2, "checkm", "sample1", 1),
+                              ("job_end", 7, "trim_bbduk", "sample2", 1)]
+        assert events[0]["resources"] == {"tmpdir": "/tmp", "mem_mb": "1000"}
+
+    def test_job_end(self):
+        """Report exit status and elapsed time, and add resource usage from benchmark files."""
+        job_ends = {event["jobid"]: event for event in self.get_events() if event["event"] == "job_end"}
+        assert job_ends[4]["exit_status"] == 0
+        assert job_ends[4]["elapsed_s"] == 2
+        assert job_ends[4]["cpu_time_s"] == 180
+        assert job_ends[4]["max_rss_mb"] == 2048
+        assert job_ends[7]["exit_status"] == 3
+        assert "max_rss_mb" not in job_ends[7]
+
+    def test_progress(self):
+        """Summarize progress for each community and list running jobs, longest running first."""
+        progress = [event for event in self.get_events() if event["event"] == "progress"]
+        assert [(event["done"], event["total"], event["percent"]) for event in progress] == [(1, 3, 33),
+                                                                                             (2, 3, 67)]
+        assert progress[0]["samples"] == {"sample1": {"finished": 1, "failed": 0, "running": 0},
+                                          "sample2": {"finished": 0, "failed": 0, "running": 1}}
+        assert [job["jobid"] for job in progress[0]["running"]] == [7]
+        assert event_log.format_progress(progress[0]).splitlines()[1:] == [
+            "  sample1: 1 finished, 0 running, 0 failed",
+            "  sample2: 0 finished, 1 running, 0 failed",
+            "  longest running: trim_bbduk for sample2 (2 s)"]
+
+    def test_workflow_end(self):
+        workflow_end = self.get_events()[-1]
+        assert workflow_end["event"] == "workflow_end"
+        assert workflow_end["exit_status"] == 1
+        assert workflow_end["samples"] == {"sample1": {"finished": 2, "failed": 0, "running": 0},
+                                           "sample2": {"finished": 0, "failed": 1, "running": 0}}
+
+    def test_group_job(self):
+        """Report each job of a group job, whose job descriptions are indented."""
+        event_parser = event_log.SnakemakeEventParser(clock=itertools.count().__next__)
+        group_output = ["Group job summary (jobs in lexicogr. order):\n",
+                        "    rule make_bin_summary:\n", "        jobid: 12\n", "        wildcards: sample=sample1\n",
+                        "    rule summarize_results:\n", "        jobid: 10\n", "        wildcards: sample=sample1\n",
+                        "Finished job 10.\n"]
+        events = [event for line in group_output for event in event_parser.parse_line(line)]
+        assert [(event["event"], event["jobid"], event["rule"]) for event in events] == [
+            ("job_start", 12, "make_bin_summary"), ("job_start", 10, "summarize_results"),
+            ("job_end", 10, "summarize_results")]
@@ -1,4 +1,6 @@
+import os
 import pathlib
+import tempfile
 import unittest
 
 import camisim_setup.extract_camisim_data as extract_cami
@@ -8,4 +10,71 @@ class TestMetadataFromSample(unittest.TestCase):
         distribution_file = pathlib.Path(__file__).parent / "data" / "fail_distributions.tsv"
         fail_col = "fail_sample"
         with self.assertRaisesRegex(ValueError, "Incorrect file type, only Genbank and Fasta files can be used"):
-            extract_cami.get_camisim_per_sample(distribution_file, fail_col)
\ No newline at end of file
+            extract_cami.get_camisim_per_sample(distribution_file, fail_col)
+
+
+class TestLinkOrCopy(unittest.TestCase):
+    def test_link_fasta(self):
+        """Link instead of copying, replacing an earlier target without changing the source."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = pathlib.Path(tmp_dir, "genome.fasta")
+            source.write_text(">contig\nACGT\n")
+            target = pathlib.Path(tmp_dir, "genome.fa")
+            target.write_text(">old\nTTTT\n")
+            extract_cami.link_or_copy(source, target)
+            assert target.read_text() == ">contig\nACGT\n"
+            assert target.samefile(source)
+            extract_cami.link_or_copy(source, target)
+            assert source.read_text() == ">contig\nACGT\n"
+
+
+class TestGenomeArchive(unittest.TestCase):
+    genome_dir = pathlib.Path(__file__).resolve().parent / "data" / "test_genomes"
+    genbank_files = ["Enterococcus_faecium_Ef_aus00233_LT598663.1.gb", "Mycoplasma_pneumoniae_C267_NZ_CP014267.gb"]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.old_dir = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.old_dir)
+        self.tmp_dir.cleanup()
+
+    def extract(self, genomes):
+        """Extract a community of the given genomes and return its metadata and genome files."""
+        pathlib.Path("communities.tsv").write_text("genomes\tseq_type\tcommunity\n" + "".join(
+            "{}\tchromosome\t1\n".format(genome) for genome in genomes))
+        extract_cami.get_camisim_per_sample(pathlib.Path("communities.tsv"), "community")
+        metadata = pathlib.Path("camisim_configfiles", "metadata_community").read_text()
+        id_to_genome = pathlib.Path("camisim_configfiles", "id_to_genome_file_community").read_text()
+        return metadata, {line.split("\t")[0]: pathlib.Path(line.split("\t")[1]).read_text()
+                          for line in id_to_genome.splitlines()}
+
+    def test_genbank_archive(self):
+        """Records of a GenBank archive give the same genomes and metadata as separate GenBank files."""
+        archive = pathlib.Path("genomes.gb")
+        archive.write_text("".join((self.genome_dir / genbank_file).read_text() for genbank_file in self.genbank_files))
+        file_metadata, file_genomes = self.extract([self.genome_dir / genbank_file
+                                                    for genbank_file in self.genbank_files])
+        archive_metadata, archive_genomes = self.extract(["{}::LT598663.1".format(archive),
+                                                          "{}::CP014267.1".format(archive)])
+        assert archive_metadata == file_metadata
+        assert archive_genomes == file_genomes
+        assert len(list(pathlib.Path("archive_index").glob("genomes.gb_*.idx"))) == 1
+
+    def test_fasta_archive(self):
+        """Write records of a FASTA archive to files of their own, reusing the archive's index."""
+        archive = pathlib.Path("genomes.fa")
+        archive.write_text(">genome_a description\nACGT\nAC\n>genome_b\nTTTT\n")
+        metadata, genomes = self.extract(["{}::genome_b".format(archive), "{}::genome_a".format(archive)])
+        assert metadata.splitlines()[1:] == ["genome_b\t1\t2\tknown_strain", "genome_a\t2\t2\tknown_strain"]
+        assert genomes == {"genome_b": ">genome_b\nTTTT\n", "genome_a": ">genome_a description\nACGTAC\n"}
+        # the existing index is used rather than indexing the archive again
+        index_file = extract_cami.index_archive(archive, pathlib.Path("archive_index"))
+        assert [index.name for index in pathlib.Path("archive_index").glob("*.idx")] == [index_file.name]
+
+    def test_missing_record(self):
+        pathlib.Path("genomes.fa").write_text(">genome_a\nACGT\n")
+        with self.assertRaisesRegex(ValueError, "Record genome_c not found in genomes.fa"):
+            self.extract(["genomes.fa::genome_c"])
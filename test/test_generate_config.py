@@ -537,3 +537,34 @@ class TestGenerateConfig(unittest.TestCase):
                                                                 own_error_readlength=test_readlength,
                                                                 insert_size=insert)
         assert correct_config_insert == generated_config_insert
+
+    def test_no_gsa_and_cached_taxonomy(self):
+        """Skip gold standard assemblies and use a prepared taxdump directory."""
+        camisim_dir = Path("/home/people/katste/camisim/CAMISIM")
+        metadata = Path("test/data/metadata")
+        id_to_genome = Path("test/data/id_to_genome_file")
+        readsim_dir = camisim_dir / "tools" / "art_illumina-2.3.6" / "art_illumina"
+        error_profiles = camisim_dir / "tools" / "art_illumina-2.3.6" / "profiles"
+        generated_config = camiconf.generate_config_file(camisim_dir, metadata, id_to_genome, "camisim_out", "art",
+                                                         readsim_dir, self.samtools_path, "replicates", 2, 0.1,
+                                                         error_profiles, gold_standard=False,
+                                                         ncbi_taxdump=Path("/cache/camisim_taxonomy/sample1"))
+        config_lines = generated_config.splitlines()
+        assert "gsa=False" in config_lines
+        assert "pooled_gsa=False" in config_lines
+        assert "ncbi_taxdump=/cache/camisim_taxonomy/sample1" in config_lines
+
+    def test_compression_level(self):
+        """Set CAMISIM's compression level, with 0 leaving reads uncompressed."""
+        camisim_dir = Path("/home/people/katste/camisim/CAMISIM")
+        readsim_dir = camisim_dir / "tools" / "art_illumina-2.3.6" / "art_illumina"
+        error_profiles = camisim_dir / "tools" / "art_illumina-2.3.6" / "profiles"
+        generated_config = camiconf.generate_config_file(camisim_dir, Path("test/data/metadata"),
+                                                         Path("test/data/id_to_genome_file"), "camisim_out", "art",
+                                                         readsim_dir, self.samtools_path, "replicates", 2, 0.1,
+                                                         error_profiles, compress=0)
+        assert "compress=0" in generated_config.splitlines()
+        with self.assertRaisesRegex(ValueError, "Compression level must be between 0 and 9."):
+            camiconf.generate_config_file(camisim_dir, Path("test/data/metadata"), Path("test/data/id_to_genome_file"),
+                                          "camisim_out", "art", readsim_dir, self.samtools_path, "replicates", 2, 0.1,
+                                          error_profiles, compress=10)
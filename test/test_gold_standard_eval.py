@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+from Bio import SeqIO
+
+import generate_summary.gold_standard_eval as gold_standard
+
+
+class TestReadOrigins(unittest.TestCase):
+    def test_record_origins(self):
+        true_origins = {"genome_a": "genome_a", "genome_b": "genome_b"}
+        true_sizes = {"genome_a": 1000, "genome_b": 3000}
+        test_origins, test_sizes = gold_standard.get_record_origins(Path("test/data/direct_art/id_to_genome_file"))
+        assert test_origins == true_origins
+        assert test_sizes == true_sizes
+
+    def test_read_origin(self):
+        """Identify source genomes from ART read names with and without mate suffix."""
+        record_origins = {"NZ_CP014267.1": "Mycoplasma_pneumoniae_C267_NZ_CP014267"}
+        assert gold_standard.get_read_origin("NZ_CP014267.1-152/1",
+                                             record_origins) == "Mycoplasma_pneumoniae_C267_NZ_CP014267"
+        assert gold_standard.get_read_origin("NZ_CP014267.1-152",
+                                             record_origins) == "Mycoplasma_pneumoniae_C267_NZ_CP014267"
+        assert gold_standard.get_read_origin("unknown-1/1", record_origins) == ""
+
+
+class TestEvaluateBins(unittest.TestCase):
+    def test_contig_origins(self):
+        """Assign contigs by majority of primary alignments."""
+        record_origins = {"genome_a": "genome_a", "genome_b": "genome_b"}
+        test_origins, test_lengths = gold_standard.get_contig_origins(Path("test/data/gold_standard/test.sam"),
+                                                                      record_origins)
+        assert test_origins == {"sample_c1": "genome_a", "sample_c2": "genome_b"}
+        assert test_lengths == {"sample_c1": 800, "sample_c2": 500, "sample_c3": 300}
+
+    def test_evaluate_bins(self):
+        true_eval = pd.DataFrame({"bin_name": ["sample_bin_1", "sample_bin_2"],
+                                  "closest_genome": ["genome_a", "genome_b"],
+                                  "purity": [800 / 1100, 1.0],
+                                  "completeness": [0.8, 500 / 3000],
+                                  "bin_bp": [1100, 500]})
+        bin_files = [Path("test/data/gold_standard/sample.bin.1.fa"), Path("test/data/gold_standard/sample.bin.2.fa")]
+        test_eval = gold_standard.evaluate_bins(bin_files, {"sample_c1": "genome_a", "sample_c2": "genome_b"},
+                                                {"sample_c1": 800, "sample_c2": 500, "sample_c3": 300},
+                                                {"genome_a": 1000, "genome_b": 3000},
+                                                gold_standard.get_genome_files(
+                                                    Path("test/data/direct_art/id_to_genome_file")))
+        pd.testing.assert_frame_equal(test_eval, true_eval)
+
+    def test_overlapping_contigs(self):
+        """Count genome positions covered by overlapping contigs only once."""
+        genome = str(next(SeqIO.parse("test/data/direct_art/genome_a.fa", "fasta")).seq)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bin_file = Path(tmp_dir, "sample.bin.1.fa")
+            bin_file.write_text(">sample_c1\n{}\n>sample_c2\n{}\n>sample_c3\n{}\n".format(
+                genome[:600], genome[300:700], genome[300:700]))
+            test_eval = gold_standard.evaluate_bins([bin_file], dict.fromkeys(["sample_c1", "sample_c2", "sample_c3"],
+                                                                              "genome_a"),
+                                                    {"sample_c1": 600, "sample_c2": 400, "sample_c3": 400},
+                                                    {"genome_a": 1000},
+                                                    {"genome_a": Path("test/data/direct_art/genome_a.fa")})
+        assert test_eval.loc[0, "completeness"] == 0.7
+        assert test_eval.loc[0, "bin_bp"] == 1400
+
+    def test_unassigned_bin(self):
+        """Leave bins without any identifiable reads unassigned."""
+        bin_files = [Path("test/data/gold_standard/sample.bin.1.fa")]
+        test_eval = gold_standard.evaluate_bins(bin_files, {}, {"sample_c1": 800, "sample_c3": 300}, {}, {})
+        assert test_eval.loc[0, "bin_bp"] == 1100
+        assert pd.isna(test_eval.loc[0, "closest_genome"]) and pd.isna(test_eval.loc[0, "purity"])
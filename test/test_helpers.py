@@ -1,4 +1,5 @@
 import pathlib
+import tempfile
 import unittest
 
 import snakefiles.snakemake_helpers as snakehelper
@@ -9,4 +10,51 @@ class TestPlasmidCheck(unittest.TestCase):
         no_plasmid_sample = "plasmidfree"
         yes_plasmid_sample = "plasmids"
         assert snakehelper.check_plasmids(distribution_file, yes_plasmid_sample)
-        assert not snakehelper.check_plasmids(distribution_file, no_plasmid_sample)
\ No newline at end of file
+        assert not snakehelper.check_plasmids(distribution_file, no_plasmid_sample)
+
+class TestCommunitySize(unittest.TestCase):
+    def test_genbank_length(self):
+        genome_file = pathlib.Path(__file__).parent / "data" / "test_genomes" \
+                      / "Mycoplasma_pneumoniae_C267_NZ_CP014267.gb"
+        assert snakehelper.estimate_genome_length(genome_file) == 816498
+
+    def test_fasta_length(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            genome_file = pathlib.Path(tmp_dir) / "genome.fa"
+            genome_file.write_text(">contig_1\nACGTACGT\nACG\n>contig_2\nAC\n")
+            assert snakehelper.estimate_genome_length(genome_file) == 13
+
+    def test_archive_record_length(self):
+        """Get the length of a single record of a GenBank or FASTA archive."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            genome_dir = pathlib.Path(__file__).parent / "data" / "test_genomes"
+            genbank_archive = pathlib.Path(tmp_dir) / "genomes.gb"
+            genbank_archive.write_text((genome_dir / "Enterococcus_faecium_Ef_aus00233_LT598663.1.gb").read_text()
+                                       + (genome_dir / "Mycoplasma_pneumoniae_C267_NZ_CP014267.gb").read_text())
+            assert snakehelper.estimate_genome_length(pathlib.Path("{}::CP014267.1".format(genbank_archive))) \
+                   == 816498
+            fasta_archive = pathlib.Path(tmp_dir) / "genomes.fa"
+            fasta_archive.write_text(">genome_a description\nACGTACGT\nACG\n>genome_b\nAC\n")
+            assert snakehelper.estimate_genome_length(pathlib.Path("{}::genome_b".format(fasta_archive))) == 2
+            assert snakehelper.estimate_genome_length(fasta_archive) == 13
+
+    def test_community_priorities(self):
+        """Rank the community with the longest genomes highest, skipping genomes absent from a community."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            genome_dir = pathlib.Path(__file__).parent / "data" / "test_genomes"
+            samples_file = pathlib.Path(tmp_dir) / "samples.tsv"
+            samples_file.write_text("genomes\tseq_type\tsmall\tlarge\n"
+                                    "{}\tchromosome\t1\t1\n"
+                                    "{}\tchromosome\t0\t2\n".format(
+                                        genome_dir / "Mycoplasma_pneumoniae_C267_NZ_CP014267.gb",
+                                        genome_dir / "Enterococcus_faecium_Ef_aus00233_LT598663.1.gb"))
+            assert snakehelper.get_community_size(samples_file, "large") == {"genomes": 2,
+                                                                               "genome_bp": 816498 + 2888087}
+            assert snakehelper.get_community_priorities(samples_file) == {"small": 0, "large": 1}
+
+    def test_assembly_memory(self):
+        """Estimate more memory for larger communities, but never more than metaSPAdes' old limit."""
+        small = snakehelper.estimate_assembly_mem_mb(5_000_000, 2.5)
+        large = snakehelper.estimate_assembly_mem_mb(200_000_000, 2.5)
+        assert small < large
+        assert snakehelper.estimate_assembly_mem_mb(10_000_000_000, 2.5) == 120 * 1024
@@ -25,4 +25,28 @@ class TestMakeTable(unittest.TestCase):
                                    "gc_difference": [0.24719, 0.06486, 0.24719, np.nan],
                                    "completeness_difference": [-1.72, 0, -6.39, np.nan]})
         test_table = make_table.create_comparison_table(test_file)
-        pd.testing.assert_frame_equal(test_table, true_table)
\ No newline at end of file
+        pd.testing.assert_frame_equal(test_table, true_table)
+    def test_gold_standard_table(self):
+        """Use gold standard matches instead of dRep where available."""
+        test_file = pathlib.Path("test/data/summary_test_gold_standard.xlsx")
+        true_table = pd.DataFrame({"bin_name": ["test_hiseq_2500_bin_2", "test_hiseq_2500_bin_6",
+                                                "test_hiseq_2500_bin_9", "test_hiseq_2500_bin_4"],
+                                   "closest_genome": ["Streptomyces_collinus",
+                                             "Salinispora_tropica_CNB-440_NC_009380_1",
+                                             "Escherichia_coli_str_K-12_substr_MG1655_NC_000913_3",
+                                             np.nan],
+                                   "purity": [0.99, 0.98, 0.97, np.nan],
+                                   "completeness": [0.95, 0.97, 0.96, np.nan],
+                                   "scaffold_difference": [3, 4, 3, np.nan],
+                                   "contig_difference": [4, 5, 4, np.nan],
+                                   "length_difference": [3255698, 4061655, 3255698, np.nan],
+                                   "gc_difference": [0.24719, 0.06486, 0.24719, np.nan],
+                                   "completeness_difference": [-1.72, 0, -6.39, np.nan]})
+        test_table = make_table.create_comparison_table(test_file)
+        pd.testing.assert_frame_equal(test_table, true_table)
+
+    def test_provisional_note(self):
+        """Give the depth of a preview run."""
+        note = make_table.get_provisional_note(0.05)
+        assert note["note"][0].startswith("PROVISIONAL")
+        assert note["note"][1] == "Reads were simulated at 5% of the full sequencing depth"
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import snakefiles.output_cache as output_cache
+
+
+class TestOutputCache(unittest.TestCase):
+    def test_cache_key(self):
+        """Key outputs by the names and content of inputs and by the step's parameters."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            genome = Path(tmp_dir, "genome.fa")
+            genome.write_text(">genome\nACGT\n")
+            renamed_genome = Path(tmp_dir, "renamed.fa")
+            renamed_genome.write_text(">genome\nACGT\n")
+            key = output_cache.get_cache_key(["checkm_refs", "lineage_wf"], [genome])
+            assert key == output_cache.get_cache_key(["checkm_refs", "lineage_wf"], [genome])
+            assert key != output_cache.get_cache_key(["checkm_refs", "taxonomy_wf"], [genome])
+            assert key != output_cache.get_cache_key(["checkm_refs", "lineage_wf"], [renamed_genome])
+            genome.write_text(">genome\nACGG\n")
+            assert key != output_cache.get_cache_key(["checkm_refs", "lineage_wf"], [genome])
+
+    def test_store_and_restore(self):
+        """Restore stored files and directories in a different run as copies with a current modification time."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = Path(tmp_dir, "cache")
+            first_run = Path(tmp_dir, "first_run")
+            Path(first_run, "checkm_dir", "storage").mkdir(parents=True)
+            Path(first_run, "checkm_dir", "storage", "bin_stats.tsv").write_text("stats\n")
+            Path(first_run, "checkm.txt").write_text("Bin Id\n")
+            assert not output_cache.restore_outputs(cache_dir, "key", [Path(first_run, "checkm.txt")])
+            output_cache.store_outputs(cache_dir, "key", [Path(first_run, "checkm.txt"),
+                                                          Path(first_run, "checkm_dir")])
+            os.utime(Path(first_run, "checkm.txt"), (0, 0))
+
+            second_run = Path(tmp_dir, "second_run")
+            outputs = [Path(second_run, "checkm.txt"), Path(second_run, "checkm_dir")]
+            assert output_cache.restore_outputs(cache_dir, "key", outputs)
+            assert outputs[0].read_text() == "Bin Id\n"
+            assert outputs[0].stat().st_mtime > 0
+            assert Path(outputs[1], "storage", "bin_stats.tsv").read_text() == "stats\n"
+            assert not Path(outputs[1], "storage", "bin_stats.tsv").samefile(Path(first_run, "checkm_dir", "storage",
+                                                                                  "bin_stats.tsv"))
+
+    def test_restore_keeps_stored_run(self):
+        """Restoring in another run does not change the modification time of the run that stored the outputs."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = Path(tmp_dir, "cache")
+            first_output = Path(tmp_dir, "first_run", "checkm.txt")
+            first_output.parent.mkdir()
+            first_output.write_text("Bin Id\n")
+            output_cache.store_outputs(cache_dir, "key", [first_output])
+            os.utime(first_output, ns=(0, 1000))
+            first_mtime = first_output.stat().st_mtime_ns
+
+            assert output_cache.restore_outputs(cache_dir, "key", [Path(tmp_dir, "second_run", "checkm.txt")])
+            assert first_output.stat().st_mtime_ns == first_mtime
+            assert Path(tmp_dir, "second_run", "checkm.txt").stat().st_mtime_ns > first_mtime
+
+    def test_evict(self):
+        """Remove the least recently used entries first, but never the one just stored."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = Path(tmp_dir, "cache")
+            for entry_number, key in enumerate(["old", "recent", "new"]):
+                output = Path(tmp_dir, key)
+                output.write_bytes(b"x" * 100)
+                entry = output_cache.store_outputs(cache_dir, key, [output])
+                os.utime(entry, (entry_number, entry_number))
+            assert output_cache.evict_entries(cache_dir, 150, keep="old") == ["recent", "new"]
+            assert sorted(entry.name for entry in cache_dir.iterdir()) == ["old"]
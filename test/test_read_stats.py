@@ -0,0 +1,73 @@
+import gzip
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+from Bio import bgzf
+
+import generate_summary.read_stats as read_stats
+
+
+class TestReadStats(unittest.TestCase):
+    # two genomes' reads, as concatenated by the read simulation steps
+    genome_reads = [b"@read1\nACGT\n+\nIIII\n@read2\nGGCC\n+\n!!!!\n",
+                    b"@read3\nAAAAAA\n+\n5555II\n"]
+
+    def write_reads(self, tmp_dir: str):
+        members = [gzip.compress(reads) for reads in self.genome_reads]
+        reads_file = Path(tmp_dir, "reads.gz")
+        reads_file.write_bytes(b"".join(members))
+        member_sizes = Path(tmp_dir, "reads.members")
+        member_sizes.write_text("".join("{}\n".format(len(member)) for member in members))
+        return reads_file, member_sizes
+
+    def test_summarize(self):
+        """Count reads and bases and average quality and GC content across all members."""
+        true_summary = pd.DataFrame({"read_file": ["reads.gz"], "reads": [3], "bases": [14], "min_length": [4],
+                                     "mean_length": [4.67], "max_length": [6], "mean_quality": [22.86],
+                                     "mean_gc": [50.0]})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            reads_file, _ = self.write_reads(tmp_dir)
+            stats = read_stats.get_file_stats(reads_file)
+        pd.testing.assert_frame_equal(read_stats.summarize_read_stats(stats, "reads.gz"), true_summary)
+
+    def test_distributions(self):
+        """Give the same distributions when decompressing members in parallel."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            reads_file, member_sizes = self.write_reads(tmp_dir)
+            first_size, second_size = [int(size) for size in member_sizes.read_text().split()]
+            assert read_stats.get_members(reads_file, member_sizes) == [(0, first_size), (first_size, second_size)]
+            serial = read_stats.get_distributions(read_stats.get_file_stats(reads_file))
+            parallel = read_stats.get_distributions(read_stats.get_file_stats(reads_file, member_sizes, 2))
+        assert serial == parallel
+        assert serial["length_counts"] == [0, 0, 0, 0, 2, 0, 1]
+        assert serial["mean_quality_per_position"] == [20, 20, 20, 20, 40, 40]
+        assert serial["gc_percent_counts"][0] == 1
+        assert serial["gc_percent_counts"][50] == 1
+        assert serial["gc_percent_counts"][100] == 1
+
+    def test_uncompressed_reads(self):
+        """Give the same distributions for uncompressed and BGZF-compressed reads."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            reads_file, _ = self.write_reads(tmp_dir)
+            gzipped = read_stats.get_distributions(read_stats.get_file_stats(reads_file))
+            plain_file = Path(tmp_dir, "reads.fq")
+            plain_file.write_bytes(b"".join(self.genome_reads))
+            plain_sizes = Path(tmp_dir, "reads_fq.members")
+            plain_sizes.write_text("".join("{}\n".format(len(reads)) for reads in self.genome_reads))
+            plain = read_stats.get_distributions(read_stats.get_file_stats(plain_file, plain_sizes, 2))
+            bgzf_file = Path(tmp_dir, "reads.bgzf.gz")
+            with bgzf.BgzfWriter(bgzf_file, "wb") as bgzf_reads:
+                bgzf_reads.write(b"".join(self.genome_reads))
+            bgzf_stats = read_stats.get_distributions(read_stats.get_file_stats(bgzf_file))
+        assert gzipped == plain == bgzf_stats
+
+    def test_wrong_member_sizes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            reads_file, member_sizes = self.write_reads(tmp_dir)
+            member_sizes.write_text("10\n")
+            with self.assertRaisesRegex(ValueError, "do not add up"):
+                read_stats.get_members(reads_file, member_sizes)
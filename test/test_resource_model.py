@@ -0,0 +1,38 @@
+import unittest
+
+import pandas as pd
+
+import snakefiles.resource_model as resource_model
+
+
+class TestResourceModel(unittest.TestCase):
+    # assembly memory grows with genome length; runtime with the amount of reads
+    resource_usage = pd.DataFrame({"sample": ["s{}".format(number) for number in range(6)],
+                                   "step": ["metaspades"] * 5 + ["checkm"],
+                                   "wall_time_s": [600, 1200, 1800, 2400, 3000, 100],
+                                   "max_rss_mb": [3000, 5000, 7000, 9000, 11000, 100],
+                                   "genome_bp": [1e6, 2e6, 3e6, 4e6, 5e6, 1e6],
+                                   "genome_count": [1, 1, 2, 2, 3, 1],
+                                   "read_bases": [1e9, 2e9, 3e9, 4e9, 5e9, 1e9]})
+
+    def test_fit(self):
+        """Only model steps with enough observations, and never let usage shrink with size."""
+        model = resource_model.fit_resource_model(self.resource_usage, steps=["metaspades", "checkm"])
+        assert list(model) == ["metaspades"]
+        for fit in model["metaspades"].values():
+            assert all(coefficient >= 0 for coefficient in fit["coefficients"].values())
+            assert fit["observations"] == 5
+        prediction = resource_model.predict_resource(model, "metaspades", "mem_mb",
+                                                     {"genome_bp": 6e6, "genome_count": 3, "read_bases": 6e9})
+        self.assertAlmostEqual(prediction, 13000, delta=1)
+        runtime = resource_model.predict_resource(model, "metaspades", "runtime",
+                                                  {"genome_bp": 6e6, "genome_count": 3, "read_bases": 6e9})
+        self.assertAlmostEqual(runtime, 60, delta=0.1)
+
+    def test_predict_small(self):
+        """Predict at least the smallest usage observed, and nothing for steps without a model."""
+        model = {"metaspades": {"mem_mb": {"intercept": -500, "coefficients": {"genome_bp": 0.001},
+                                           "observations": 5, "min_observed": 2000}}}
+        assert resource_model.predict_resource(model, "metaspades", "mem_mb", {"genome_bp": 1e6}) == 2000
+        assert resource_model.predict_resource(model, "metaspades", "mem_mb", {"genome_bp": 1e7}) == 9500
+        assert resource_model.predict_resource(model, "metabat2", "mem_mb", {"genome_bp": 1e6}) is None
@@ -0,0 +1,40 @@
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import generate_summary.resource_report as resource_report
+
+
+class TestResourceReport(unittest.TestCase):
+    base_dir = Path("test/data/resource_report")
+
+    def test_get_benchmarks(self):
+        """Parse community and step from file names and handle missing values."""
+        true_benchmarks = pd.DataFrame({"sample": ["", "sample1", "other_sample"],
+                                        "step": ["get_samtools_path", "asm_metaspades", "checkm"],
+                                        "wall_time_s": [2.0, 120.5, 10.0],
+                                        "cpu_time_s": [np.nan, 180.0, 9.0],
+                                        "max_rss_mb": [np.nan, 2048.0, 100.0]})
+        test_benchmarks = resource_report.get_benchmarks(self.base_dir / "benchmarks")
+        test_benchmarks = test_benchmarks.sort_values("wall_time_s").reset_index(drop=True)
+        true_benchmarks = true_benchmarks.sort_values("wall_time_s").reset_index(drop=True)
+        pd.testing.assert_frame_equal(test_benchmarks, true_benchmarks)
+
+    def test_input_sizes(self):
+        true_sizes = {"sample": "sample1", "genome_bp": 9627415, "genome_count": 2, "read_count": 2000, "read_bases": 300000,
+                      "bin_count": 2}
+        assert resource_report.get_input_sizes("sample1", self.base_dir) == true_sizes
+
+    def test_missing_input_sizes(self):
+        test_sizes = resource_report.get_input_sizes("other_sample", self.base_dir)
+        assert all(np.isnan(test_sizes[size]) for size in ["genome_bp", "genome_count", "read_count", "read_bases", "bin_count"])
+
+    def test_report(self):
+        """Only report selected communities and shared steps."""
+        test_report = resource_report.create_resource_report(self.base_dir / "benchmarks", self.base_dir,
+                                                             ["sample1"])
+        assert sorted(test_report["step"]) == ["asm_metaspades", "get_samtools_path"]
+        assert test_report.loc[test_report["step"] == "asm_metaspades", "genome_bp"].item() == 9627415
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import generate_summary.results_db as results_db
+
+
+def write_summaries(run_dir: Path, sample: str, match_sheet: str, bin_summary: pd.DataFrame) -> None:
+    """Write minimal general and bin summaries as the summary steps do."""
+    summary_dir = run_dir / "summaries"
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(summary_dir / "general_summary_{}.xlsx".format(sample)) as writer:
+        pd.DataFrame({"bin_name": ["bin_1", "genome_a"], "scaf_bp": [900, 1000],
+                      "genome_type": ["synthetic_MAG", "reference"]}).to_excel(writer, sheet_name="BB_stats")
+        pd.DataFrame({"Bin Id": ["bin_1", "genome_a"], "# genomes": [5, 5], "0_markers": [1, 0],
+                      "Completeness": [90.0, 100.0]}).to_excel(writer, sheet_name="CheckM")
+        bin_summary[["bin_name", "closest_genome"]].to_excel(writer, sheet_name=match_sheet)
+    with pd.ExcelWriter(summary_dir / "bin_summary_{}.xlsx".format(sample)) as writer:
+        bin_summary.to_excel(writer, sheet_name="summary")
+
+
+class TestResultsDb(unittest.TestCase):
+    def test_column_names(self):
+        assert results_db.get_column_name("Bin Id") == "bin_id"
+        assert results_db.get_column_name("# genomes") == "genomes"
+        assert results_db.get_column_name("0_markers") == "n0_markers"
+
+    def test_ingest_and_query(self):
+        """Replace a community's results when ingesting it again, and add columns of other evaluations."""
+        drep_summary = pd.DataFrame({"bin_name": ["bin_1"], "closest_genome": ["genome_a"], "ani": [0.99],
+                                     "completeness_difference": [-10.0]})
+        gold_standard_summary = pd.DataFrame({"bin_name": ["bin_1", "bin_2"], "closest_genome": ["genome_a"] * 2,
+                                              "purity": [0.9, 0.8], "completeness_difference": [-20.0, -30.0]})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database = Path(tmp_dir, "results.sqlite")
+            first_run, second_run = Path(tmp_dir, "first"), Path(tmp_dir, "second")
+            write_summaries(first_run, "community", "dRep", drep_summary)
+            write_summaries(second_run, "community", "gold_standard", gold_standard_summary)
+            results_db.ingest_run(database, first_run, {"insert_size": "270"})
+            results_db.ingest_run(database, first_run, {"insert_size": "270"})
+            stored = results_db.ingest_run(database, second_run, {"insert_size": "1000", "evaluation": "gold_standard"})
+            assert dict(zip(stored["table"], stored["rows"])) == {"genome_stats": 2, "checkm": 2,
+                                                                  "gold_standard": 2, "bin_summary": 2}
+            mean_differences = results_db.query_results(
+                database, "SELECT insert_size, AVG(completeness_difference) AS mean_difference, COUNT(*) AS bins "
+                          "FROM bin_summary JOIN communities USING (run_id, sample) "
+                          "GROUP BY insert_size ORDER BY insert_size")
+            pd.testing.assert_frame_equal(mean_differences, pd.DataFrame({"insert_size": [270, 1000],
+                                                                          "mean_difference": [-10.0, -25.0],
+                                                                          "bins": [1, 2]}))
+            purity = results_db.query_results(database, "SELECT purity FROM bin_summary ORDER BY purity")
+            assert purity["purity"].isna().sum() == 1
+            checkm = results_db.query_results(database, "SELECT bin_id, genomes, n0_markers FROM checkm")
+            assert len(checkm) == 4
+
+    def test_failed_ingest(self):
+        """Keep the results stored before if storing a community's new results fails partway."""
+        bin_summary = pd.DataFrame({"bin_name": ["bin_1"], "closest_genome": ["genome_a"], "ani": [0.99],
+                                    "completeness_difference": [-10.0]})
+        append_table = results_db.append_table
+
+        def fail_on_bin_summary(connection, table, rows):
+            if table == "bin_summary":
+                raise ValueError("Cannot store {}".format(table))
+            append_table(connection, table, rows)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database = Path(tmp_dir, "results.sqlite")
+            run_dir = Path(tmp_dir, "run")
+            write_summaries(run_dir, "community", "dRep", bin_summary)
+            results_db.ingest_run(database, run_dir, {"insert_size": "270"})
+            with mock.patch("generate_summary.results_db.append_table", side_effect=fail_on_bin_summary):
+                with self.assertRaisesRegex(ValueError, "Cannot store bin_summary"):
+                    results_db.ingest_run(database, run_dir, {"insert_size": "1000"})
+            stored = results_db.query_results(database, "SELECT (SELECT insert_size FROM communities) AS insert_size, "
+                                                        "(SELECT COUNT(*) FROM checkm) AS checkm, "
+                                                        "(SELECT COUNT(*) FROM bin_summary) AS bin_summary")
+            pd.testing.assert_frame_equal(stored, pd.DataFrame({"insert_size": [270], "checkm": [2],
+                                                                "bin_summary": [1]}))
@@ -1,4 +1,8 @@
 import pathlib
+import re
+import shutil
+import subprocess
+import tempfile
 import unittest
 
 import pandas as pd
@@ -142,6 +146,127 @@ class TestRunMagician(unittest.TestCase):
                                                   self.cluster_cmd, self.cores, *snake_flags)
         assert test_command == expected_command
 
+    def test_direct_art(self):
+        """Simulate reads with ART directly instead of CAMISIM."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            'simulator="art"',
+                            "--use-conda",
+                            "--conda-frontend", "conda",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  simulator="art")
+        assert test_command == expected_command
+
+    def test_bad_simulator(self):
+        """Catch unknown read simulation engine."""
+        with self.assertRaisesRegex(ValueError, "Simulator must be either camisim or art."):
+            run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries", simulator="wgsim")
+
+    def test_gold_standard_evaluation(self):
+        """Evaluate bins with the gold standard instead of dRep."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            'evaluation="gold_standard"',
+                            "--use-conda",
+                            "--conda-frontend", "conda",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  evaluation="gold_standard")
+        assert test_command == expected_command
+
+    def test_no_conda(self):
+        """Use tools from the PATH without conda environments."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  use_conda=False)
+        assert test_command == expected_command
+
+    def test_group_jobs(self):
+        """Switch on grouping of lightweight steps."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            "group_jobs=True",
+                            "--use-conda", "--conda-frontend", "conda",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  group_jobs=True)
+        assert test_command == expected_command
+
+    def test_preview(self):
+        """Run a preview at a fraction of the sample size in its own directory."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            "preview=0.05",
+                            "--use-conda", "--conda-frontend", "conda",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n", "--directory", "preview"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  preview=0.05)
+        assert test_command == expected_command
+
+    def test_bad_preview(self):
+        """Catch preview fractions that would not reduce the sample size."""
+        error_msg = r"Preview fraction must be above 0 and below 1."
+        for preview in [0, 1, 2.5]:
+            with self.assertRaisesRegex(ValueError, error_msg):
+                run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries", self.profile_type,
+                                           self.profile_base, self.readlength, self.insert_size,
+                                           self.cluster_cmd, self.cores, preview=preview)
+
+    def test_pipeline_profile(self):
+        """Select a pipeline profile other than the default."""
+        expected_command = ["snakemake", "all_bin_summaries", "-s", self.snake_path,
+                            "--config", 'profile_type="mbarc"',
+                            'insert_size=270', f"samples_file={self.distributions_file}",
+                            'pipeline_profile="fast"',
+                            "--use-conda", "--conda-frontend", "conda",
+                            "--configfile", str(run_magician.default_config_file),
+                            "--cores", "6", "-n"]
+        snake_flags = ["-n"]
+        test_command = run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries",
+                                                  self.profile_type,
+                                                  self.profile_base, self.readlength, self.insert_size,
+                                                  self.cluster_cmd, self.cores, *snake_flags,
+                                                  pipeline_profile="fast")
+        assert test_command == expected_command
+
+    def test_bad_pipeline_profile(self):
+        """Catch unknown pipeline profile."""
+        with self.assertRaisesRegex(ValueError, "Pipeline profile must be fast, standard or thorough."):
+            run_magician.get_snake_cmd(self.distributions_file, "all_bin_summaries", pipeline_profile="quick")
+
     def test_bad_readlength(self):
         """Catch bad read length."""
         snake_flags = ["-n"]
@@ -200,4 +325,75 @@ class TestRunMagician(unittest.TestCase):
         extra_name = "TestR"
         with self.assertRaisesRegex(ValueError,
                                     "Name of the error profile and read length can only be specified when using own profiles."):
-            run_magician.get_snake_cmd(self.distributions_file, result, profile, extra_name)
\ No newline at end of file
+            run_magician.get_snake_cmd(self.distributions_file, result, profile, extra_name)
+
+class TestCombineCommunityFiles(unittest.TestCase):
+    def test_combine_files(self):
+        """Combine communities from several files under names that include their file."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            community_dir = pathlib.Path(tmp_dir, "communities")
+            community_dir.mkdir()
+            pathlib.Path(community_dir, "project_a.tsv").write_text("genomes\tseq_type\tmock\n"
+                                                                    "/genomes/a.fa\tchromosome\t1\n"
+                                                                    "/genomes/b.fa\tchromosome\t2\n")
+            pathlib.Path(community_dir, "project_b.tsv").write_text("genomes\tseq_type\tmock\tsoil\n"
+                                                                    "/genomes/b.fa\tchromosome\t1\t0.5\n"
+                                                                    "/genomes/c.fa\tplasmid\t3\t1\n")
+            community_files = run_magician.find_community_files([community_dir])
+            assert [community_file.name for community_file in community_files] == ["project_a.tsv",
+                                                                                   "project_b.tsv"]
+            combined_file = run_magician.combine_community_files(community_files,
+                                                                 community_dir / run_magician.COMBINED_COMMUNITY_FILE)
+            expected_communities = pd.DataFrame(data={"genomes": ["/genomes/a.fa", "/genomes/b.fa",
+                                                                  "/genomes/c.fa"],
+                                                      "seq_type": ["chromosome", "chromosome", "plasmid"],
+                                                      "project_a_mock": [1, 2, 0],
+                                                      "project_b_mock": [0, 1, 3],
+                                                      "project_b_soil": [0, 0.5, 1]})
+            pd.testing.assert_frame_equal(pd.read_csv(combined_file, sep="\t"), expected_communities)
+            # the combined file is not picked up as a community file when run again
+            assert run_magician.find_community_files([community_dir]) == community_files
+
+    def test_same_file_names(self):
+        """Refuse community files whose communities could not be told apart."""
+        with self.assertRaisesRegex(ValueError, "Community files need different names"):
+            run_magician.combine_community_files([pathlib.Path("a", "communities.tsv"),
+                                                  pathlib.Path("b", "communities.tsv")],
+                                                 pathlib.Path("combined.tsv"))
+
+    def test_empty_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaisesRegex(ValueError, "No community files"):
+                run_magician.find_community_files([pathlib.Path(tmp_dir)])
+
+
+@unittest.skipIf(shutil.which("snakemake") is None, "Snakemake is not installed")
+class TestJobGroups(unittest.TestCase):
+    genome_dir = pathlib.Path(__file__).resolve().parent / "data" / "test_genomes"
+
+    def test_setup_group_per_community(self):
+        """Group each community's setup steps on their own, not together with every other community's."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            community_file = pathlib.Path(tmp_dir, "communities.tsv")
+            pd.DataFrame(data={"genomes": [str(self.genome_dir / "Enterococcus_faecium_Ef_aus00233_LT598663.1.gb"),
+                                           str(self.genome_dir / "Mycoplasma_pneumoniae_C267_NZ_CP014267.gb")],
+                               "seq_type": ["chromosome", "chromosome"],
+                               "first": [1, 1],
+                               "second": [2, 0]}).to_csv(community_file, sep="\t", index=False)
+            dry_run = subprocess.run(["snakemake", "-s", TestRunMagician.snake_path,
+                                      "--configfile", str(run_magician.default_config_file),
+                                      "--config", f"samples_file={community_file}", "camisim_path=camisim",
+                                      "group_jobs=True", "--cores", "1", "-n", "all_summaries"],
+                                     cwd=tmp_dir, capture_output=True, text=True)
+        assert dry_run.returncode == 0, dry_run.stderr
+        # jobs of a group job are listed indented below its header, up to the next line that isn't indented
+        setup_groups = []
+        in_setup_group = False
+        for line in (dry_run.stdout + dry_run.stderr).splitlines():
+            if line and not line[0].isspace():
+                in_setup_group = "Group job setup " in line
+                if in_setup_group:
+                    setup_groups.append(set())
+            elif in_setup_group and re.match(r"^\s+wildcards: sample=\S+$", line):
+                setup_groups[-1].add(line.split("=")[-1])
+        assert sorted(setup_groups, key=sorted) == [{"first"}, {"second"}]
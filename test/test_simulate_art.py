@@ -0,0 +1,68 @@
+import gzip
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+from Bio import bgzf
+
+import camisim_setup.simulate_art as simulate_art
+
+
+class TestReadCounts(unittest.TestCase):
+    genome_file = Path("test/data/direct_art/id_to_genome_file")
+    abundance_file = Path("test/data/direct_art/id_to_distributions")
+
+    def test_read_counts_success(self):
+        """Distribute reads according to abundance and genome size."""
+        true_counts = pd.DataFrame({"genome_id": ["genome_a", "genome_b"],
+                                    "fasta_path": ["test/data/direct_art/genome_a.fa",
+                                                   "test/data/direct_art/genome_b.fa"],
+                                    "genome_size": [1000, 3000],
+                                    "abundance": [2, 1],
+                                    "read_pairs": [13, 20],
+                                    "fold_coverage": [4.0, 2.0]})
+        test_counts = simulate_art.get_read_counts(self.genome_file, self.abundance_file, 0.00001, 150)
+        pd.testing.assert_frame_equal(test_counts, true_counts, check_like=True)
+
+    def test_bad_sample_size(self):
+        with self.assertRaisesRegex(ValueError, "Sample size must be above 0"):
+            simulate_art.get_read_counts(self.genome_file, self.abundance_file, 0, 150)
+
+
+class TestArtCommand(unittest.TestCase):
+    def test_art_cmd(self):
+        """Convert read counts to ART's fold coverage."""
+        expected_cmd = ["art_illumina", "-p", "-na", "-i", "genome_a.fa", "-l", "150", "-m", "270", "-s", "27",
+                        "-f", "4.500000", "-o", "reads/genome_a", "-1", "profiles/ART_MBARC-26_HiSeq_R1.txt",
+                        "-2", "profiles/ART_MBARC-26_HiSeq_R2.txt", "-rs", "1"]
+        test_cmd = simulate_art.get_art_cmd(Path("art_illumina"), Path("genome_a.fa"), Path("reads/genome_a"),
+                                            15, 1000, 150, Path("profiles/ART_MBARC-26_HiSeq_R"), 270, 1)
+        assert test_cmd == expected_cmd
+
+    def test_bad_profile(self):
+        with self.assertRaisesRegex(ValueError, "blah is not a valid type of error profile"):
+            simulate_art.simulate_reads(Path("test/data/direct_art/id_to_genome_file"),
+                                        Path("test/data/direct_art/id_to_distributions"), Path("art_out"), 1,
+                                        Path("art_illumina"), Path("profiles"), profile_name="blah")
+
+
+class TestCompressReads(unittest.TestCase):
+    def test_codecs(self):
+        """Compress reads with gzip or BGZF, or leave them uncompressed."""
+        reads = b"@read_1\nACGT\n+\nIIII\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for codec, opener in [("gzip", gzip.open), ("bgzf", bgzf.open), ("none", open)]:
+                raw_reads = Path(tmp_dir, "{}_1.fq".format(codec))
+                raw_reads.write_bytes(reads)
+                compressed_reads = simulate_art.compress_reads(raw_reads, codec, 9)
+                assert compressed_reads.name == ("none_1.fq" if codec == "none" else "{}_1.fq.gz".format(codec))
+                assert raw_reads.exists() == (codec == "none")
+                with opener(compressed_reads, "rb") as reads_in:
+                    assert reads_in.read(len(reads) + 1) == reads
+
+    def test_bad_codec(self):
+        with self.assertRaisesRegex(ValueError, "Codec must be one of gzip, bgzf, none."):
+            simulate_art.compress_reads(Path("reads_1.fq"), "zstd")
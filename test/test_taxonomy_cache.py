@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import camisim_setup.taxonomy_cache as taxonomy_cache
+
+
+class TestTaxonomyCache(unittest.TestCase):
+    taxdump = Path("test/data/taxdump_test.tar.gz")
+    metadata = Path("test/data/metadata_taxonomy")
+
+    def test_metadata_taxids(self):
+        assert taxonomy_cache.get_metadata_taxids(self.metadata) == {"1353", "2"}
+
+    def test_subset_taxonomy(self):
+        """Only write the lineages of taxids in the community, resolving merged taxids."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = taxonomy_cache.build_taxonomy_index(self.taxdump, Path(tmp_dir, "cache"))
+            assert index_file == Path(tmp_dir, "cache", "ncbi_taxonomy.sqlite")
+            # building again reuses the existing index
+            assert taxonomy_cache.build_taxonomy_index(Path("nonexistent.tar.gz"),
+                                                       Path(tmp_dir, "cache")) == index_file
+            taxonomy_cache.write_taxonomy_subset(index_file, {"1353", "2"}, Path(tmp_dir, "subset"))
+            with open(Path(tmp_dir, "subset", "nodes.dmp")) as nodes:
+                node_ids = [line.split("\t")[0] for line in nodes]
+            with open(Path(tmp_dir, "subset", "names.dmp")) as names:
+                name_ids = [line.split("\t")[0] for line in names]
+            with open(Path(tmp_dir, "subset", "merged.dmp")) as merged:
+                merged_lines = merged.read()
+        assert node_ids == ["1", "2", "1239", "1350", "1352"]
+        assert name_ids == ["1", "2", "2", "1239", "1350", "1352"]
+        assert merged_lines == "1353\t|\t1352\t|\n"
+
+    def test_missing_taxid(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = taxonomy_cache.build_taxonomy_index(self.taxdump, Path(tmp_dir))
+            with self.assertRaisesRegex(ValueError, "Taxid 9999 not found in NCBI taxonomy"):
+                taxonomy_cache.write_taxonomy_subset(index_file, {"9999"}, Path(tmp_dir, "subset"))